@@ -3,6 +3,7 @@ from flask_cors import CORS
 import os
 import sys
 import gc
+import hmac
 
 # Memory optimization settings for PyTorch
 os.environ["CUDA_VISIBLE_DEVICES"] = ""  # Force CPU-only
@@ -16,6 +17,23 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
 from backend.nlp import MathPaperSearcher
+from backend.filters import parse_filters
+from backend.marking_scheme import (
+    MarkingSchemeIndex,
+    extract_page_texts,
+    locate_question_page,
+)
+from config import (
+    ADMIN_TOKEN,
+    CACHE_DIR,
+    CORPUS_SOURCES,
+    MARKING_SCHEME_MAX_QUESTION,
+    MAX_BATCH_QUERIES,
+    PDF_CACHE_MAX_AGE,
+    PDF_SERVE_GZIP,
+    WATCH_INTERVAL,
+    WATCH_PAPERS,
+)
 import threading
 import time
 
@@ -31,33 +49,178 @@ except ImportError:
 app = Flask(__name__)
 CORS(app)
 
-# Global searcher instance
+# Global searcher instance. It is only ever replaced by a fully initialized
+# searcher (under state_lock), so requests read it once and use that object.
 searcher = None
 is_processing = False
 processing_status = "Not started"
+state_lock = threading.Lock()
+
+# Background reindexing of the live searcher (POST /api/admin/reindex and the
+# papers watcher); only one runs at a time
+reindex_lock = threading.Lock()
+reindex_state = {
+    "running": False,
+    "trigger": None,
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+}
+watcher_thread = None
+# Process that loaded the searcher: the gunicorn master when preloaded
+searcher_pid = None
+
+# Precomputed marking scheme question -> page tables, one per corpus source
+marking_scheme_indexes = {
+    source: MarkingSchemeIndex(
+        config["markingscheme_dir"],
+        os.path.join(CACHE_DIR, f"markingscheme_index_{source}.json"),
+        MARKING_SCHEME_MAX_QUESTION,
+    )
+    for source, config in CORPUS_SOURCES.items()
+}
+
+
+def get_source():
+    """Corpus source of the request (?source=...), or None if it is unknown."""
+    source = request.args.get("source", "papers")
+    return source if source in CORPUS_SOURCES else None
 
 
-def initialize_searcher():
-    """Initialize the searcher in a background thread."""
-    global searcher, is_processing, processing_status
+def initialize_searcher(start_watcher: bool = True) -> bool:
+    """Initialize the searcher in a background thread.
 
-    is_processing = True
-    processing_status = "Initializing model..."
+    A previously initialized searcher keeps serving requests until the new
+    one is ready. Returns False if an initialization is already running.
+    start_watcher=False leaves the index watcher to the caller (a preloading
+    gunicorn master, whose workers each start their own).
+    """
+    global searcher, is_processing, processing_status, searcher_pid
+
+    with state_lock:
+        if is_processing:
+            return False
+        is_processing = True
+        processing_status = "Initializing model..."
 
     try:
-        searcher = MathPaperSearcher()
+        new_searcher = MathPaperSearcher()
         processing_status = "Processing papers..."
-        searcher.process_papers()
-        processing_status = "Ready"
-        is_processing = False
+        new_searcher.process_papers()
+        processing_status = "Indexing marking schemes..."
+        for marking_scheme_index in marking_scheme_indexes.values():
+            marking_scheme_index.build()
+        processing_status = "Loading model..."
+        new_searcher.warm_up()
+        with state_lock:
+            searcher = new_searcher
+            searcher_pid = os.getpid()
+            processing_status = "Ready"
+            is_processing = False
         print("Searcher initialized successfully!")
+        if start_watcher:
+            start_papers_watcher()
 
         # Force garbage collection after initialization
         gc.collect()
     except Exception as e:
-        processing_status = f"Error: {str(e)}"
-        is_processing = False
+        with state_lock:
+            processing_status = f"Error: {str(e)}"
+            is_processing = False
         print(f"Error initializing searcher: {e}")
+    return True
+
+
+def not_ready_response():
+    return (
+        jsonify(
+            {
+                "error": "Searcher not ready yet. Please wait for initialization to complete.",
+                "status": processing_status,
+            }
+        ),
+        503,
+    )
+
+
+def init_worker():
+    """Prepare a worker process forked from a master that loaded the searcher."""
+    if searcher is not None:
+        searcher.after_fork()
+        # Threads don't survive fork: each worker watches the papers itself
+        start_papers_watcher()
+
+
+def start_reindex(trigger: str) -> bool:
+    """Rebuild the live searcher's index in a background thread.
+
+    Searches keep being served from the current index until the new one is
+    swapped in. If another process has already committed a current index,
+    that one is loaded instead of building again. Returns False if there is
+    no searcher yet or a reindex is already running.
+    """
+    current = searcher
+    if current is None or not reindex_lock.acquire(blocking=False):
+        return False
+    reindex_state.update(
+        running=True,
+        trigger=trigger,
+        started_at=time.time(),
+        finished_at=None,
+        error=None,
+    )
+    threading.Thread(
+        target=run_reindex, args=(current,), name="reindex", daemon=True
+    ).start()
+    return True
+
+
+def run_reindex(current):
+    try:
+        print(f"Reindexing ({reindex_state['trigger']})...")
+        # Unchanged papers are reused from the per-paper cache
+        current.process_papers()
+        for marking_scheme_index in marking_scheme_indexes.values():
+            marking_scheme_index.build()
+        print(f"Reindexed {len(current.questions)} questions")
+    except Exception as e:
+        reindex_state["error"] = str(e)
+        print(f"Error reindexing: {e}")
+    finally:
+        reindex_state.update(running=False, finished_at=time.time())
+        reindex_lock.release()
+
+
+def start_papers_watcher():
+    """Start polling for a newer committed index (and papers, with WATCH_PAPERS).
+
+    Under gunicorn an index rebuilt by one worker (or by the watcher of
+    whichever worker gets the build lock first) is picked up by the other
+    workers' watchers within WATCH_INTERVAL seconds.
+    """
+    global watcher_thread
+    if watcher_thread is not None and watcher_thread.is_alive():
+        return
+    watcher_thread = threading.Thread(
+        target=watch_papers, name="papers-watcher", daemon=True
+    )
+    watcher_thread.start()
+
+
+def watch_papers():
+    while True:
+        time.sleep(WATCH_INTERVAL)
+        current = searcher
+        try:
+            if current is None:
+                continue
+            if current.index_is_outdated():
+                # Committed by another process: load it rather than rebuild
+                start_reindex("reload")
+            elif WATCH_PAPERS and current.index_is_stale():
+                start_reindex("watcher")
+        except OSError as e:
+            print(f"Error checking papers for changes: {e}")
 
 
 @app.route("/")
@@ -69,51 +232,57 @@ def index():
 @app.route("/debug/initialize")
 def debug_initialize():
     """Debug information for deployment troubleshooting."""
-    initialize_searcher()
+    if not initialize_searcher():
+        return jsonify({"message": "Initialization already in progress"}), 409
     return jsonify({"message": "Searcher initialized successfully!"})
 
 
+def status_payload() -> dict:
+    """Body of /api/status (also served directly by the ASGI server)."""
+    with state_lock:
+        current, processing, status = searcher, is_processing, processing_status
+    return {
+        "is_processing": processing,
+        "status": status,
+        # A re-initialization keeps serving from the current searcher
+        "ready": current is not None,
+        "reindex": dict(reindex_state),
+        "worker": {
+            "pid": os.getpid(),
+            # True when the index was loaded before fork and is shared
+            "shared_index": searcher_pid is not None and searcher_pid != os.getpid(),
+        },
+    }
+
+
 @app.route("/api/status")
 def get_status():
     """Get the current processing status."""
-    return jsonify(
-        {
-            "is_processing": is_processing,
-            "status": processing_status,
-            "ready": searcher is not None and not is_processing,
-        }
-    )
+    return jsonify(status_payload())
 
 
 @app.route("/api/search", methods=["POST"])
 def search():
     """Search for math questions."""
-    global searcher
-
-    if searcher is None or is_processing:
-        return (
-            jsonify(
-                {
-                    "error": "Searcher not ready yet. Please wait for initialization to complete.",
-                    "status": processing_status,
-                }
-            ),
-            503,
-        )
+    current = searcher
+    if current is None:
+        return not_ready_response()
 
     data = request.get_json()
     query = data.get("query", "")
     num_results = data.get("num_results", 5)
+    filters = data.get("filters")
 
     if not query:
         return jsonify({"error": "Query is required"}), 400
 
     try:
-        results = searcher.search(query, k=num_results)
-
-        # Force garbage collection after search to free memory
-        gc.collect()
+        parse_filters(filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    try:
+        results = current.search(query, k=num_results, filters=filters)
         return jsonify(
             {"query": query, "results": results, "total_found": len(results)}
         )
@@ -121,20 +290,133 @@ def search():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/search/batch", methods=["POST"])
+def search_batch():
+    """Run several searches at once (e.g. to build a revision sheet)."""
+    current = searcher
+    if current is None:
+        return not_ready_response()
+
+    data = request.get_json()
+    queries = data.get("queries", [])
+    num_results = data.get("num_results", 5)
+    filters = data.get("filters")
+
+    if (
+        not isinstance(queries, list)
+        or not queries
+        or not all(isinstance(query, str) and query for query in queries)
+    ):
+        return jsonify({"error": "queries must be a list of non-empty strings"}), 400
+    if len(queries) > MAX_BATCH_QUERIES:
+        return (
+            jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}),
+            400,
+        )
+
+    try:
+        parse_filters(filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        all_results = current.search_many(queries, k=num_results, filters=filters)
+
+        return jsonify(
+            {
+                "results": [
+                    {"query": query, "results": results, "total_found": len(results)}
+                    for query, results in zip(queries, all_results)
+                ]
+            }
+        )
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/admin/reindex", methods=["GET", "POST"])
+def admin_reindex():
+    """Rebuild the index in the background (POST) or report its progress (GET).
+
+    Disabled unless ADMIN_TOKEN is set; requests must then send it in the
+    X-Admin-Token header.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin API disabled (ADMIN_TOKEN is not set)"}), 403
+    if not hmac.compare_digest(
+        request.headers.get("X-Admin-Token", "").encode("utf-8"),
+        ADMIN_TOKEN.encode("utf-8"),
+    ):
+        return jsonify({"error": "Invalid admin token"}), 403
+
+    if request.method == "POST":
+        if searcher is None:
+            return not_ready_response()
+        if not start_reindex("api"):
+            return (
+                jsonify({"error": "Reindex already running", **reindex_state}),
+                409,
+            )
+        return jsonify({"message": "Reindex started", **reindex_state}), 202
+
+    return jsonify(reindex_state)
+
+
+def gzip_variant(pdf_path):
+    """Path of an up-to-date precompressed copy of pdf_path, or None."""
+    gz_path = pdf_path + ".gz"
+    try:
+        if os.path.getmtime(gz_path) >= os.path.getmtime(pdf_path):
+            return gz_path
+    except OSError:
+        pass
+    return None
+
+
+def send_pdf(pdf_path, page=None):
+    """Send a PDF with caching headers.
+
+    send_file answers If-None-Match/If-Modified-Since with 304 and Range
+    requests with 206, so the browser's viewer can fetch parts of the file
+    and revalidate its cached copy. The gzip variant is only sent for whole
+    file requests: ranges refer to the bytes of the plain PDF.
+    """
+    gz_path = gzip_variant(pdf_path) if PDF_SERVE_GZIP else None
+    use_gzip = (
+        gz_path is not None
+        and "Range" not in request.headers
+        and "gzip" in request.accept_encodings
+    )
+
+    response = send_file(
+        gz_path if use_gzip else pdf_path,
+        as_attachment=False,
+        mimetype="application/pdf",
+        max_age=PDF_CACHE_MAX_AGE,
+    )
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    if gz_path is not None:
+        response.vary.add("Accept-Encoding")
+    if page:
+        # Add page information to response headers for frontend to use
+        response.headers["X-PDF-Page"] = str(page)
+    return response
+
+
 @app.route("/api/pdf/<year>/<paper>")
 @app.route("/api/pdf/<year>/<paper>/<int:page>")
 def get_pdf(year, paper, page=None):
     """Serve PDF files with optional page parameter."""
+    source = get_source()
+    if source is None:
+        return jsonify({"error": "PDF not found"}), 404
+
     filename = f"{year}-paper{paper}.pdf"
-    pdf_path = os.path.join("data", "papers", filename)
+    pdf_path = os.path.join(CORPUS_SOURCES[source]["papers_dir"], filename)
 
     if os.path.exists(pdf_path):
-        # If page is specified, add it as a URL fragment
-        response = send_file(pdf_path, as_attachment=False, mimetype="application/pdf")
-        if page:
-            # Add page information to response headers for frontend to use
-            response.headers["X-PDF-Page"] = str(page)
-        return response
+        return send_pdf(pdf_path, page)
     else:
         return jsonify({"error": "PDF not found"}), 404
 
@@ -143,16 +425,15 @@ def get_pdf(year, paper, page=None):
 @app.route("/api/markingscheme/<year>/<int:page>")
 def get_marking_scheme(year, page=None):
     """Serve marking scheme PDF files with optional page parameter."""
+    source = get_source()
+    if source is None:
+        return jsonify({"error": "Marking scheme not found"}), 404
+
     filename = f"{year}-markingscheme.pdf"
-    pdf_path = os.path.join("data", "markingscheme", filename)
+    pdf_path = os.path.join(CORPUS_SOURCES[source]["markingscheme_dir"], filename)
 
     if os.path.exists(pdf_path):
-        # If page is specified, add it as a URL fragment
-        response = send_file(pdf_path, as_attachment=False, mimetype="application/pdf")
-        if page:
-            # Add page information to response headers for frontend to use
-            response.headers["X-PDF-Page"] = str(page)
-        return response
+        return send_pdf(pdf_path, page)
     else:
         return jsonify({"error": "Marking scheme not found"}), 404
 
@@ -160,8 +441,12 @@ def get_marking_scheme(year, page=None):
 @app.route("/api/markingscheme/<year>/question/<int:question_number>")
 def find_marking_scheme_page(year, question_number):
     """Find the page number for a specific question in the marking scheme."""
+    source = get_source()
+    if source is None:
+        return jsonify({"error": "Marking scheme not found"}), 404
+
     filename = f"{year}-markingscheme.pdf"
-    pdf_path = os.path.join("data", "markingscheme", filename)
+    pdf_path = os.path.join(CORPUS_SOURCES[source]["markingscheme_dir"], filename)
 
     if not os.path.exists(pdf_path):
         return jsonify({"error": "Marking scheme not found"}), 404
@@ -185,240 +470,97 @@ def find_marking_scheme_page(year, question_number):
     except ValueError:
         pass
 
-    try:
-        # Import PyPDF2 for PDF processing
-        import PyPDF2
-
-        with open(pdf_path, "rb") as file:
-            reader = PyPDF2.PdfReader(file)
-
-            # IMPROVED LOGIC: Search for actual solution pages first
-            # Priority 1: Look for "QX Model Solution" pattern (most specific)
-            for page_num, page in enumerate(reader.pages, 1):
-                text = page.extract_text()
-                text_lower = text.lower()
-
-                # High priority patterns - actual solution pages
-                model_solution_patterns = [
-                    f"q{question_number} model solution",
-                    f"q.{question_number} model solution",
-                    f"q {question_number} model solution",
-                    f"question {question_number} model solution",
-                ]
+    # Use the precomputed table when this question has been indexed
+    location = marking_scheme_indexes[source].lookup(year, question_number)
 
-                for pattern in model_solution_patterns:
-                    if pattern in text_lower:
-                        # Additional validation - make sure this has solution content
-                        has_solution_indicators = any(
-                            keyword in text_lower
-                            for keyword in [
-                                "marks",
-                                "scale",
-                                "credit",
-                                "method",
-                                "correct",
-                                "incorrect",
-                            ]
-                        )
-
-                        if has_solution_indicators:
-                            return jsonify(
-                                {
-                                    "page": page_num,
-                                    "found": True,
-                                    "year": year,
-                                    "question_number": question_number,
-                                    "matched_text": f"Found model solution pattern: {pattern}",
-                                    "content_type": "solution",
-                                }
-                            )
-
-            # Priority 2: Look for question headers in solution sections
-            # (Skip overview/summary pages by checking context)
-            for page_num, page in enumerate(reader.pages, 1):
-                text = page.extract_text()
-                text_lower = text.lower()
-                lines = text.split("\n")
-
-                # Enhanced patterns for both old and new marking scheme formats
-                patterns_to_check = [
-                    # New format patterns (like Q3, Q.3, etc.)
-                    f"q{question_number}",
-                    f"q.{question_number}",
-                    f"q {question_number}",
-                    # Old format patterns
-                    f"question {question_number}",
-                    f"question{question_number}",
-                ]
+    if location is None:
+        # Not indexed yet (e.g. still initializing), scan the PDF directly
+        try:
+            location = locate_question_page(
+                extract_page_texts(pdf_path), question_number
+            )
+        except Exception as e:
+            return (
+                jsonify({"error": f"Error processing marking scheme: {str(e)}"}),
+                500,
+            )
+        location = dict(location, found=True) if location else {"found": False}
 
-                # Check each line for question markers
-                for line_idx, line in enumerate(lines):
-                    line_clean = line.strip()
-                    line_lower = line_clean.lower()
-
-                    # Skip very short lines or lines that are clearly headers/footers
-                    if len(line_clean) < 2:
-                        continue
-
-                    # Check for patterns
-                    for pattern in patterns_to_check:
-                        if pattern in line_lower:
-                            # Additional validation based on context
-                            is_valid_match = False
-
-                            # For newer format: Look for "Q3" at start of line or in solution context
-                            if f"q{question_number}" in line_lower:
-                                if (
-                                    line_lower.startswith(f"q{question_number}")
-                                    or line_lower.startswith(f"q.{question_number}")
-                                    or line_lower.startswith(f"q {question_number}")
-                                ):
-                                    is_valid_match = True
-                                # Also check if it's in a solution context
-                                elif any(
-                                    word in line_lower
-                                    for word in ["marks", "model", "solution", "scale"]
-                                ):
-                                    is_valid_match = True
-
-                            # For older format: Look for "Question X" patterns
-                            elif f"question {question_number}" in line_lower:
-                                if (
-                                    line_lower.startswith(f"question {question_number}")
-                                    or f"question {question_number}" in line_lower
-                                ):
-                                    is_valid_match = True
-
-                            if is_valid_match:
-                                # ENHANCED: Check if this is likely an instructions/summary page
-                                full_text_lower = text.lower()
-
-                                # Check if this looks like an instructions/summary page
-                                is_overview_page = any(
-                                    keyword in full_text_lower
-                                    for keyword in [
-                                        "summary of mark allocations",
-                                        "section a",
-                                        "section b",
-                                        "answer all",
-                                        "answer both",
-                                        "answer any",
-                                        "structure of the marking scheme",
-                                        "scales and the marks that they generate",
-                                        "palette of annotations",
-                                    ]
-                                )
-
-                                # Check if this looks like actual solution content
-                                has_solution_content = any(
-                                    keyword in full_text_lower
-                                    for keyword in [
-                                        "method",
-                                        "scale",
-                                        "partial credit",
-                                        "low partial credit",
-                                        "high partial credit",
-                                        "marking notes",
-                                        "model solution",
-                                    ]
-                                )
-
-                                # Count mathematical symbols and solution indicators
-                                math_symbols = sum(
-                                    1 for char in text if char in "=+-×÷∫∑√()[]"
-                                )
-                                solution_words = sum(
-                                    1
-                                    for word in [
-                                        "method",
-                                        "scale",
-                                        "marks",
-                                        "credit",
-                                        "solution",
-                                    ]
-                                    if word in full_text_lower
-                                )
-
-                                # SKIP overview/summary pages - prioritize actual solution pages
-                                if is_overview_page and not has_solution_content:
-                                    continue
-
-                                # SKIP pages with very little mathematical content
-                                if math_symbols < 3 and solution_words < 2:
-                                    continue
-
-                                return jsonify(
-                                    {
-                                        "page": page_num,
-                                        "found": True,
-                                        "year": year,
-                                        "question_number": question_number,
-                                        "matched_text": line_clean[
-                                            :100
-                                        ],  # For debugging
-                                        "content_type": (
-                                            "solution"
-                                            if has_solution_content
-                                            else "summary"
-                                        ),
-                                    }
-                                )
-
-        # If not found, return the first page as fallback
+    if location["found"]:
         return jsonify(
             {
-                "page": 1,
-                "found": False,
+                "page": location["page"],
+                "found": True,
                 "year": year,
                 "question_number": question_number,
-                "message": f"Question {question_number} not found, showing first page",
+                "matched_text": location["matched_text"],
+                "content_type": location["content_type"],
             }
         )
 
-    except Exception as e:
-        return jsonify({"error": f"Error processing marking scheme: {str(e)}"}), 500
+    # If not found, return the first page as fallback
+    return jsonify(
+        {
+            "page": 1,
+            "found": False,
+            "year": year,
+            "question_number": question_number,
+            "message": f"Question {question_number} not found, showing first page",
+        }
+    )
 
 
 @app.route("/api/papers")
 def get_available_papers():
-    """Get list of available papers grouped by year with marking scheme info."""
-    papers_dir = os.path.join("data", "papers")
-    markingscheme_dir = os.path.join("data", "markingscheme")
+    """Get list of available papers grouped by year with marking scheme info.
 
+    Papers from every corpus source are listed; deferred papers and marking
+    schemes carry their source name.
+    """
     papers_by_year = {}
 
-    # Get all papers
-    if os.path.exists(papers_dir):
-        for filename in os.listdir(papers_dir):
-            if filename.endswith(".pdf"):
-                year = filename[:4]
-                paper = filename.split("-paper")[1].split(".")[0]
-
-                if year not in papers_by_year:
-                    papers_by_year[year] = {
-                        "year": year,
-                        "papers": [],
-                        "has_marking_scheme": False,
-                    }
-
-                papers_by_year[year]["papers"].append(
-                    {"paper": paper, "filename": filename}
-                )
-
-    # Check for marking schemes
-    if os.path.exists(markingscheme_dir):
-        for filename in os.listdir(markingscheme_dir):
-            if filename.endswith(".pdf") and "markingscheme" in filename:
-                year = filename[:4]
-                if year in papers_by_year:
-                    papers_by_year[year]["has_marking_scheme"] = True
+    for source, config in CORPUS_SOURCES.items():
+        papers_dir = config["papers_dir"]
+        markingscheme_dir = config["markingscheme_dir"]
+
+        # Get all papers
+        if os.path.exists(papers_dir):
+            for filename in os.listdir(papers_dir):
+                if filename.endswith(".pdf"):
+                    year = filename[:4]
+                    paper = filename.split("-paper")[1].split(".")[0]
+
+                    if year not in papers_by_year:
+                        papers_by_year[year] = {
+                            "year": year,
+                            "papers": [],
+                            "has_marking_scheme": False,
+                            "marking_schemes": [],
+                        }
+
+                    papers_by_year[year]["papers"].append(
+                        {"paper": paper, "filename": filename, "source": source}
+                    )
+
+        # Check for marking schemes
+        if os.path.exists(markingscheme_dir):
+            for filename in os.listdir(markingscheme_dir):
+                if filename.endswith(".pdf") and "markingscheme" in filename:
+                    year = filename[:4]
+                    if year in papers_by_year:
+                        papers_by_year[year]["marking_schemes"].append(source)
+                        if source == "papers":
+                            papers_by_year[year]["has_marking_scheme"] = True
 
     # Convert to list and sort
     result = list(papers_by_year.values())
 
-    # Sort papers within each year
+    # Sort papers within each year (main papers before other sources)
+    source_order = list(CORPUS_SOURCES)
     for year_data in result:
-        year_data["papers"].sort(key=lambda x: int(x["paper"]))
+        year_data["papers"].sort(
+            key=lambda x: (source_order.index(x["source"]), int(x["paper"]))
+        )
 
     # Sort years (most recent first)
     result.sort(key=lambda x: int(x["year"]), reverse=True)
@@ -466,11 +608,14 @@ def get_memory_info():
         "model_loaded": (
             searcher is not None and searcher._model is not None if searcher else False
         ),
+        "model": searcher.model_info() if searcher else None,
+        "query_cache": searcher.cache_stats() if searcher else None,
         "embeddings_loaded": (
             searcher is not None and searcher.embeddings is not None
             if searcher
             else False
         ),
+        "embeddings": searcher.embedding_info() if searcher else None,
         "questions_count": len(searcher.questions) if searcher else 0,
         "processing_status": processing_status,
     }
@@ -490,9 +635,10 @@ def force_cleanup():
 
     # If searcher exists and model is loaded, unload it temporarily
     model_unloaded = False
-    if searcher and searcher._model is not None:
-        searcher.unload_model()
-        model_unloaded = True
+    current = searcher
+    if current and current._model is not None:
+        # Refused while a search is using the model
+        model_unloaded = current.unload_model()
         gc.collect()  # Clean up after model unload
 
     return jsonify(
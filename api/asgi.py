@@ -0,0 +1,244 @@
+"""
+ASGI entry point: serves the same routes as app.py from an asyncio event loop.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Cheap requests are answered on the event loop itself:
+
+- GET /api/status
+- GET /static/... files
+- POST /api/search and /api/search/batch when every result is already cached
+
+Every other request (uncached searches, PDF and marking scheme routes, admin
+routes) is handed to the Flask app in a bounded pool of ASGI_WORKER_THREADS
+threads, so encoding, PDF scanning or a model load never holds up status
+polls. When ASGI_MAX_PENDING requests are already waiting for the pool, new
+ones get a 503 straight away. The searcher is initialized in the background
+at startup, as with `python app.py`.
+"""
+
+import asyncio
+import gc
+import io
+import json
+import mimetypes
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as flask_app
+from backend.filters import parse_filters
+from config import ASGI_MAX_PENDING, ASGI_WORKER_THREADS
+
+
+class SearchASGIApp:
+    def __init__(self, wsgi_app, max_workers: int, max_pending: int):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="asgi-worker"
+        )
+        self.max_pending = max_pending
+        self.pending = 0
+        self.static_dir = os.path.realpath(wsgi_app.static_folder)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        body = await self._read_body(receive)
+        method, path = scope["method"], scope["path"]
+
+        if method == "GET" and path == "/api/status":
+            await self._send_json(send, 200, flask_app.status_payload())
+            return
+        if method == "GET" and path.startswith("/static/"):
+            if await self._send_static(send, path[len("/static/") :]):
+                return
+        if method == "POST" and path in ("/api/search", "/api/search/batch"):
+            cached = self._cached_search(path, body)
+            if cached is not None:
+                await self._send_json(send, 200, cached)
+                return
+
+        await self._call_wsgi(scope, body, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Initialize off the loop so status polls are answered meanwhile
+                asyncio.get_running_loop().run_in_executor(None, self._initialize)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    def _initialize():
+        flask_app.initialize_searcher()
+        # As in wsgi.py: keep the loaded index and model out of the collector's
+        # generations, so the collections in the request threads don't walk them
+        gc.collect()
+        gc.freeze()
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    def _cached_search(self, path: str, body: bytes):
+        """Response body for a search whose results are all cached, else None."""
+        searcher = flask_app.searcher
+        if searcher is None:
+            return None
+        try:
+            data = json.loads(body)
+            num_results = data.get("num_results", 5)
+            filters = data.get("filters")
+            parse_filters(filters)
+            if path == "/api/search":
+                query = data.get("query", "")
+                if not query:
+                    return None
+                results = searcher.cached_search(query, num_results, filters)
+                if results is None:
+                    return None
+                return {"query": query, "results": results, "total_found": len(results)}
+
+            queries = data.get("queries", [])
+            if not isinstance(queries, list) or not queries:
+                return None
+            batch = []
+            for query in queries:
+                if not isinstance(query, str) or not query:
+                    return None
+                results = searcher.cached_search(query, num_results, filters)
+                if results is None:
+                    return None
+                batch.append(
+                    {"query": query, "results": results, "total_found": len(results)}
+                )
+            return {"results": batch}
+        except (ValueError, TypeError, AttributeError):
+            # Invalid requests get the Flask app's error response
+            return None
+
+    async def _send_static(self, send, filename: str) -> bool:
+        path = os.path.realpath(os.path.join(self.static_dir, filename))
+        if not path.startswith(self.static_dir + os.sep) or not os.path.isfile(path):
+            return False
+        content = await asyncio.to_thread(self._read_file, path)
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        await self._send(send, 200, [("content-type", content_type)], content)
+        return True
+
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def _call_wsgi(self, scope, body: bytes, send):
+        if self.pending >= self.max_pending:
+            await self._send_json(
+                send,
+                503,
+                {"error": "Server busy, please retry"},
+                [("retry-after", "1")],
+            )
+            return
+
+        self.pending += 1
+        try:
+            status, headers, content = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._run_wsgi, scope, body
+            )
+        finally:
+            self.pending -= 1
+        await self._send(send, status, headers, content)
+
+    def _run_wsgi(self, scope, body: bytes):
+        """Run one request through the Flask app (on a pool thread)."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+            return chunks.append
+
+        chunks = []
+        result = self.wsgi_app(self._environ(scope, body), start_response)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], b"".join(chunks)
+
+    @staticmethod
+    def _environ(scope, body: bytes) -> dict:
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", ""),
+            # WSGI carries the path as latin-1 decoded bytes
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope["query_string"].decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+            "REMOTE_ADDR": client[0],
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in scope["headers"]:
+            name = name.decode("latin-1").upper().replace("-", "_")
+            value = value.decode("latin-1")
+            if name == "CONTENT_TYPE":
+                environ["CONTENT_TYPE"] = value
+            elif name != "CONTENT_LENGTH":
+                key = f"HTTP_{name}"
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    async def _send_json(self, send, status: int, data, headers=()):
+        # Same encoding as Flask's jsonify, so both paths return identical bytes
+        content = json.dumps(data, sort_keys=True, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        await self._send(
+            send, status, [("content-type", "application/json"), *headers], content
+        )
+
+    @staticmethod
+    async def _send(send, status: int, headers, content: bytes):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+
+app = SearchASGIApp(flask_app.app, ASGI_WORKER_THREADS, ASGI_MAX_PENDING)
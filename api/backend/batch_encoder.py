@@ -0,0 +1,142 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class MicroBatchEncoder:
+    """Coalesces concurrent encode requests into single model batches.
+
+    Request threads hand their texts to one background thread and wait. That
+    thread takes the first waiting request, collects whatever else arrives
+    within window seconds (up to max_batch texts), encodes the distinct
+    texts in one encode_batch call and hands each request its rows.
+
+    A request arriving while a batch is encoding is picked up as soon as the
+    encoder is free, so under load batches form without waiting out the
+    whole window.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], np.ndarray],
+        window: float,
+        max_batch: int,
+    ):
+        self._encode_batch = encode_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._requests = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.texts = 0
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts as part of the next batch; blocks until it is done."""
+        future = Future()
+        self._ensure_running()
+        self._requests.put((list(texts), future))
+        return future.result()
+
+    def _ensure_running(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="query-encoder", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            count = len(batch[0][0])
+            deadline = time.monotonic() + self.window
+            while count < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        request = self._requests.get(timeout=remaining)
+                    else:
+                        # Window over: still take requests that already queued
+                        request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(request)
+                count += len(request[0])
+            self._encode(batch)
+
+    def _encode(self, batch):
+        distinct = list(dict.fromkeys(text for texts, _ in batch for text in texts))
+        try:
+            vectors = self._encode_batch(distinct)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts += len(distinct)
+        rows = {text: i for i, text in enumerate(distinct)}
+        for texts, future in batch:
+            future.set_result(vectors[[rows[text] for text in texts]])
+
+    def stats(self) -> Dict:
+        return {
+            "window_ms": round(self.window * 1000, 3),
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": (
+                round(self.texts / self.batches, 2) if self.batches else 0.0
+            ),
+        }
+
+
+def encode_by_length(
+    encode: Callable[[List[str]], np.ndarray],
+    texts: List[str],
+    lengths: Sequence[int],
+    batch_size: int,
+    report: Optional[Callable[[int, int, int, float], None]] = None,
+) -> np.ndarray:
+    """Encode texts in batches of similar length; rows come back in text order.
+
+    Texts are sorted by length, longest first, and cut into batches of
+    batch_size, so each batch is padded to about the length of its own
+    texts rather than to the longest text of a mixed batch. After every
+    batch report(done, total, batch_texts, seconds) is called.
+    """
+    order = np.argsort(-np.asarray(lengths, dtype=np.int64), kind="stable")
+    rows = None
+    for start in range(0, len(texts), batch_size):
+        batch = order[start : start + batch_size]
+        batch_start = time.perf_counter()
+        encoded = np.asarray(encode([texts[i] for i in batch]), dtype=np.float32)
+        if rows is None:
+            rows = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        rows[batch] = encoded
+        if report is not None:
+            report(
+                start + len(batch),
+                len(texts),
+                len(batch),
+                time.perf_counter() - batch_start,
+            )
+    if rows is None:
+        return np.zeros((0, 0), dtype=np.float32)
+    return rows
+
+
+def padding_overhead(lengths: Sequence[int], batch_size: int) -> float:
+    """Fraction of padding in batches of batch_size taken in the given order."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    padded = sum(
+        int(lengths[start : start + batch_size].max())
+        * len(lengths[start : start + batch_size])
+        for start in range(0, len(lengths), batch_size)
+    )
+    return 1 - lengths.sum() / padded if padded else 0.0
@@ -0,0 +1,116 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Filters accepted by /api/search, all optional; ranges are inclusive
+INTEGER_FILTERS = ("year_from", "year_to", "paper", "page_from", "page_to")
+STRING_FILTERS = ("source",)  # Corpus collection, e.g. "papers" or "deferred"
+FILTER_FIELDS = INTEGER_FILTERS + STRING_FILTERS
+
+
+def parse_filters(filters: Optional[Dict]) -> Tuple:
+    """Validate search filters and return them as a hashable, canonical tuple.
+
+    Raises ValueError for unknown filters or values of the wrong type.
+    """
+    if not filters:
+        return ()
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object")
+
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+    parsed = []
+    for field in FILTER_FIELDS:
+        value = filters.get(field)
+        if value is None or value == "":
+            continue
+        if field in STRING_FILTERS:
+            if not isinstance(value, str):
+                raise ValueError(f"Filter {field} must be a string")
+            parsed.append((field, value))
+            continue
+        try:
+            parsed.append((field, int(value)))
+        except (TypeError, ValueError):
+            raise ValueError(f"Filter {field} must be an integer")
+    return tuple(parsed)
+
+
+class RowFilter:
+    """Per-year, per-paper and per-source row arrays for selecting index slices.
+
+    Year, paper and source filters are answered from the precomputed row
+    arrays, so a filtered search only touches the rows it is going to score.
+    """
+
+    def __init__(self, records: np.ndarray, sources: List[str]):
+        self.count = len(records)
+        self.years = np.asarray(records["year"])
+        self.papers = np.asarray(records["paper"])
+        self.pages = np.asarray(records["page_number"])
+
+        self.sorted_years = np.unique(self.years)
+        self.rows_by_year = {
+            int(year): np.flatnonzero(self.years == year) for year in self.sorted_years
+        }
+        self.rows_by_paper = {
+            int(paper): np.flatnonzero(self.papers == paper)
+            for paper in np.unique(self.papers)
+        }
+        source_ids = np.asarray(records["source_id"])
+        self.rows_by_source = {
+            source: np.flatnonzero(source_ids == source_id)
+            for source_id, source in enumerate(sources)
+        }
+
+    def select(self, filters: Tuple) -> Optional[np.ndarray]:
+        """Sorted row indices matching parsed filters, or None for all rows."""
+        if not filters:
+            return None
+        filters = dict(filters)
+        rows = None
+
+        if "year_from" in filters or "year_to" in filters:
+            year_from = filters.get("year_from", -np.inf)
+            year_to = filters.get("year_to", np.inf)
+            years = self.sorted_years[
+                (self.sorted_years >= year_from) & (self.sorted_years <= year_to)
+            ]
+            rows = np.sort(
+                np.concatenate(
+                    [self.rows_by_year[int(year)] for year in years]
+                    + [np.empty(0, dtype=np.int64)]
+                )
+            )
+
+        if "paper" in filters:
+            paper_rows = self.rows_by_paper.get(
+                filters["paper"], np.empty(0, dtype=np.int64)
+            )
+            rows = (
+                paper_rows
+                if rows is None
+                else np.intersect1d(rows, paper_rows, assume_unique=True)
+            )
+
+        if "source" in filters:
+            source_rows = self.rows_by_source.get(
+                filters["source"], np.empty(0, dtype=np.int64)
+            )
+            rows = (
+                source_rows
+                if rows is None
+                else np.intersect1d(rows, source_rows, assume_unique=True)
+            )
+
+        if rows is None:
+            rows = np.arange(self.count)
+
+        if "page_from" in filters:
+            rows = rows[self.pages[rows] >= filters["page_from"]]
+        if "page_to" in filters:
+            rows = rows[self.pages[rows] <= filters["page_to"]]
+
+        return rows
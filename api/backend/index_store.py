@@ -0,0 +1,731 @@
+"""
+On-disk search index format.
+
+An index directory holds:
+
+- manifest.json          format version, cache key, row count, file and
+                         source tables
+- embeddings.npy         L2-normalized float32/float16 matrix, opened with
+                         mmap_mode="r"
+- embeddings_compressed.npy, embedding_scales.npy
+                         optional float16 or int8 (+ per-row float32 scales)
+                         copy used for first-pass scoring
+- ivf_centroids.npy, ivf_list_offsets.npy, ivf_list_rows.npy
+                         optional IVF vector index (see vector_index.IVFIndex)
+- keyword_vocab.txt, keyword_*.npy
+                         BM25 inverted index: newline-separated vocabulary and
+                         its posting arrays (see keyword_index.KeywordIndex)
+- questions.bin          UTF-8 question texts concatenated into one blob
+- questions_offsets.npy  int64 byte offsets into questions.bin (count + 1)
+- metadata.npy           fixed-width structured array, one record per question
+- part_embeddings.npy, part_offsets.npy, parts.npy
+                         optional sub-question index: one embedding row and
+                         (page, label) record per part, and int64 offsets of
+                         each question's parts (count + 1, see subquestions.py)
+
+Everything except the manifest is memory-mapped on load, so several worker
+processes share a single page-cache copy of the index and startup does not
+deserialize anything. The cache key is checked by reading the manifest alone.
+
+Every committed manifest carries a new "generation", so processes serving
+an index can tell that another process has committed a newer one. Only one
+process builds into an index directory at a time (see build_lock).
+
+IndexWriter builds the per-question files by appending one paper at a time,
+so writing an index never needs the whole corpus in memory.
+"""
+
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from backend.keyword_index import KeywordIndex
+from backend.pdf_text import file_hash
+from backend.subquestions import PART_DTYPE, PartIndex
+from backend.vector_index import COMPRESSION_MODES, CompressedMatrix, IVFIndex
+
+# 5: PDFs with the same contents are indexed once
+INDEX_FORMAT_VERSION = 5
+
+MANIFEST_FILE = "manifest.json"
+BUILD_LOCK_FILE = "build.lock"
+EMBEDDINGS_FILE = "embeddings.npy"
+COMPRESSED_EMBEDDINGS_FILE = "embeddings_compressed.npy"
+EMBEDDING_SCALES_FILE = "embedding_scales.npy"
+IVF_CENTROIDS_FILE = "ivf_centroids.npy"
+IVF_LIST_OFFSETS_FILE = "ivf_list_offsets.npy"
+IVF_LIST_ROWS_FILE = "ivf_list_rows.npy"
+KEYWORD_VOCAB_FILE = "keyword_vocab.txt"
+KEYWORD_ARRAY_FILE = "keyword_{}.npy"
+QUESTIONS_FILE = "questions.bin"
+QUESTION_OFFSETS_FILE = "questions_offsets.npy"
+METADATA_FILE = "metadata.npy"
+PART_EMBEDDINGS_FILE = "part_embeddings.npy"
+PART_OFFSETS_FILE = "part_offsets.npy"
+PARTS_FILE = "parts.npy"
+
+METADATA_DTYPE = np.dtype(
+    [
+        ("year", "<i2"),
+        ("paper", "<i2"),
+        ("question_number", "<i4"),
+        ("page_number", "<i4"),
+        ("file_id", "<i4"),
+        ("source_id", "<i2"),
+    ]
+)
+
+EMBEDDING_DTYPES = ("float32", "float16")
+
+# Rows copied at a time when an appended file is finished
+COPY_BLOCK_ROWS = 65536
+
+
+class QuestionStore(Sequence):
+    """Read-only list of question texts backed by a memory-mapped blob."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("question index out of range")
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+
+class MetadataStore(Sequence):
+    """Read-only list of metadata dicts backed by a memory-mapped record array."""
+
+    def __init__(self, records: np.ndarray, filenames: List[str], sources: List[str]):
+        self.records = records
+        self.filenames = filenames
+        self.sources = sources
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        record = self.records[idx]
+        return {
+            "year": str(record["year"]),
+            "paper": str(record["paper"]),
+            "question_number": int(record["question_number"]),
+            "filename": self.filenames[record["file_id"]],
+            "page_number": int(record["page_number"]),
+            "source": self.sources[record["source_id"]],
+        }
+
+
+def metadata_to_records(
+    metadata: List[Dict],
+) -> Tuple[np.ndarray, List[str], List[str]]:
+    """Convert metadata dicts to a METADATA_DTYPE array.
+
+    Returns (records, filenames, sources) where the file_id and source_id
+    fields of each record index the filename and source tables.
+    """
+    if isinstance(metadata, MetadataStore):
+        return metadata.records, metadata.filenames, metadata.sources
+
+    filenames = sorted({meta["filename"] for meta in metadata})
+    file_ids = {filename: i for i, filename in enumerate(filenames)}
+    # Sources keep the order they first appear in (configuration order)
+    sources = list(dict.fromkeys(meta["source"] for meta in metadata))
+    source_ids = {source: i for i, source in enumerate(sources)}
+    records = np.zeros(len(metadata), dtype=METADATA_DTYPE)
+    for i, meta in enumerate(metadata):
+        records[i] = (
+            int(meta["year"]),
+            int(meta["paper"]),
+            meta["question_number"],
+            meta["page_number"],
+            file_ids[meta["filename"]],
+            source_ids[meta["source"]],
+        )
+    return records, filenames, sources
+
+
+def read_manifest(index_dir: str) -> Optional[Dict]:
+    """Read the index manifest, or None if there is no usable index."""
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != INDEX_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+@contextmanager
+def build_lock(index_dir: str):
+    """Hold the index directory's build lock, waiting for it if need be.
+
+    An exclusive lock on a file in the directory, so of several processes
+    (e.g. gunicorn workers) only one builds at a time, and the others can
+    load what it committed once they get the lock. A no-op where fcntl
+    is not available (Windows, which runs a single process).
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, BUILD_LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _replace_file(path: str, write):
+    """Write a file next to path and atomically move it into place.
+
+    Replacing the file instead of rewriting it keeps any process that still
+    has the old index memory-mapped reading consistent data.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class _RowFile:
+    """Rows of a fixed dtype appended to a raw file, finished into a .npy file."""
+
+    def __init__(self, path: str, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = None
+        self.rows = 0
+        self._raw_path = f"{path}.rows-{os.getpid()}"
+        self._raw = open(self._raw_path, "wb")
+
+    def append(self, rows: np.ndarray):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if self.row_shape is None:
+            self.row_shape = rows.shape[1:]
+        elif rows.shape[1:] != self.row_shape:
+            raise ValueError(f"Row shape {rows.shape[1:]} != {self.row_shape}")
+        self._raw.write(rows.tobytes())
+        self.rows += len(rows)
+
+    def finish(self, empty_shape: Tuple[int, ...] = (0,)):
+        """Move the rows into place as a .npy file (empty_shape if there are none)."""
+        self._raw.close()
+        if not self.rows:
+            array = np.zeros(empty_shape, dtype=self.dtype)
+            _replace_file(self.path, lambda f: np.save(f, array))
+        else:
+            shape = (self.rows, *self.row_shape)
+            tmp_path = f"{self.path}.tmp-{os.getpid()}"
+            out = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=self.dtype, shape=shape
+            )
+            # Copied through the page cache, a block of rows at a time
+            raw = np.memmap(self._raw_path, dtype=self.dtype, mode="r", shape=shape)
+            for start in range(0, self.rows, COPY_BLOCK_ROWS):
+                out[start : start + COPY_BLOCK_ROWS] = raw[
+                    start : start + COPY_BLOCK_ROWS
+                ]
+            out.flush()
+            del out, raw
+            os.replace(tmp_path, self.path)
+        os.remove(self._raw_path)
+
+    def discard(self):
+        self._raw.close()
+        if os.path.exists(self._raw_path):
+            os.remove(self._raw_path)
+
+
+class IndexWriter:
+    """Writes an index by appending papers one at a time.
+
+    Embedding rows, question texts and metadata records go straight to disk
+    as they are appended. finish() moves them into place and returns them
+    memory-mapped, and commit() adds the derived structures (compressed
+    embeddings, vector and keyword index) and the manifest that makes the
+    index valid. Used as a context manager, leftover files of an unfinished
+    index are removed on exit.
+
+    With parts=True every append also takes the part rows of its questions
+    (see subquestions.paper_part_rows) and the sub-question index is written.
+    """
+
+    def __init__(self, index_dir: str, dtype: str = "float32", parts: bool = False):
+        if dtype not in EMBEDDING_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        os.makedirs(index_dir, exist_ok=True)
+        self.index_dir = index_dir
+        self.dtype = dtype
+        self.filenames = []
+        self.sources = []
+        self._file_ids = {}
+        self._source_ids = {}
+        self._embeddings = _RowFile(os.path.join(index_dir, EMBEDDINGS_FILE), dtype)
+        self._offsets = _RowFile(
+            os.path.join(index_dir, QUESTION_OFFSETS_FILE), np.int64
+        )
+        self._records = _RowFile(os.path.join(index_dir, METADATA_FILE), METADATA_DTYPE)
+        self._questions_path = os.path.join(index_dir, QUESTIONS_FILE)
+        self._questions_tmp = f"{self._questions_path}.tmp-{os.getpid()}"
+        self._questions = open(self._questions_tmp, "wb")
+        self._questions_size = 0
+        self._offsets.append(np.zeros(1, dtype=np.int64))
+        self._part_files = ()
+        if parts:
+            self._part_files = (
+                _RowFile(os.path.join(index_dir, PART_EMBEDDINGS_FILE), dtype),
+                _RowFile(os.path.join(index_dir, PART_OFFSETS_FILE), np.int64),
+                _RowFile(os.path.join(index_dir, PARTS_FILE), PART_DTYPE),
+            )
+            self._part_files[1].append(np.zeros(1, dtype=np.int64))
+        self._finished = False
+        self._manifest = None
+
+    def __enter__(self) -> "IndexWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._finished:
+            for row_file in (
+                self._embeddings,
+                self._offsets,
+                self._records,
+                *self._part_files,
+            ):
+                row_file.discard()
+            self._questions.close()
+            if os.path.exists(self._questions_tmp):
+                os.remove(self._questions_tmp)
+
+    def append(
+        self,
+        embeddings: np.ndarray,
+        questions: List[str],
+        metadata,
+        parts: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    ):
+        """Append the rows of a batch of questions (metadata as dicts).
+
+        parts is (part embeddings, parts per question, part records), required
+        if the writer was created with parts=True.
+        """
+        if not (len(embeddings) == len(questions) == len(metadata)):
+            raise ValueError("Embeddings, questions and metadata differ in length")
+        if not questions:
+            return
+        if (parts is not None) != bool(self._part_files):
+            raise ValueError("Part rows must be given exactly when writing parts")
+        if parts is not None:
+            part_embeddings, part_counts, part_records = parts
+            if len(part_counts) != len(questions) or not (
+                len(part_embeddings) == len(part_records) == part_counts.sum()
+            ):
+                raise ValueError("Part rows do not match the questions")
+            part_file, offsets_file, records_file = self._part_files
+            offsets_file.append(np.cumsum(part_counts) + part_file.rows)
+            part_file.append(part_embeddings)
+            records_file.append(part_records)
+
+        encoded = [question.encode("utf-8") for question in questions]
+        offsets = np.cumsum([len(text) for text in encoded], dtype=np.int64)
+        self._questions.writelines(encoded)
+        self._offsets.append(offsets + self._questions_size)
+        self._questions_size += int(offsets[-1])
+
+        records = np.zeros(len(metadata), dtype=METADATA_DTYPE)
+        for i, meta in enumerate(metadata):
+            records[i] = (
+                int(meta["year"]),
+                int(meta["paper"]),
+                meta["question_number"],
+                meta["page_number"],
+                self._table_id(meta["filename"], self.filenames, self._file_ids),
+                self._table_id(meta["source"], self.sources, self._source_ids),
+            )
+        self._records.append(records)
+        self._embeddings.append(embeddings)
+
+    @staticmethod
+    def _table_id(value: str, table: List[str], ids: Dict[str, int]) -> int:
+        if value not in ids:
+            ids[value] = len(table)
+            table.append(value)
+        return ids[value]
+
+    @property
+    def count(self) -> int:
+        return self._records.rows
+
+    def finish(self):
+        """Move the appended rows into place; returns them as load_index does.
+
+        The sub-question index, if any, is then available from load_parts().
+        The old manifest is removed first, so until commit() nothing takes the
+        half-replaced files for the previous index.
+        """
+        try:
+            os.remove(os.path.join(self.index_dir, MANIFEST_FILE))
+        except FileNotFoundError:
+            pass
+        self._questions.close()
+        os.replace(self._questions_tmp, self._questions_path)
+        self._embeddings.finish(empty_shape=(0, 0))
+        self._offsets.finish()
+        self._records.finish()
+        if self._part_files:
+            part_file, offsets_file, records_file = self._part_files
+            part_file.finish(empty_shape=(0, 0))
+            offsets_file.finish()
+            records_file.finish()
+        self._finished = True
+
+        embeddings = np.load(
+            os.path.join(self.index_dir, EMBEDDINGS_FILE), mmap_mode="r"
+        )
+        self._manifest = {
+            "version": INDEX_FORMAT_VERSION,
+            "count": self.count,
+            "dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+            "dtype": self.dtype,
+            "filenames": self.filenames,
+            "sources": self.sources,
+        }
+        if self._part_files:
+            self._manifest["part_count"] = self._part_files[0].rows
+        return load_index(self.index_dir, self._manifest)
+
+    def load_parts(self) -> Optional[PartIndex]:
+        """The finished sub-question index (None without parts), memory-mapped."""
+        return load_parts(self.index_dir, self._manifest)
+
+    def commit(
+        self,
+        cache_key: str,
+        compressed: Optional[CompressedMatrix] = None,
+        vector_index=None,
+        keyword_index: Optional[KeywordIndex] = None,
+    ):
+        """Write the derived structures and the manifest, after finish().
+
+        Returns the generation of the committed index.
+        """
+        _write_derived(self.index_dir, compressed, vector_index, keyword_index)
+        # The manifest goes last: an index is only valid once it has been written
+        manifest = dict(
+            self._manifest,
+            cache_key=cache_key,
+            compression=compressed.mode if compressed is not None else "none",
+            vector_index=(
+                vector_index.params() if vector_index is not None else {"kind": "flat"}
+            ),
+            keyword_index=keyword_index is not None,
+            generation=time.time_ns(),
+        )
+        _write_manifest(self.index_dir, manifest)
+        return manifest["generation"]
+
+
+def save_index(
+    index_dir: str,
+    cache_key: str,
+    embeddings: np.ndarray,
+    questions: List[str],
+    metadata: List[Dict],
+    dtype: str = "float32",
+    compressed: Optional[CompressedMatrix] = None,
+    vector_index=None,
+    keyword_index: Optional[KeywordIndex] = None,
+):
+    """Write embeddings, questions and metadata in the on-disk index format."""
+    with IndexWriter(index_dir, dtype) as writer:
+        writer.append(embeddings, list(questions), list(metadata))
+        writer.finish()
+        writer.commit(cache_key, compressed, vector_index, keyword_index)
+
+
+def _write_derived(
+    index_dir: str,
+    compressed: Optional[CompressedMatrix],
+    vector_index,
+    keyword_index: Optional[KeywordIndex],
+):
+    if compressed is not None:
+        _replace_file(
+            os.path.join(index_dir, COMPRESSED_EMBEDDINGS_FILE),
+            lambda f: np.save(f, compressed.data),
+        )
+        if compressed.scales is not None:
+            _replace_file(
+                os.path.join(index_dir, EMBEDDING_SCALES_FILE),
+                lambda f: np.save(f, compressed.scales),
+            )
+
+    if vector_index is not None:
+        _write_vector_index(index_dir, vector_index)
+    if keyword_index is not None:
+        _write_keyword_index(index_dir, keyword_index)
+
+
+def _write_manifest(index_dir: str, manifest: Dict):
+    _replace_file(
+        os.path.join(index_dir, MANIFEST_FILE),
+        lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")),
+    )
+
+
+def load_index(index_dir: str, manifest: Dict):
+    """Memory-map an index described by manifest.
+
+    Returns (embeddings, questions, metadata); raises ValueError if the files
+    don't match the manifest.
+    """
+    embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    offsets = np.load(os.path.join(index_dir, QUESTION_OFFSETS_FILE), mmap_mode="r")
+    records = np.load(os.path.join(index_dir, METADATA_FILE), mmap_mode="r")
+
+    count = manifest["count"]
+    if len(embeddings) != count or len(offsets) != count + 1 or len(records) != count:
+        raise ValueError("Index files do not match the manifest")
+
+    questions_path = os.path.join(index_dir, QUESTIONS_FILE)
+    if os.path.getsize(questions_path) != offsets[-1]:
+        raise ValueError("Question blob does not match its offsets")
+    if offsets[-1]:
+        blob = np.memmap(questions_path, dtype=np.uint8, mode="r")
+    else:
+        # np.memmap refuses to map an empty file
+        blob = np.empty(0, dtype=np.uint8)
+
+    return (
+        embeddings,
+        QuestionStore(blob, offsets),
+        MetadataStore(records, manifest["filenames"], manifest["sources"]),
+    )
+
+
+def load_parts(index_dir: str, manifest: Dict) -> Optional[PartIndex]:
+    """Memory-map the sub-question index, or None if the index has none."""
+    if "part_count" not in manifest:
+        return None
+
+    embeddings = np.load(os.path.join(index_dir, PART_EMBEDDINGS_FILE), mmap_mode="r")
+    offsets = np.load(os.path.join(index_dir, PART_OFFSETS_FILE), mmap_mode="r")
+    records = np.load(os.path.join(index_dir, PARTS_FILE), mmap_mode="r")
+    if (
+        len(embeddings) != manifest["part_count"]
+        or len(records) != manifest["part_count"]
+        or len(offsets) != manifest["count"] + 1
+    ):
+        raise ValueError("Part index files do not match the manifest")
+    return PartIndex(embeddings, offsets, records)
+
+
+def load_compressed(index_dir: str, manifest: Dict) -> Optional[CompressedMatrix]:
+    """Memory-map the compressed first-pass matrix, or None if there is none."""
+    mode = manifest.get("compression", "none")
+    if mode == "none" or mode not in COMPRESSION_MODES:
+        return None
+
+    data = np.load(os.path.join(index_dir, COMPRESSED_EMBEDDINGS_FILE), mmap_mode="r")
+    scales = None
+    if mode == "int8":
+        scales = np.load(os.path.join(index_dir, EMBEDDING_SCALES_FILE), mmap_mode="r")
+        if len(scales) != manifest["count"]:
+            raise ValueError("Embedding scales do not match the manifest")
+    if len(data) != manifest["count"]:
+        raise ValueError("Compressed embeddings do not match the manifest")
+    return CompressedMatrix(mode, data, scales)
+
+
+def _write_vector_index(index_dir: str, vector_index):
+    if vector_index.kind != "ivf":
+        return
+    for filename, array in (
+        (IVF_CENTROIDS_FILE, vector_index.centroids),
+        (IVF_LIST_OFFSETS_FILE, vector_index.list_offsets),
+        (IVF_LIST_ROWS_FILE, vector_index.list_rows),
+    ):
+        _replace_file(
+            os.path.join(index_dir, filename), lambda f: np.save(f, np.asarray(array))
+        )
+
+
+def save_vector_index(index_dir: str, manifest: Dict, vector_index):
+    """Add a vector index built after the fact to an existing index directory."""
+    _write_vector_index(index_dir, vector_index)
+    _write_manifest(index_dir, dict(manifest, vector_index=vector_index.params()))
+
+
+def load_vector_index(index_dir: str, manifest: Dict) -> Optional[IVFIndex]:
+    """Memory-map the persisted IVF index, or None if the index has none."""
+    params = manifest.get("vector_index", {"kind": "flat"})
+    if params.get("kind") != "ivf":
+        return None
+
+    centroids = np.load(os.path.join(index_dir, IVF_CENTROIDS_FILE))
+    list_offsets = np.load(os.path.join(index_dir, IVF_LIST_OFFSETS_FILE))
+    list_rows = np.load(os.path.join(index_dir, IVF_LIST_ROWS_FILE), mmap_mode="r")
+    if (
+        len(centroids) != params["n_lists"]
+        or len(list_offsets) != len(centroids) + 1
+        or len(list_rows) != manifest["count"]
+    ):
+        raise ValueError("IVF index does not match the manifest")
+    return IVFIndex(centroids, list_offsets, list_rows)
+
+
+def _write_keyword_index(index_dir: str, keyword_index: KeywordIndex):
+    vocab = "\n".join(keyword_index.vocab).encode("utf-8")
+    _replace_file(os.path.join(index_dir, KEYWORD_VOCAB_FILE), lambda f: f.write(vocab))
+    for name, array in keyword_index.arrays().items():
+        _replace_file(
+            os.path.join(index_dir, KEYWORD_ARRAY_FILE.format(name)),
+            lambda f: np.save(f, np.asarray(array)),
+        )
+
+
+def load_keyword_index(index_dir: str, manifest: Dict) -> Optional[KeywordIndex]:
+    """Memory-map the persisted keyword index, or None if the index has none."""
+    if not manifest.get("keyword_index"):
+        return None
+
+    with open(os.path.join(index_dir, KEYWORD_VOCAB_FILE), encoding="utf-8") as f:
+        vocab_text = f.read()
+    vocab = vocab_text.split("\n") if vocab_text else []
+    arrays = {
+        name: np.load(
+            os.path.join(index_dir, KEYWORD_ARRAY_FILE.format(name)), mmap_mode="r"
+        )
+        for name in (
+            "indptr",
+            "doc_ids",
+            "term_freqs",
+            "position_indptr",
+            "positions",
+            "doc_lengths",
+        )
+    }
+    if (
+        len(arrays["indptr"]) != len(vocab) + 1
+        or len(arrays["doc_lengths"]) != manifest["count"]
+    ):
+        raise ValueError("Keyword index does not match the manifest")
+    return KeywordIndex.from_arrays(vocab, arrays)
+
+
+class PaperCache:
+    """Per-PDF cache of extracted questions and embedding rows.
+
+    Entries are keyed by a hash of the PDF contents, so an unchanged paper
+    is never extracted or encoded again, whatever its filename or mtime.
+    Questions depend on the PDF text backend that extracted them:
+
+    - <content_hash>.<backend>.questions.json
+          [[question, page_number, [[label, part_text, page_number], ...]], ...]
+          (the part list is empty for questions without parts)
+    - <content_hash>.<backend>.<model_tag>.npy        embedding rows for those questions
+    - <content_hash>.<backend>.<model_tag>.parts.npy  embedding rows for their parts
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_name: str,
+        chunk_size: int = 1024 * 1024,
+        text_backend: str = "pypdf2",
+    ):
+        self.cache_dir = cache_dir
+        self.model_tag = hashlib.md5(model_name.encode()).hexdigest()[:12]
+        self.chunk_size = chunk_size
+        self.text_backend = text_backend
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def file_hash(self, pdf_path: str) -> str:
+        """Hash the contents of a PDF."""
+        return file_hash(pdf_path, self.chunk_size)
+
+    def _questions_path(self, content_hash: str) -> str:
+        return os.path.join(
+            self.cache_dir, f"{content_hash}.{self.text_backend}.questions.json"
+        )
+
+    def _embeddings_path(self, content_hash: str, kind: str = "") -> str:
+        return os.path.join(
+            self.cache_dir,
+            f"{content_hash}.{self.text_backend}.{self.model_tag}{kind}.npy",
+        )
+
+    def has_questions(self, content_hash: str) -> bool:
+        return os.path.exists(self._questions_path(content_hash))
+
+    def load_questions(
+        self, content_hash: str
+    ) -> Optional[List[Tuple[str, int, List]]]:
+        """Questions of a paper as (question, page_number, parts), or None.
+
+        Entries written before parts were recorded are treated as missing.
+        """
+        try:
+            with open(self._questions_path(content_hash), encoding="utf-8") as f:
+                return [
+                    (question, page, [tuple(part) for part in parts])
+                    for question, page, parts in json.load(f)
+                ]
+        except (OSError, ValueError):
+            return None
+
+    def save_questions(self, content_hash: str, questions: List[Tuple[str, int, List]]):
+        _replace_file(
+            self._questions_path(content_hash),
+            lambda f: f.write(json.dumps(questions).encode("utf-8")),
+        )
+
+    def load_embeddings(
+        self, content_hash: str, count: int, kind: str = ""
+    ) -> Optional[np.ndarray]:
+        """Load the embedding rows of a paper if they match its question count.
+
+        kind=".parts" loads the rows of its question parts instead.
+        """
+        try:
+            embeddings = np.load(self._embeddings_path(content_hash, kind))
+        except (OSError, ValueError):
+            return None
+        return embeddings if len(embeddings) == count else None
+
+    def save_embeddings(
+        self, content_hash: str, embeddings: np.ndarray, kind: str = ""
+    ):
+        _replace_file(
+            self._embeddings_path(content_hash, kind),
+            lambda f: np.save(f, embeddings),
+        )
+
+    def prune(self, content_hashes):
+        """Delete entries of papers that are no longer in the corpus."""
+        for filename in os.listdir(self.cache_dir):
+            if filename.split(".", 1)[0] not in content_hashes:
+                os.remove(os.path.join(self.cache_dir, filename))
@@ -0,0 +1,316 @@
+import bisect
+import re
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Common words ignored when extracting query terms
+STOP_WORDS = frozenset(
+    {
+        "the",
+        "a",
+        "an",
+        "and",
+        "or",
+        "but",
+        "in",
+        "on",
+        "at",
+        "to",
+        "for",
+        "of",
+        "with",
+        "by",
+        "is",
+        "are",
+        "was",
+        "were",
+        "be",
+        "been",
+        "being",
+        "have",
+        "has",
+        "had",
+        "do",
+        "does",
+        "did",
+        "will",
+        "would",
+        "could",
+        "should",
+        "may",
+        "might",
+        "can",
+        "about",
+        "find",
+        "calculate",
+        "solve",
+        "show",
+        "prove",
+        "question",
+        "questions",
+        "problem",
+        "problems",
+    }
+)
+
+# Score weights
+PHRASE_WEIGHT = 0.5  # Exact phrase match gets highest weight
+BM25_WEIGHT = 0.3  # BM25 term score, scaled to 0..1 by the query's best possible score
+
+# BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_APOSTROPHES = re.compile(r"['\u2019]")
+_WHITESPACE = re.compile(r"\s+")
+_SPECIAL_CHARS = re.compile(r"[^\w\s']")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text, normalize apostrophes/whitespace and strip special chars."""
+    text = _APOSTROPHES.sub("'", text.lower())
+    text = _WHITESPACE.sub(" ", text)
+    text = _SPECIAL_CHARS.sub(" ", text)
+    return text.strip()
+
+
+def extract_query_terms(query_normalized: str) -> List[str]:
+    """Extract meaningful terms from a normalized query (remove common words)."""
+    return [
+        term
+        for term in query_normalized.split()
+        if term not in STOP_WORDS and len(term) > 2
+    ]
+
+
+class KeywordIndex:
+    """Positional inverted index with BM25 scoring.
+
+    Every question is tokenized once into its normalized words. For each word
+    of the sorted vocabulary the index holds a CSR-style posting list:
+    indptr[w]:indptr[w + 1] slices doc_ids (ascending question ids) and
+    term_freqs, and posting p's word positions are
+    positions[position_indptr[p]:position_indptr[p + 1]].
+
+    A query term matches every vocabulary word it is a prefix of (so
+    "integr" matches "integrate" and "integration"), and only the postings
+    of those words are touched. Scoring a query therefore costs time in the
+    number of postings of its terms, not in the size of the corpus.
+    """
+
+    def __init__(self, questions: List[str]):
+        postings = {}
+        doc_lengths = np.zeros(len(questions), dtype=np.int32)
+        for doc_id, question in enumerate(questions):
+            words = normalize_text(question).split()
+            doc_lengths[doc_id] = len(words)
+            for position, word in enumerate(words):
+                postings.setdefault(word, {}).setdefault(doc_id, []).append(position)
+
+        vocab = sorted(postings)
+        posting_counts = np.fromiter(
+            (len(postings[word]) for word in vocab), dtype=np.int64, count=len(vocab)
+        )
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(posting_counts, out=indptr[1:])
+
+        # Posting lists are filled in ascending question id order
+        doc_position_lists = [
+            (doc_id, word_positions)
+            for word in vocab
+            for doc_id, word_positions in postings[word].items()
+        ]
+        doc_ids = np.fromiter(
+            (doc_id for doc_id, _ in doc_position_lists),
+            dtype=np.int32,
+            count=len(doc_position_lists),
+        )
+        term_freqs = np.fromiter(
+            (len(word_positions) for _, word_positions in doc_position_lists),
+            dtype=np.int32,
+            count=len(doc_position_lists),
+        )
+        position_indptr = np.zeros(len(doc_position_lists) + 1, dtype=np.int64)
+        np.cumsum(term_freqs, out=position_indptr[1:])
+        positions = np.fromiter(
+            (
+                position
+                for _, word_positions in doc_position_lists
+                for position in word_positions
+            ),
+            dtype=np.int32,
+            count=int(position_indptr[-1]),
+        )
+
+        self._init_arrays(
+            vocab,
+            {
+                "indptr": indptr,
+                "doc_ids": doc_ids,
+                "term_freqs": term_freqs,
+                "position_indptr": position_indptr,
+                "positions": positions,
+                "doc_lengths": doc_lengths,
+            },
+        )
+
+    @classmethod
+    def from_arrays(cls, vocab: List[str], arrays: Dict[str, np.ndarray]):
+        """Rebuild an index from its vocabulary and arrays (see arrays())."""
+        index = cls.__new__(cls)
+        index._init_arrays(vocab, arrays)
+        return index
+
+    def _init_arrays(self, vocab: List[str], arrays: Dict[str, np.ndarray]):
+        self.vocab = vocab
+        self.indptr = arrays["indptr"]
+        self.doc_ids = arrays["doc_ids"]
+        self.term_freqs = arrays["term_freqs"]
+        self.position_indptr = arrays["position_indptr"]
+        self.positions = arrays["positions"]
+        self.doc_lengths = arrays["doc_lengths"]
+        self.avg_doc_length = (
+            float(np.mean(self.doc_lengths)) if len(self.doc_lengths) else 0.0
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """The index arrays, keyed by name, for persisting with the cache."""
+        return {
+            "indptr": self.indptr,
+            "doc_ids": self.doc_ids,
+            "term_freqs": self.term_freqs,
+            "position_indptr": self.position_indptr,
+            "positions": self.positions,
+            "doc_lengths": self.doc_lengths,
+        }
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def word_id(self, word: str) -> Optional[int]:
+        """Vocabulary id of word, or None if no question contains it."""
+        i = bisect.bisect_left(self.vocab, word)
+        if i < len(self.vocab) and self.vocab[i] == word:
+            return i
+        return None
+
+    def words_with_prefix(self, term: str) -> range:
+        """Vocabulary ids of every word starting with term."""
+        start = bisect.bisect_left(self.vocab, term)
+        stop = bisect.bisect_left(self.vocab, term + "\U0010ffff", lo=start)
+        return range(start, stop)
+
+    def term_postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(question ids, term frequencies) of every question matching term."""
+        word_ids = self.words_with_prefix(term)
+        if not word_ids:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        # Prefix matches are adjacent in the vocabulary: one contiguous slice
+        start, stop = self.indptr[word_ids.start], self.indptr[word_ids.stop]
+        docs, freqs = self.doc_ids[start:stop], self.term_freqs[start:stop]
+        if len(word_ids) == 1:
+            return np.asarray(docs), np.asarray(freqs)
+        docs, inverse = np.unique(docs, return_inverse=True)
+        return docs, np.bincount(inverse, weights=freqs).astype(np.int32)
+
+    def idf(self, doc_freq: int) -> float:
+        return float(np.log(1 + (len(self) - doc_freq + 0.5) / (doc_freq + 0.5)))
+
+    def bm25(self, query_terms: List[str]) -> Tuple[np.ndarray, np.ndarray, float]:
+        """BM25 scores of the questions matching any of query_terms.
+
+        Returns (question ids, scores, best possible score), where the best
+        possible score is what a question would get from a saturated match of
+        every term; dividing by it scales the scores to 0..1.
+        """
+        matched_docs = []
+        matched_scores = []
+        best_possible = 0.0
+        for term in query_terms:
+            docs, freqs = self.term_postings(term)
+            idf = self.idf(len(docs))
+            best_possible += idf * (BM25_K1 + 1)
+            if not len(docs):
+                continue
+            length_norm = BM25_K1 * (
+                1 - BM25_B + BM25_B * self.doc_lengths[docs] / self.avg_doc_length
+            )
+            matched_docs.append(docs)
+            matched_scores.append(idf * freqs * (BM25_K1 + 1) / (freqs + length_norm))
+
+        if not matched_docs:
+            return np.empty(0, dtype=np.int32), np.empty(0), best_possible
+        docs, inverse = np.unique(np.concatenate(matched_docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(matched_scores))
+        return docs, scores, best_possible
+
+    def _word_positions(self, word_id: int, doc_id: int) -> np.ndarray:
+        start, stop = self.indptr[word_id], self.indptr[word_id + 1]
+        posting = start + np.searchsorted(self.doc_ids[start:stop], doc_id)
+        return self.positions[
+            self.position_indptr[posting] : self.position_indptr[posting + 1]
+        ]
+
+    def phrase_matches(self, words: List[str]) -> np.ndarray:
+        """Ids of the questions containing words as a consecutive phrase."""
+        word_ids = [self.word_id(word) for word in words]
+        if not word_ids or any(word_id is None for word_id in word_ids):
+            return np.empty(0, dtype=np.int32)
+
+        # Only questions containing every word can contain the phrase
+        candidates = None
+        for word_id in sorted(
+            set(word_ids), key=lambda w: self.indptr[w + 1] - self.indptr[w]
+        ):
+            docs = self.doc_ids[self.indptr[word_id] : self.indptr[word_id + 1]]
+            candidates = (
+                docs
+                if candidates is None
+                else np.intersect1d(candidates, docs, assume_unique=True)
+            )
+        if len(word_ids) == 1:
+            return np.asarray(candidates)
+
+        matches = []
+        for doc_id in candidates:
+            starts = self._word_positions(word_ids[0], doc_id)
+            for offset, word_id in enumerate(word_ids[1:], 1):
+                positions = self._word_positions(word_id, doc_id)
+                starts = starts[np.isin(starts + offset, positions)]
+                if not len(starts):
+                    break
+            if len(starts):
+                matches.append(doc_id)
+        return np.asarray(matches, dtype=np.int32)
+
+    def score(self, query: str, rows: np.ndarray = None) -> np.ndarray:
+        """Calculate the keyword matching score of query against every question.
+
+        If rows is given (sorted, as returned by RowFilter.select), only
+        those questions are scored, in that order.
+        """
+        count = len(self) if rows is None else len(rows)
+        scores = np.zeros(count)
+        query_normalized = normalize_text(query)
+        query_terms = extract_query_terms(query_normalized)
+
+        if not query_terms or not count:
+            return scores
+
+        docs, bm25_scores, best_possible = self.bm25(query_terms)
+        phrase_docs = self.phrase_matches(query_normalized.split())
+
+        def scatter(doc_ids, values):
+            if rows is None:
+                scores[doc_ids] += values
+                return
+            # Map question ids to their index in rows, dropping the rest
+            idx = np.searchsorted(rows, doc_ids)
+            keep = idx < count
+            keep[keep] = rows[idx[keep]] == doc_ids[keep]
+            scores[idx[keep]] += values[keep] if np.ndim(values) else values
+
+        if best_possible > 0:
+            scatter(docs, bm25_scores / best_possible * BM25_WEIGHT)
+        scatter(phrase_docs, PHRASE_WEIGHT)
+        return np.minimum(scores, 1.0)  # Cap at 1.0
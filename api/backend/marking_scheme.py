@@ -0,0 +1,267 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from backend import pdf_text
+from backend.text_utils import keyword_pattern
+
+MARKING_SCHEME_INDEX_VERSION = 1
+
+# Keywords that confirm a "QX Model Solution" page has solution content
+SOLUTION_INDICATORS = ["marks", "scale", "credit", "method", "correct", "incorrect"]
+
+# Keywords of instructions/summary pages
+OVERVIEW_KEYWORDS = [
+    "summary of mark allocations",
+    "section a",
+    "section b",
+    "answer all",
+    "answer both",
+    "answer any",
+    "structure of the marking scheme",
+    "scales and the marks that they generate",
+    "palette of annotations",
+]
+
+# Keywords of actual solution content
+SOLUTION_CONTENT_KEYWORDS = [
+    "method",
+    "scale",
+    "partial credit",
+    "low partial credit",
+    "high partial credit",
+    "marking notes",
+    "model solution",
+]
+
+SOLUTION_WORDS = ["method", "scale", "marks", "credit", "solution"]
+
+SOLUTION_INDICATORS_PATTERN = keyword_pattern(SOLUTION_INDICATORS)
+OVERVIEW_PATTERN = keyword_pattern(OVERVIEW_KEYWORDS)
+SOLUTION_CONTENT_PATTERN = keyword_pattern(SOLUTION_CONTENT_KEYWORDS)
+# Words that put a "QX" line in solution context
+SOLUTION_CONTEXT_PATTERN = keyword_pattern(["marks", "model", "solution", "scale"])
+MATH_SYMBOL_PATTERN = re.compile(r"[=+\-×÷∫∑√()\[\]]")
+
+
+def extract_page_texts(pdf_path: str) -> List[str]:
+    """Text of every page of a marking scheme (cached, see pdf_text)."""
+    return pdf_text.page_texts(pdf_path)
+
+
+def locate_question_page(pages: List[str], question_number: int) -> Optional[Dict]:
+    """Find the marking scheme page for a question from the extracted page texts.
+
+    Returns {"page", "matched_text", "content_type"} or None if not found.
+    """
+    pages_lower = [text.lower() for text in pages]
+
+    # Priority 1: Look for "QX Model Solution" pattern (most specific)
+    model_solution_patterns = [
+        f"q{question_number} model solution",
+        f"q.{question_number} model solution",
+        f"q {question_number} model solution",
+        f"question {question_number} model solution",
+    ]
+    model_solution_pattern = keyword_pattern(model_solution_patterns)
+    for page_num, text_lower in enumerate(pages_lower, 1):
+        if not model_solution_pattern.search(text_lower):
+            continue
+        # Additional validation - make sure this has solution content
+        if not SOLUTION_INDICATORS_PATTERN.search(text_lower):
+            continue
+        pattern = next(p for p in model_solution_patterns if p in text_lower)
+        return {
+            "page": page_num,
+            "matched_text": f"Found model solution pattern: {pattern}",
+            "content_type": "solution",
+        }
+
+    # Priority 2: Look for question headers in solution sections
+    # (Skip overview/summary pages by checking context)
+    patterns_to_check = [
+        # New format patterns (like Q3, Q.3, etc.)
+        f"q{question_number}",
+        f"q.{question_number}",
+        f"q {question_number}",
+        # Old format patterns
+        f"question {question_number}",
+        f"question{question_number}",
+    ]
+    question_pattern = keyword_pattern(patterns_to_check)
+    for page_num, (text, text_lower) in enumerate(zip(pages, pages_lower), 1):
+        # Cheap page-level check before looking at individual lines
+        if not question_pattern.search(text_lower):
+            continue
+
+        is_overview_page = OVERVIEW_PATTERN.search(text_lower) is not None
+        has_solution_content = SOLUTION_CONTENT_PATTERN.search(text_lower) is not None
+        math_symbols = len(MATH_SYMBOL_PATTERN.findall(text))
+        solution_words = sum(1 for word in SOLUTION_WORDS if word in text_lower)
+
+        # SKIP overview/summary pages - prioritize actual solution pages
+        if is_overview_page and not has_solution_content:
+            continue
+
+        # SKIP pages with very little mathematical content
+        if math_symbols < 3 and solution_words < 2:
+            continue
+
+        for line in text.split("\n"):
+            line_clean = line.strip()
+            line_lower = line_clean.lower()
+
+            # Skip very short lines or lines that are clearly headers/footers
+            if len(line_clean) < 2:
+                continue
+
+            if not question_pattern.search(line_lower):
+                continue
+
+            is_valid_match = False
+
+            # For newer format: Look for "Q3" at start of line or in solution context
+            if f"q{question_number}" in line_lower:
+                if (
+                    line_lower.startswith(f"q{question_number}")
+                    or line_lower.startswith(f"q.{question_number}")
+                    or line_lower.startswith(f"q {question_number}")
+                ):
+                    is_valid_match = True
+                # Also check if it's in a solution context
+                elif SOLUTION_CONTEXT_PATTERN.search(line_lower):
+                    is_valid_match = True
+
+            # For older format: Look for "Question X" patterns
+            elif f"question {question_number}" in line_lower:
+                is_valid_match = True
+
+            if is_valid_match:
+                return {
+                    "page": page_num,
+                    "matched_text": line_clean[:100],  # For debugging
+                    "content_type": ("solution" if has_solution_content else "summary"),
+                }
+
+    return None
+
+
+class MarkingSchemeIndex:
+    """Precomputed question -> page table for every marking scheme.
+
+    Each marking scheme is extracted once and located for question numbers
+    1..max_question. The table is persisted as JSON next to the embeddings
+    cache and only rebuilt for files whose size or mtime changed.
+    """
+
+    def __init__(self, markingscheme_dir: str, index_file: str, max_question: int):
+        self.markingscheme_dir = markingscheme_dir
+        self.index_file = index_file
+        self.max_question = max_question
+        self.years = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, year: str, question_number: int) -> Optional[Dict]:
+        """Return the indexed location of a question.
+
+        Returns None if the year or question number isn't indexed, and a dict
+        with "found" False if the question was searched for but not found.
+        """
+        entry = self.years.get(str(year))
+        if entry is None or question_number > entry["max_question"]:
+            return None
+        location = entry["questions"].get(str(question_number))
+        if location is None:
+            return {"found": False}
+        return dict(location, found=True)
+
+    def build(self):
+        """Load the persisted table and index any new or changed marking scheme."""
+        stored = self._load()
+        years = {}
+        changed = False
+        text_backend = pdf_text.default_cache().backend
+
+        if os.path.exists(self.markingscheme_dir):
+            for filename in sorted(os.listdir(self.markingscheme_dir)):
+                if not (filename.endswith(".pdf") and "markingscheme" in filename):
+                    continue
+
+                pdf_path = os.path.join(self.markingscheme_dir, filename)
+                stat = os.stat(pdf_path)
+                # Tables depend on how the page text was extracted
+                signature = f"{stat.st_size}:{stat.st_mtime}:{text_backend}"
+                year = filename[:4]
+
+                entry = stored.get(year)
+                if (
+                    entry is None
+                    or entry["filename"] != filename
+                    or entry["signature"] != signature
+                    or entry["max_question"] < self.max_question
+                ):
+                    print(f"Indexing marking scheme {filename}...")
+                    entry = self.index_file_pages(
+                        extract_page_texts(pdf_path), filename, signature
+                    )
+                    changed = True
+                years[year] = entry
+
+        with self._lock:
+            self.years = years
+        if changed or set(years) != set(stored):
+            self._save()
+
+    def index_file_pages(self, pages: List[str], filename: str, signature: str) -> Dict:
+        """Locate every question number in one extracted marking scheme."""
+        questions = {}
+        for question_number in range(1, self.max_question + 1):
+            location = locate_question_page(pages, question_number)
+            if location is not None:
+                questions[str(question_number)] = location
+        return {
+            "filename": filename,
+            "signature": signature,
+            "max_question": self.max_question,
+            "questions": questions,
+        }
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.index_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != MARKING_SCHEME_INDEX_VERSION:
+            return {}
+        return data.get("years", {})
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+            tmp_file = f"{self.index_file}.tmp-{os.getpid()}"
+            with open(tmp_file, "w") as f:
+                json.dump(
+                    {"version": MARKING_SCHEME_INDEX_VERSION, "years": self.years},
+                    f,
+                    indent=2,
+                )
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            print(f"Error saving marking scheme index: {e}")
+
+
+if __name__ == "__main__":
+    # Build the marking scheme indexes offline: python -m backend.marking_scheme
+    from config import CACHE_DIR, CORPUS_SOURCES, MARKING_SCHEME_MAX_QUESTION
+
+    for source, config in CORPUS_SOURCES.items():
+        index = MarkingSchemeIndex(
+            config["markingscheme_dir"],
+            os.path.join(CACHE_DIR, f"markingscheme_index_{source}.json"),
+            MARKING_SCHEME_MAX_QUESTION,
+        )
+        index.build()
+        print(f"Indexed {source} marking schemes for {len(index.years)} years")
@@ -1,5 +1,4 @@
 import os
-import PyPDF2
 import pandas as pd
 
 # Force PyTorch to use CPU only to reduce memory usage
@@ -10,24 +9,185 @@ torch.set_num_threads(1)  # Reduce CPU thread usage for memory efficiency
 
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
 import re
-import pickle
 import hashlib
+import gc
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from backend.keyword_index import KeywordIndex
+from backend import index_store, pdf_text
+from backend.vector_index import (
+    COMPRESSION_MODES,
+    VECTOR_INDEX_TYPES,
+    CompressedMatrix,
+    FlatIndex,
+    IVFIndex,
+    matrix_scores,
+    normalize_rows,
+    top_k_indices,
+)
+from backend.query_cache import LRUCache
+from backend.filters import RowFilter, parse_filters
+from backend.rwlock import ReadWriteLock
+from backend.batch_encoder import (
+    MicroBatchEncoder,
+    encode_by_length,
+    padding_overhead,
+)
+from backend.subquestions import (
+    PART_AGGREGATIONS,
+    PartIndex,
+    paper_part_rows,
+    part_starts,
+)
+from backend.text_utils import page_for_position, remove_header_footer_lines
+
+# Supported model residency policies (see MODEL_RESIDENCY in config.py)
+MODEL_RESIDENCY_POLICIES = ("resident", "idle", "per_query")
+
+# Where questions start, tried in order until one splits a paper into at
+# least three segments:
+# - "Question 1 (25 marks)" or "Question 1  (30 marks)" (newer papers)
+# - "1. (a)" or "2. (a)" for main questions
+# - just "1." followed by content
+QUESTION_START_PATTERNS = [
+    re.compile(r"(?=Question\s+\d+\s*\([^)]+\))", re.IGNORECASE),
+    re.compile(r"(?=^\d+\.\s*\([a-z]\)|\n\d+\.\s*\([a-z]\))", re.MULTILINE),
+    re.compile(r"(?=^\d+\.\s+[A-Z]|\n\d+\.\s+[A-Z])", re.MULTILINE),
+]
 
 
 class MathPaperSearcher:
-    def __init__(self, papers_dir: str = "data/papers"):
-        self.papers_dir = papers_dir
+    def __init__(
+        self,
+        papers_dir: str = None,
+        model_residency: str = None,
+        model_idle_timeout: int = None,
+        sources: Dict[str, str] = None,
+    ):
+        from config import (
+            CACHE_DIR,
+            CHUNK_SIZE,
+            CORPUS_SOURCES,
+            EMBEDDING_CACHE_DTYPE,
+            EMBEDDING_COMPRESSION,
+            ENCODE_CONCURRENCY,
+            INDEX_ENCODE_BATCH,
+            INDEX_MODEL_BATCH,
+            IVF_EXACT_BELOW,
+            IVF_LISTS,
+            IVF_PROBES,
+            MODEL_RESIDENCY,
+            MODEL_IDLE_TIMEOUT,
+            PDF_TEXT_BACKEND,
+            PDF_WORKERS,
+            QUERY_BATCH_MAX,
+            QUERY_BATCH_WINDOW_MS,
+            QUERY_EMBEDDING_CACHE_SIZE,
+            RERANK_CANDIDATES,
+            SEARCH_RESULT_CACHE_SIZE,
+            SENTENCE_TRANSFORMER_MODEL,
+            SUBQUESTION_AGGREGATION,
+            SUBQUESTION_INDEX,
+            VECTOR_INDEX,
+        )
+
+        # Collections indexed together: source name -> papers directory
+        if sources is None:
+            sources = (
+                {"papers": papers_dir}
+                if papers_dir
+                else {
+                    name: source["papers_dir"]
+                    for name, source in CORPUS_SOURCES.items()
+                }
+            )
+        self.sources = sources
         # Load model only when needed and use smaller model
+        self.model_name = SENTENCE_TRANSFORMER_MODEL
         self._model = None
+        self._model_lock = threading.Lock()
+        self._model_last_used = 0.0
+        # Searches currently using the model; it is never unloaded under them
+        self._model_users = 0
+        self.encode_concurrency = ENCODE_CONCURRENCY
+        self._encode_slots = threading.BoundedSemaphore(self.encode_concurrency)
+        self.model_residency = model_residency or MODEL_RESIDENCY
+        if self.model_residency not in MODEL_RESIDENCY_POLICIES:
+            raise ValueError(
+                f"Unknown model residency policy: {self.model_residency} "
+                f"(expected one of {', '.join(MODEL_RESIDENCY_POLICIES)})"
+            )
+        self.model_idle_timeout = (
+            model_idle_timeout if model_idle_timeout is not None else MODEL_IDLE_TIMEOUT
+        )
+        self._reaper_thread = None
+        self._reaper_stop = threading.Event()
+        # Searches read the index under the read lock; swapping in a new index
+        # takes the write lock and bumps the generation
+        self._index_lock = ReadWriteLock()
+        self._index_generation = 0
+        # Cache key (see _get_cache_key) of the papers the live index was built
+        # from, and the generation of its manifest
+        self.cache_key = None
+        self.index_generation_loaded = None
+        self._process_lock = threading.Lock()
         self.embeddings = None
+        self.compressed_embeddings = None
+        self.vector_index = FlatIndex()
         self.questions = []
         self.metadata = []
-        self.cache_dir = "data/cache"
-        self.embeddings_cache_file = os.path.join(self.cache_dir, "embeddings.pkl")
-        self.questions_cache_file = os.path.join(self.cache_dir, "questions.pkl")
+        self.keyword_index = None
+        self.row_filter = None
+        # Sub-question index (None unless SUBQUESTION_INDEX is on)
+        self.parts = None
+        self.cache_dir = CACHE_DIR
+        self.index_dir = os.path.join(self.cache_dir, "index")
+        self.pdf_text_backend = pdf_text.check_backend(PDF_TEXT_BACKEND)
+        self.paper_cache = index_store.PaperCache(
+            os.path.join(self.cache_dir, "papers"),
+            self.model_name,
+            CHUNK_SIZE,
+            self.pdf_text_backend,
+        )
+        self.embedding_cache_dtype = EMBEDDING_CACHE_DTYPE
+        self.embedding_compression = EMBEDDING_COMPRESSION
+        if self.embedding_compression not in COMPRESSION_MODES:
+            raise ValueError(
+                f"Unknown embedding compression: {self.embedding_compression} "
+                f"(expected one of {', '.join(COMPRESSION_MODES)})"
+            )
+        self.rerank_candidates = RERANK_CANDIDATES
+        self.vector_index_type = VECTOR_INDEX
+        if self.vector_index_type not in VECTOR_INDEX_TYPES:
+            raise ValueError(
+                f"Unknown vector index: {self.vector_index_type} "
+                f"(expected one of {', '.join(VECTOR_INDEX_TYPES)})"
+            )
+        self.ivf_lists = IVF_LISTS
+        self.ivf_probes = IVF_PROBES
+        self.ivf_exact_below = IVF_EXACT_BELOW
+        self.subquestion_index = SUBQUESTION_INDEX
+        self.part_aggregation = SUBQUESTION_AGGREGATION
+        if self.part_aggregation not in PART_AGGREGATIONS:
+            raise ValueError(
+                f"Unknown sub-question aggregation: {self.part_aggregation} "
+                f"(expected one of {', '.join(PART_AGGREGATIONS)})"
+            )
+        self.pdf_workers = PDF_WORKERS or os.cpu_count() or 1
+        self.index_encode_batch = INDEX_ENCODE_BATCH
+        self.index_model_batch = max(1, INDEX_MODEL_BATCH)
+        self.query_embedding_cache = LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+        self.search_result_cache = LRUCache(SEARCH_RESULT_CACHE_SIZE)
+        self.query_batch_window = QUERY_BATCH_WINDOW_MS / 1000
+        self.query_batch_max = QUERY_BATCH_MAX
+        self.query_encoder = self._make_query_encoder()
 
         # Create cache directory if it doesn't exist
         os.makedirs(self.cache_dir, exist_ok=True)
@@ -35,411 +195,1050 @@ class MathPaperSearcher:
     @property
     def model(self):
         """Lazy load the model only when needed."""
-        if self._model is None:
-            from config import SENTENCE_TRANSFORMER_MODEL
+        with self._model_lock:
+            return self._load_model_locked()
 
-            print(f"Loading model: {SENTENCE_TRANSFORMER_MODEL}")
-            self._model = SentenceTransformer(SENTENCE_TRANSFORMER_MODEL)
+    def _load_model_locked(self):
+        if self._model is None:
+            print(f"Loading model: {self.model_name}")
+            self._model = SentenceTransformer(self.model_name)
+            if self.model_residency == "idle":
+                self._start_model_reaper()
+        self._model_last_used = time.monotonic()
         return self._model
 
+    @contextmanager
+    def _using_model(self):
+        """Use the shared model for encoding, applying the residency policy.
+
+        At most encode_concurrency threads encode at once and the rest wait
+        for a slot.
+        """
+        with self._encode_slots:
+            with self._pinned_model() as model:
+                yield model
+
+    @contextmanager
+    def _pinned_model(self):
+        """Keep the shared model loaded, without taking an encode slot.
+
+        The model can't be unloaded while a thread has it pinned; under the
+        per_query policy the last thread to finish unloads it. Callers take
+        an encode slot around each encode themselves.
+        """
+        with self._model_lock:
+            model = self._load_model_locked()
+            self._model_users += 1
+        try:
+            yield model
+        finally:
+            with self._model_lock:
+                self._model_users -= 1
+                self._model_last_used = time.monotonic()
+                unload = self.model_residency == "per_query" and not self._model_users
+                if unload:
+                    self._unload_model_locked()
+            if unload:
+                gc.collect()
+
+    def _make_query_encoder(self):
+        """Micro-batching encoder for search queries, or None if disabled."""
+        if self.query_batch_window <= 0:
+            return None
+        return MicroBatchEncoder(
+            self._encode_batch, self.query_batch_window, self.query_batch_max
+        )
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized embeddings of texts from one model.encode call."""
+        # Under the per_query policy the model is loaded only for this batch
+        with self._using_model() as model:
+            return normalize_rows(model.encode(texts))
+
+    def after_fork(self):
+        """Restore per-process state in a worker forked from a loaded searcher.
+
+        Only the forking thread survives fork(), so the locks are recreated
+        and the idle reaper restarted if the model is loaded.
+        """
+        self._model_lock = threading.Lock()
+        self._model_users = 0
+        self._encode_slots = threading.BoundedSemaphore(self.encode_concurrency)
+        self._reaper_stop = threading.Event()
+        self._reaper_thread = None
+        self._index_lock = ReadWriteLock()
+        self._process_lock = threading.Lock()
+        self.query_encoder = self._make_query_encoder()
+        if self.model_residency == "idle" and self._model is not None:
+            self._model_last_used = time.monotonic()
+            self._start_model_reaper()
+
+    def warm_up(self):
+        """Load the model up front if the residency policy keeps it in memory."""
+        if self.model_residency != "per_query":
+            self.model
+
+    def _start_model_reaper(self):
+        """Start the background thread that unloads the model once idle."""
+        if self._reaper_thread is not None and self._reaper_thread.is_alive():
+            return
+
+        self._reaper_stop.clear()
+        self._reaper_thread = threading.Thread(
+            target=self._reap_idle_model, name="model-reaper", daemon=True
+        )
+        self._reaper_thread.start()
+
+    def _reap_idle_model(self):
+        """Unload the model after model_idle_timeout seconds without use."""
+        check_interval = max(1.0, min(30.0, self.model_idle_timeout / 2))
+        while not self._reaper_stop.wait(check_interval):
+            with self._model_lock:
+                idle_for = time.monotonic() - self._model_last_used
+                if (
+                    self._model is None
+                    or self._model_users
+                    or idle_for < self.model_idle_timeout
+                ):
+                    continue
+                print(f"Model idle for {idle_for:.0f}s")
+                self._unload_model_locked()
+            gc.collect()
+
+    def stop_model_reaper(self):
+        """Stop the idle model reaper thread, if running."""
+        self._reaper_stop.set()
+        if self._reaper_thread is not None:
+            self._reaper_thread.join(timeout=5)
+            self._reaper_thread = None
+
+    def model_info(self) -> Dict:
+        """Describe the model residency state (used by /api/memory)."""
+        return {
+            "model_loaded": self._model is not None,
+            "model_users": self._model_users,
+            "encode_concurrency": self.encode_concurrency,
+            "query_batching": (
+                self.query_encoder.stats() if self.query_encoder is not None else None
+            ),
+            "model_residency": self.model_residency,
+            "model_idle_timeout": self.model_idle_timeout,
+            "model_idle_seconds": (
+                round(time.monotonic() - self._model_last_used, 1)
+                if self._model is not None
+                else None
+            ),
+        }
+
+    def _list_papers(self) -> List[Tuple[str, str, str]]:
+        """List (source, filename, path) of every PDF in the corpus.
+
+        Sources are listed in configuration order and files sorted by name, so
+        the question order doesn't depend on directory listing order.
+        """
+        papers = []
+        for source, papers_dir in self.sources.items():
+            if not os.path.isdir(papers_dir):
+                continue
+            for filename in sorted(os.listdir(papers_dir)):
+                if filename.endswith(".pdf"):
+                    papers.append(
+                        (source, filename, os.path.join(papers_dir, filename))
+                    )
+        return papers
+
+    @staticmethod
+    def _unique_papers(
+        corpus: List[Tuple[str, str, str]], content_hashes: Dict
+    ) -> List[Tuple[str, str, str]]:
+        """Drop papers whose contents are already in the corpus.
+
+        A PDF filed under two sources (e.g. a deferred paper that is also in
+        the main papers directory) is indexed once, under the first source,
+        so searches don't return the same question twice.
+        """
+        seen = set()
+        unique = []
+        for source, filename, pdf_path in corpus:
+            content_hash = content_hashes[source, filename]
+            if content_hash in seen:
+                print(f"Skipping {source}/{filename}: same PDF as an earlier paper")
+                continue
+            seen.add(content_hash)
+            unique.append((source, filename, pdf_path))
+        return unique
+
     def _get_cache_key(self) -> str:
         """Generate a cache key based on the papers directory contents."""
-        files = []
-        for filename in sorted(os.listdir(self.papers_dir)):
-            if filename.endswith(".pdf"):
-                filepath = os.path.join(self.papers_dir, filename)
-                # Include filename and file size in hash
-                stat = os.stat(filepath)
-                files.append(f"{filename}:{stat.st_size}:{stat.st_mtime}")
+        files = [self.model_name, self.pdf_text_backend]
+        if self.subquestion_index:
+            files.append("parts")
+        for source, filename, filepath in self._list_papers():
+            # Include source, filename and file size in hash
+            stat = os.stat(filepath)
+            files.append(f"{source}/{filename}:{stat.st_size}:{stat.st_mtime}")
 
         cache_key = hashlib.md5("".join(files).encode()).hexdigest()
         return cache_key
 
-    def _load_from_cache(self) -> bool:
-        """Load embeddings and questions from cache if available and valid."""
-        if not os.path.exists(self.embeddings_cache_file) or not os.path.exists(
-            self.questions_cache_file
-        ):
-            return False
+    def index_is_stale(self) -> bool:
+        """Whether papers were added, removed or changed since the index was built."""
+        return self._get_cache_key() != self.cache_key
 
-        try:
-            # Check if cache is still valid
-            with open(self.questions_cache_file, "rb") as f:
-                cached_data = pickle.load(f)
+    def index_is_outdated(self) -> bool:
+        """Whether a newer index than the live one has been committed to disk.
 
-            current_cache_key = self._get_cache_key()
-            if cached_data.get("cache_key") != current_cache_key:
-                print("Cache is outdated, will regenerate...")
-                return False
+        True in the processes that didn't build it when several processes
+        (e.g. gunicorn workers) serve the same index directory.
+        """
+        manifest = index_store.read_manifest(self.index_dir)
+        return (
+            manifest is not None
+            and manifest.get("generation") != self.index_generation_loaded
+        )
 
-            # Load cached data
-            self.questions = cached_data["questions"]
-            self.metadata = cached_data["metadata"]
+    def _load_from_cache(self) -> bool:
+        """Memory-map the on-disk index if it is available and valid."""
+        manifest = index_store.read_manifest(self.index_dir)
+        if manifest is None:
+            return False
 
-            with open(self.embeddings_cache_file, "rb") as f:
-                self.embeddings = pickle.load(f)
+        cache_key = self._get_cache_key()
+        if manifest.get("cache_key") != cache_key:
+            print("Cache is outdated, will regenerate...")
+            return False
 
-            print(f"Loaded {len(self.questions)} questions from cache")
+        try:
+            embeddings, questions, metadata = index_store.load_index(
+                self.index_dir, manifest
+            )
+            compressed_embeddings = None
+            if manifest.get("compression", "none") == self.embedding_compression:
+                compressed_embeddings = index_store.load_compressed(
+                    self.index_dir, manifest
+                )
+            keyword_index = index_store.load_keyword_index(self.index_dir, manifest)
+            parts = index_store.load_parts(self.index_dir, manifest)
+            if keyword_index is None:
+                keyword_index = KeywordIndex(questions)
+
+            # Searches keep using the old index until the swap
+            if parts is not None:
+                parts.compress(self.embedding_compression)
+            self._swap_index(
+                cache_key=cache_key,
+                generation=manifest.get("generation"),
+                embeddings=embeddings,
+                questions=questions,
+                metadata=metadata,
+                compressed=self._compress_embeddings(embeddings, compressed_embeddings),
+                parts=parts,
+                vector_index=self._load_vector_index(manifest, embeddings),
+                keyword_index=keyword_index,
+            )
+            print(f"Loaded {len(questions)} questions from cache")
             return True
 
         except Exception as e:
             print(f"Error loading cache: {e}")
             return False
 
-    def _save_to_cache(self):
-        """Save embeddings and questions to cache."""
-        try:
-            # Save questions and metadata
-            cache_data = {
-                "questions": self.questions,
-                "metadata": self.metadata,
-                "cache_key": self._get_cache_key(),
-            }
-
-            with open(self.questions_cache_file, "wb") as f:
-                pickle.dump(cache_data, f)
-
-            # Save embeddings separately (they're large)
-            with open(self.embeddings_cache_file, "wb") as f:
-                pickle.dump(self.embeddings, f)
-
-            print("Saved embeddings and questions to cache")
+    def _compress_embeddings(
+        self, embeddings: np.ndarray, compressed: CompressedMatrix = None
+    ) -> Optional[CompressedMatrix]:
+        """The compressed first-pass matrix, or None if compression is disabled.
+
+        compressed is the matrix loaded with the cache, reused if its mode
+        is still the configured one.
+        """
+        if self.embedding_compression == "none":
+            return None
+        if compressed is not None and compressed.mode == self.embedding_compression:
+            return compressed
+        return CompressedMatrix.from_embeddings(embeddings, self.embedding_compression)
+
+    def _new_vector_index(self, embeddings: np.ndarray):
+        if self.vector_index_type == "ivf":
+            print("Building IVF vector index...")
+            return IVFIndex.build(
+                embeddings,
+                n_lists=self.ivf_lists,
+                n_probe=self.ivf_probes,
+                exact_below=self.ivf_exact_below,
+            )
+        return FlatIndex()
+
+    def _load_vector_index(self, manifest: Dict, embeddings: np.ndarray):
+        """The persisted vector index, rebuilt (and saved) if the config changed."""
+        vector_index = index_store.load_vector_index(self.index_dir, manifest)
+        if vector_index is not None and (
+            self.vector_index_type == "ivf"
+            and self.ivf_lists in (0, vector_index.n_lists)
+        ):
+            vector_index.n_probe = self.ivf_probes
+            vector_index.exact_below = self.ivf_exact_below
+            return vector_index
+
+        vector_index = self._new_vector_index(embeddings)
+        if vector_index.params() != manifest.get("vector_index", {"kind": "flat"}):
+            try:
+                index_store.save_vector_index(self.index_dir, manifest, vector_index)
+            except OSError as e:
+                print(f"Error saving vector index: {e}")
+        return vector_index
+
+    def embedding_info(self) -> Dict:
+        """Storage mode and size of the corpus embeddings (used by /api/memory)."""
+        if self.embeddings is None:
+            return None
+        compressed = self.compressed_embeddings
+        return {
+            "rows": len(self.embeddings),
+            "dtype": str(self.embeddings.dtype),
+            "memory_mapped": isinstance(self.embeddings, np.memmap),
+            "full_bytes": int(self.embeddings.nbytes),
+            "compression": compressed.mode if compressed is not None else "none",
+            "compressed_bytes": int(compressed.nbytes) if compressed is not None else 0,
+            "rerank_candidates": self.rerank_candidates,
+            "vector_index": self.vector_index.params(),
+            "subquestion_parts": len(self.parts) if self.parts is not None else 0,
+        }
 
-        except Exception as e:
-            print(f"Error saving cache: {e}")
+    def _swap_index(
+        self,
+        cache_key: str,
+        generation: Optional[int],
+        embeddings: np.ndarray,
+        questions: List[str],
+        metadata: List[Dict],
+        compressed: Optional[CompressedMatrix],
+        parts: Optional[PartIndex],
+        vector_index,
+        keyword_index: KeywordIndex,
+    ):
+        """Make a fully built index the one searches use.
+
+        Everything is built by the caller without holding the index lock;
+        this only takes the write lock to swap the references, so searches
+        wait for a few assignments rather than for a k-means or BM25 build.
+        """
+        records, _, sources = index_store.metadata_to_records(metadata)
+        row_filter = RowFilter(records, sources)
+        with self._index_lock.write_lock():
+            self.cache_key = cache_key
+            self.index_generation_loaded = generation
+            self.embeddings = embeddings
+            self.questions = questions
+            self.metadata = metadata
+            self.compressed_embeddings = compressed
+            self.parts = parts
+            self.vector_index = vector_index
+            self.keyword_index = keyword_index
+            self.row_filter = row_filter
+            self._index_generation += 1
+            self.search_result_cache.clear()
+
+    def unload_model(self) -> bool:
+        """Unload the model from memory to save RAM.
+
+        Returns False (and keeps the model) if a search is using it.
+        """
+        with self._model_lock:
+            if self._model_users:
+                return False
+            self._unload_model_locked()
+            return True
 
-    def unload_model(self):
-        """Unload the model from memory to save RAM."""
+    def _unload_model_locked(self):
         if self._model is not None:
             del self._model
             self._model = None
             print("Model unloaded from memory")
 
-    def extract_text_with_pages(self, pdf_path: str) -> List[Tuple[str, int]]:
-        """Extract text from a PDF file with page numbers."""
-        pages_text = []
-        with open(pdf_path, "rb") as file:
-            reader = PyPDF2.PdfReader(file)
-            for page_num, page in enumerate(reader.pages, 1):
-                text = page.extract_text()
-                pages_text.append((text, page_num))
-        return pages_text
-
+    @staticmethod
+    def extract_text_with_pages(pdf_path: str) -> Iterator[Tuple[str, int]]:
+        """Yield (text, page_number) for each page of a PDF (see pdf_text)."""
+        for page_num, text in enumerate(pdf_text.page_texts(pdf_path), 1):
+            yield text, page_num
+
+    @staticmethod
+    def question_spans(full_text: str) -> Iterator[Tuple[int, int]]:
+        """(start, end) of each question segment of a paper's text.
+
+        Uses the first of QUESTION_START_PATTERNS that finds at least two
+        question starts (the last one otherwise), and splits at every start.
+        """
+        for pattern in QUESTION_START_PATTERNS:
+            starts = [match.start() for match in pattern.finditer(full_text)]
+            if len(starts) >= 2:
+                break
+        bounds = [0, *starts, len(full_text)]
+        return zip(bounds, bounds[1:])
+
+    @staticmethod
     def split_into_questions_with_pages(
-        self, pages_text: List[Tuple[str, int]]
-    ) -> List[Tuple[str, int]]:
-        """Split text into individual questions with their page numbers."""
-        all_questions = []
-
-        # Combine all text but keep track of page boundaries
-        full_text = ""
-        page_boundaries = []
+        pages_text: Iterable[Tuple[str, int]],
+    ) -> Iterator[Tuple[str, int]]:
+        """Split a paper's text into questions, yielding (question, page_number)."""
+        for question, page_num, _ in MathPaperSearcher._split_paper(pages_text):
+            yield question, page_num
+
+    @staticmethod
+    def split_into_questions_with_parts(
+        pages_text: Iterable[Tuple[str, int]],
+    ) -> Iterator[Tuple[str, int, List[Tuple[str, str, int]]]]:
+        """Split a paper's text into questions and their parts (a), (b), (c)...
+
+        Yields (question, page_number, parts) where parts lists
+        (label, part_text, page_number) for each part, or is empty for a
+        question without parts.
+        """
+        return MathPaperSearcher._split_paper(pages_text, with_parts=True)
+
+    @staticmethod
+    def _split_paper(
+        pages_text: Iterable[Tuple[str, int]], with_parts: bool = False
+    ) -> Iterator[Tuple[str, int, List[Tuple[str, str, int]]]]:
+        # Join the pages once, keeping track of where each one ends
+        texts = []
+        page_ends = []
+        page_numbers = []
         current_pos = 0
-
         for text, page_num in pages_text:
-            full_text += text + "\n"
+            texts.append(text)
             current_pos += len(text) + 1
-            page_boundaries.append((current_pos, page_num))
-
-        # Based on analysis, questions follow these patterns:
-        # - "Question 1 (25 marks)" or "Question 1  (30 marks)"
-        # - "1. (a)" or "2. (a)" for main questions
-        # - Sometimes just "1." followed by content
-
-        # First, try to split by "Question X" pattern (newer papers)
-        question_pattern = r"(?=Question\s+\d+\s*\([^)]+\))"
-        questions = re.split(question_pattern, full_text, flags=re.IGNORECASE)
-
-        # If that doesn't work well, try the older pattern
-        if len(questions) < 3:  # If we don't get enough questions
-            # Split by numbered questions like "1. (a)" or "2. (a)"
-            question_pattern = r"(?=^\d+\.\s*\([a-z]\)|\n\d+\.\s*\([a-z]\))"
-            questions = re.split(question_pattern, full_text, flags=re.MULTILINE)
-
-        # If still not enough, try even simpler pattern
-        if len(questions) < 3:
-            # Split by just numbers followed by period and content
-            question_pattern = r"(?=^\d+\.\s+[A-Z]|\n\d+\.\s+[A-Z])"
-            questions = re.split(question_pattern, full_text, flags=re.MULTILINE)
-
-        # Clean up questions and find their page numbers
-        cleaned_questions = []
-        current_pos = 0
-
-        for q in questions:
-            q = q.strip()
+            page_ends.append(current_pos)
+            page_numbers.append(page_num)
+        full_text = "".join(text + "\n" for text in texts)
+        del texts
+
+        for start, end in MathPaperSearcher.question_spans(full_text):
+            segment = full_text[start:end]
+            q = segment.strip()
             # Remove very short segments (likely headers/footers)
             if len(q) > 50:  # Only keep substantial content
-                # Remove common header/footer patterns
-                lines = q.split("\n")
-                filtered_lines = []
-                for line in lines:
-                    line = line.strip()
-                    # Skip common header/footer patterns
-                    if not any(
-                        pattern in line.lower()
-                        for pattern in [
-                            "leaving certificate",
-                            "mathematics",
-                            "paper 1",
-                            "higher level",
-                            "page",
-                            "marks",
-                            "examination",
-                            "state examinations commission",
-                            "coimisiún na scrúduithe stáit",
-                            "for examiner",
-                        ]
-                    ):
-                        filtered_lines.append(line)
-
-                cleaned_q = "\n".join(filtered_lines).strip()
+                cleaned_q = remove_header_footer_lines(q)
                 if len(cleaned_q) > 30:  # Final length check
-                    # Find the page number for this question
-                    question_start_pos = full_text.find(q, current_pos)
-                    page_num = self.find_page_for_position(
-                        question_start_pos, page_boundaries
+                    # The question's page is the one its first character is on
+                    question_start_pos = start + len(segment) - len(segment.lstrip())
+                    page_num = page_for_position(
+                        question_start_pos, page_ends, page_numbers
                     )
-                    cleaned_questions.append((cleaned_q, page_num))
-                    current_pos = question_start_pos + len(q)
-
-        return cleaned_questions
-
-    def find_page_for_position(
-        self, position: int, page_boundaries: List[Tuple[int, int]]
-    ) -> int:
-        """Find which page a text position belongs to."""
-        for boundary_pos, page_num in page_boundaries:
-            if position < boundary_pos:
-                return page_num
-        return page_boundaries[-1][1] if page_boundaries else 1
-
-    def calculate_keyword_score(self, query: str, question: str) -> float:
-        """Calculate keyword matching score between query and question."""
-        # Normalize both query and question text
-        query_lower = query.lower()
-        question_lower = question.lower()
-
-        # Remove common mathematical symbols and normalize
-        def normalize_text(text):
-            # Replace common variations
-            text = re.sub(r"['\u2019]", "'", text)  # Normalize apostrophes
-            text = re.sub(r"\s+", " ", text)  # Normalize whitespace
-            text = re.sub(
-                r"[^\w\s']", " ", text
-            )  # Remove special chars except apostrophes
-            return text.strip()
-
-        query_normalized = normalize_text(query_lower)
-        question_normalized = normalize_text(question_lower)
-
-        # Extract meaningful terms from query (remove common words)
-        stop_words = {
-            "the",
-            "a",
-            "an",
-            "and",
-            "or",
-            "but",
-            "in",
-            "on",
-            "at",
-            "to",
-            "for",
-            "of",
-            "with",
-            "by",
-            "is",
-            "are",
-            "was",
-            "were",
-            "be",
-            "been",
-            "being",
-            "have",
-            "has",
-            "had",
-            "do",
-            "does",
-            "did",
-            "will",
-            "would",
-            "could",
-            "should",
-            "may",
-            "might",
-            "can",
-            "about",
-            "find",
-            "calculate",
-            "solve",
-            "show",
-            "prove",
-            "question",
-            "questions",
-            "problem",
-            "problems",
-        }
+                    parts = []
+                    if with_parts:
+                        parts = MathPaperSearcher._question_parts(
+                            segment, start, page_ends, page_numbers
+                        )
+                    yield cleaned_q, page_num, parts
+
+    @staticmethod
+    def _question_parts(
+        segment: str, segment_start: int, page_ends: List[int], page_numbers: List[int]
+    ) -> List[Tuple[str, str, int]]:
+        """(label, part_text, page_number) of each part of a question segment.
+
+        Any text before part (a), such as a shared introduction, goes with
+        part (a). Each part is on the page its marker is on.
+        """
+        starts = part_starts(segment)
+        bounds = [0, *(offset for offset, _ in starts[1:]), len(segment)]
+        parts = []
+        for (offset, label), part_start, part_end in zip(starts, bounds, bounds[1:]):
+            text = remove_header_footer_lines(segment[part_start:part_end])
+            if text:
+                page_num = page_for_position(
+                    segment_start + offset, page_ends, page_numbers
+                )
+                parts.append((label, text, page_num))
+        return parts if len(parts) >= 2 else []
+
+    @staticmethod
+    def extract_questions_from_pdf(pdf_path: str) -> List[Tuple[str, int, List]]:
+        """Extract and split one PDF into questions and their parts.
+
+        Runs in pool workers; returns split_into_questions_with_parts items.
+        """
+        pages_text = MathPaperSearcher.extract_text_with_pages(pdf_path)
+        return list(MathPaperSearcher.split_into_questions_with_parts(pages_text))
+
+    def _extract_papers(self, pdf_paths: List[str]) -> Iterator[List[Tuple]]:
+        """Extract questions from each PDF, yielding results in the given order.
+
+        Text extraction is CPU-bound (pure Python with PyPDF2), so papers
+        from every source are processed together in a process pool of
+        self.pdf_workers processes (serially if 1). Only two papers per
+        worker are in flight, so extracted papers don't pile up waiting to
+        be encoded.
+
+        The workers are not forked from this process: it serves requests and
+        runs the query encoder and papers watcher threads, and a child forked
+        while one of them holds a lock (e.g. the page text cache's) deadlocks.
+        They are forked from a single-threaded forkserver that has imported
+        this module once, or spawned where there is no forkserver (Windows).
+        Either way the workers import the main script, so scripts that build
+        an index must keep their work under if __name__ == "__main__".
+        """
+        workers = min(self.pdf_workers, len(pdf_paths))
+
+        if workers <= 1:
+            for pdf_path in pdf_paths:
+                yield self.extract_questions_from_pdf(pdf_path)
+            return
 
-        query_terms = [
-            term
-            for term in query_normalized.split()
-            if term not in stop_words and len(term) > 2
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("forkserver")
+            mp_context.set_forkserver_preload([__name__])
+        else:
+            mp_context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=mp_context
+        ) as executor:
+            in_flight = deque()
+            for pdf_path in pdf_paths:
+                if len(in_flight) >= 2 * workers:
+                    yield in_flight.popleft().result()
+                in_flight.append(
+                    executor.submit(self.extract_questions_from_pdf, pdf_path)
+                )
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def _iter_papers(
+        self, corpus: List[Tuple[str, str, str]], content_hashes: Dict
+    ) -> Iterator[Tuple[str, str, List[Tuple[str, int, List]]]]:
+        """Yield (source, filename, questions_with_pages) in corpus order.
+
+        questions_with_pages holds (question, page_number, parts) items (see
+        split_into_questions_with_parts).
+
+        Papers in the per-paper cache are read from it; the rest are
+        extracted (and cached) as the iteration reaches them.
+        """
+        to_extract = [
+            pdf_path
+            for source, filename, pdf_path in corpus
+            if not self.paper_cache.has_questions(content_hashes[source, filename])
         ]
+        if to_extract:
+            print(
+                f"Extracting {len(to_extract)} new or changed papers "
+                f"with {self.pdf_workers} workers..."
+            )
+        extracted = self._extract_papers(to_extract)
+        pending = set(to_extract)
+
+        for source, filename, pdf_path in corpus:
+            content_hash = content_hashes[source, filename]
+            if pdf_path in pending:
+                questions_with_pages = next(extracted)
+            else:
+                questions_with_pages = self.paper_cache.load_questions(content_hash)
+                if questions_with_pages is None:
+                    # Cache entry unreadable: extract the paper here instead
+                    questions_with_pages = self.extract_questions_from_pdf(pdf_path)
+                else:
+                    yield source, filename, questions_with_pages
+                    continue
+            print(f"Processed {source}/{filename}...")
+            self.paper_cache.save_questions(content_hash, questions_with_pages)
+            yield source, filename, questions_with_pages
+
+    def _embed_papers(
+        self,
+        papers: Iterator[Tuple[str, str, List[Tuple[str, int, List]]]],
+        content_hashes: Dict,
+        encode: Callable[[List[str]], np.ndarray],
+    ) -> Iterator[Tuple[str, str, List[Tuple[str, int, List]], np.ndarray, np.ndarray]]:
+        """Add the (unnormalized) embedding rows of each paper, in order.
+
+        Yields (source, filename, questions_with_pages, embeddings,
+        part_embeddings); part_embeddings has a row per part of the paper's
+        multi-part questions, and is only computed with the sub-question
+        index on. Rows come from the per-paper cache where possible.
+        Uncached papers are held back until about index_encode_batch texts
+        are waiting, then encoded in one call and cached.
+        """
+        held = []
+        waiting = 0
+        for source, filename, questions_with_pages in papers:
+            content_hash = content_hashes[source, filename]
+            part_count = 0
+            if self.subquestion_index:
+                part_count = sum(len(parts) for _, _, parts in questions_with_pages)
+            embeddings = part_embeddings = np.zeros((0, 0), dtype=np.float32)
+            if questions_with_pages:
+                embeddings = self.paper_cache.load_embeddings(
+                    content_hash, len(questions_with_pages)
+                )
+            if part_count:
+                part_embeddings = self.paper_cache.load_embeddings(
+                    content_hash, part_count, ".parts"
+                )
+            held.append(
+                [source, filename, questions_with_pages, embeddings, part_embeddings]
+            )
+            if embeddings is None:
+                waiting += len(questions_with_pages)
+            if part_embeddings is None:
+                waiting += part_count
+            if not waiting or waiting >= self.index_encode_batch:
+                yield from self._encode_held(held, content_hashes, encode)
+                held = []
+                waiting = 0
+        yield from self._encode_held(held, content_hashes, encode)
+
+    def _encode_held(self, held, content_hashes, encode):
+        # (paper, slot, texts, cache kind) of every missing set of rows
+        jobs = []
+        for paper in held:
+            if paper[3] is None:
+                jobs.append((paper, 3, [question for question, _, _ in paper[2]], ""))
+            if paper[4] is None:
+                part_texts = [text for _, _, parts in paper[2] for _, text, _ in parts]
+                jobs.append((paper, 4, part_texts, ".parts"))
+        texts = [text for _, _, job_texts, _ in jobs for text in job_texts]
+        if texts:
+            print(f"Creating embeddings for {len(texts)} questions and parts...")
+            encoded = np.asarray(encode(texts), dtype=np.float32)
+            offset = 0
+            for paper, slot, job_texts, kind in jobs:
+                rows = encoded[offset : offset + len(job_texts)]
+                offset += len(rows)
+                self.paper_cache.save_embeddings(
+                    content_hashes[paper[0], paper[1]], rows, kind
+                )
+                paper[slot] = rows
+        for paper in held:
+            yield tuple(paper)
+
+    @staticmethod
+    def _token_lengths(model, texts: List[str]) -> List[int]:
+        """Tokens of each text as the model encodes it (capped at its max length).
+
+        Word counts stand in for models without a tokenizer.
+        """
+        tokenizer = getattr(model, "tokenizer", None)
+        if tokenizer is None:
+            return [len(text.split()) for text in texts]
+        max_length = getattr(model, "max_seq_length", None)
+        encoded = tokenizer(
+            texts, truncation=max_length is not None, max_length=max_length
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def _encode_for_index(self, model, texts: List[str]) -> np.ndarray:
+        """Encode texts for the index in length-sorted batches, reporting progress.
+
+        Texts go to the model index_model_batch at a time, longest first, so
+        little of each batch is padding; rows are returned in text order.
+        """
+        lengths = self._token_lengths(model, texts)
+        print(
+            f"Encoding in batches of {self.index_model_batch}: padding "
+            f"{padding_overhead(sorted(lengths, reverse=True), self.index_model_batch):.0%}"
+            f" ({padding_overhead(lengths, self.index_model_batch):.0%} unsorted)"
+        )
+
+        def report(done: int, total: int, batch_texts: int, seconds: float):
+            rate = batch_texts / seconds if seconds > 0 else float("inf")
+            print(f"  {done}/{total} encoded ({rate:.0f} texts/s)")
+
+        return encode_by_length(
+            lambda batch: model.encode(batch, batch_size=len(batch)),
+            texts,
+            lengths,
+            self.index_model_batch,
+            report,
+        )
 
-        if not query_terms:
-            return 0.0
-
-        # Calculate different types of matches
-        exact_phrase_match = 0.0
-        exact_term_matches = 0
-        partial_matches = 0
-
-        # Check for exact phrase match
-        if query_normalized in question_normalized:
-            exact_phrase_match = 1.0
+    def calculate_keyword_score(self, query: str, question: str) -> float:
+        """Calculate keyword matching score between query and a single question.
 
-        # Check for exact term matches and partial matches
-        for term in query_terms:
-            if term in question_normalized:
-                exact_term_matches += 1
-            elif any(term in word for word in question_normalized.split()):
-                partial_matches += 1
+        search() scores the whole corpus at once through self.keyword_index;
+        this scores question as a one-question corpus, so term rarity doesn't
+        affect the score.
+        """
+        return float(KeywordIndex([question]).score(query)[0])
 
-        # Calculate weighted score
-        phrase_weight = 0.5  # Exact phrase match gets highest weight
-        exact_weight = 0.3  # Exact term matches
-        partial_weight = 0.1  # Partial matches
+    def process_papers(self):
+        """Process all papers and create search index.
 
-        exact_term_score = (exact_term_matches / len(query_terms)) * exact_weight
-        partial_score = (partial_matches / len(query_terms)) * partial_weight
-        phrase_score = exact_phrase_match * phrase_weight
+        Searches keep running on the current index while a new one is built,
+        and the new index is swapped in under the write lock.
+        """
+        with self._process_lock:
+            self._process_papers()
 
-        total_score = phrase_score + exact_term_score + partial_score
-        return min(total_score, 1.0)  # Cap at 1.0
+    def _process_papers(self):
+        """Load the committed index if it is current, otherwise build one.
 
-    def process_papers(self):
-        """Process all papers and create search index."""
-        # Try to load from cache first
+        Building takes the index directory's build lock, so when several
+        processes find the index out of date only one builds it, and the
+        others load the index it committed once they get the lock.
+        """
         if self._load_from_cache():
             return
 
-        all_questions = []
-        all_metadata = []
-
-        for filename in os.listdir(self.papers_dir):
-            if filename.endswith(".pdf"):
+        with index_store.build_lock(self.index_dir):
+            # Another process may have committed a current index meanwhile
+            if self._load_from_cache():
+                return
+            self._build_index()
+
+    def _build_index(self):
+        """Build the index as a stream: PDFs -> questions -> embeddings -> disk.
+
+        Each paper is extracted (or read from the per-paper cache), encoded
+        in batches of about index_encode_batch questions and appended to the
+        on-disk index, so memory holds about one paper plus one encode batch
+        at a time. The finished index is then memory-mapped and swapped in.
+        The rows of each encode batch go to the per-paper cache as soon as
+        it is done, so an interrupted build resumes after the last batch.
+        """
+        # Taken before listing, so a paper changing mid-build leaves the new
+        # index marked stale rather than looking up to date
+        cache_key = self._get_cache_key()
+        corpus = self._list_papers()
+        content_hashes = {
+            (source, filename): self.paper_cache.file_hash(pdf_path)
+            for source, filename, pdf_path in corpus
+        }
+        corpus = self._unique_papers(corpus, content_hashes)
+
+        with ExitStack() as model_scope, index_store.IndexWriter(
+            self.index_dir, self.embedding_cache_dtype, parts=self.subquestion_index
+        ) as writer:
+            model = None
+
+            def encode(texts: List[str]) -> np.ndarray:
+                nonlocal model
+                # Pinned for the whole build, so under the per_query policy the
+                # model is loaded once rather than per batch. The encode slot is
+                # only held per batch: searches keep encoding in between, while
+                # the build extracts the next papers
+                if model is None:
+                    model = model_scope.enter_context(self._pinned_model())
+                with self._encode_slots:
+                    return self._encode_for_index(model, texts)
+
+            papers = self._iter_papers(corpus, content_hashes)
+            for (
+                source,
+                filename,
+                questions_with_pages,
+                embeddings,
+                part_embeddings,
+            ) in self._embed_papers(papers, content_hashes, encode):
                 year = filename[:4]
                 paper_num = filename[::-1][4:5]  # Extract paper number (1 or 2)
-                print(
-                    f"Processing {filename}... with year {year} and paper number {paper_num}"
+                metadata = [
+                    {
+                        "year": year,
+                        "paper": paper_num,
+                        "question_number": q_idx,
+                        "filename": filename,
+                        "page_number": page_num,
+                        "source": source,
+                    }
+                    for q_idx, (_, page_num, _) in enumerate(questions_with_pages, 1)
+                ]
+                parts = None
+                if self.subquestion_index and questions_with_pages:
+                    part_rows, part_counts, part_records = paper_part_rows(
+                        questions_with_pages, embeddings, part_embeddings
+                    )
+                    parts = (normalize_rows(part_rows), part_counts, part_records)
+                # Stored L2-normalized so search() can score with a plain dot product
+                writer.append(
+                    normalize_rows(embeddings),
+                    [question for question, _, _ in questions_with_pages],
+                    metadata,
+                    parts,
                 )
 
-                pdf_path = os.path.join(self.papers_dir, filename)
-                print(f"Processing {filename}...")
-                pages_text = self.extract_text_with_pages(pdf_path)
-                questions_with_pages = self.split_into_questions_with_pages(pages_text)
-
-                for q_idx, (question, page_num) in enumerate(questions_with_pages, 1):
-                    all_questions.append(question)
-                    all_metadata.append(
-                        {
-                            "year": year,
-                            "paper": paper_num,
-                            "question_number": q_idx,
-                            "filename": filename,
-                            "page_number": page_num,
-                        }
-                    )
+            # Done with the model before the derived structures are built
+            model_scope.close()
+            self.paper_cache.prune(set(content_hashes.values()))
+            print(f"Found {writer.count} questions across all papers.")
+
+            embeddings, questions, metadata = writer.finish()
+            parts = writer.load_parts()
+            if parts is not None:
+                parts.compress(self.embedding_compression)
+            compressed = self._compress_embeddings(embeddings)
+            vector_index = self._new_vector_index(embeddings)
+            keyword_index = KeywordIndex(questions)
+            generation = writer.commit(
+                cache_key, compressed, vector_index, keyword_index
+            )
+            print("Saved embeddings and questions to cache")
 
-        print(f"Found {len(all_questions)} questions across all papers.")
+        self._swap_index(
+            cache_key=cache_key,
+            generation=generation,
+            embeddings=embeddings,
+            questions=questions,
+            metadata=metadata,
+            compressed=compressed,
+            parts=parts,
+            vector_index=vector_index,
+            keyword_index=keyword_index,
+        )
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Cache key for a query: lowercased with whitespace collapsed.
+
+        The model is uncased and whitespace-insensitive, so queries with the
+        same key have the same embedding and the same ranking.
+        """
+        return " ".join(query.lower().split())
+
+    @staticmethod
+    def score_weights(query: str) -> Tuple[float, float]:
+        """Semantic and keyword weights used to combine scores for query."""
+        # Give more weight to keyword matches for exact term queries
+        semantic_weight = 0.7
+        keyword_weight = 0.3
+
+        # If query contains specific mathematical terms, increase keyword weight
+        math_terms = [
+            "theorem",
+            "formula",
+            "rule",
+            "law",
+            "principle",
+            "identity",
+            "equation",
+            "inequality",
+        ]
+        if any(term in query.lower() for term in math_terms):
+            semantic_weight = 0.6
+            keyword_weight = 0.4
+
+        return semantic_weight, keyword_weight
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Return L2-normalized embeddings of queries, one row per query.
+
+        Cached embeddings are reused and all remaining queries are encoded
+        in a single model.encode batch, shared with other searches arriving at
+        the same time when micro-batching is on.
+        """
+        query_keys = [self.normalize_query(query) for query in queries]
+        vectors = {}
+        for query_key in query_keys:
+            if query_key not in vectors:
+                vectors[query_key] = self.query_embedding_cache.get(query_key)
+        to_encode = [
+            query_key for query_key, vector in vectors.items() if vector is None
+        ]
 
-        # Create embeddings
-        print("Creating embeddings...")
-        self.embeddings = self.model.encode(all_questions)
-        self.questions = all_questions
-        self.metadata = all_metadata
+        if to_encode:
+            # Concurrent searches share one encode batch when micro-batching
+            if self.query_encoder is not None:
+                encoded = self.query_encoder.encode(to_encode)
+            else:
+                encoded = self._encode_batch(to_encode)
 
-        # Save to cache
-        self._save_to_cache()
+            for query_key, vector in zip(to_encode, encoded):
+                self.query_embedding_cache.put(query_key, vector)
+                vectors[query_key] = vector
 
-        # Unload model to save memory after processing
-        self.unload_model()
+        return np.stack([vectors[query_key] for query_key in query_keys])
 
-    def search(self, query: str, k: int = 5) -> List[Dict]:
-        """Search for similar questions using natural language query with enhanced ranking."""
-        if self.embeddings is None:
-            raise ValueError("Please process papers first using process_papers()")
+    def encode_query(self, query: str) -> np.ndarray:
+        """Return the L2-normalized embedding of query, using the LRU cache."""
+        return self.encode_queries([query])[0]
 
-        # Load model only for the search operation
-        model_was_loaded = self._model is not None
+    def cache_stats(self) -> Dict:
+        """Hit/miss/eviction counters of the query caches (used by /api/memory)."""
+        return {
+            "query_embeddings": self.query_embedding_cache.stats(),
+            "search_results": self.search_result_cache.stats(),
+        }
 
-        try:
-            # Encode query for semantic similarity
-            query_embedding = self.model.encode([query])
-
-            # Calculate semantic similarities
-            semantic_similarities = cosine_similarity(query_embedding, self.embeddings)[
-                0
-            ]
-
-            # Calculate keyword scores for all questions
-            keyword_scores = []
-            for question in self.questions:
-                keyword_score = self.calculate_keyword_score(query, question)
-                keyword_scores.append(keyword_score)
-
-            keyword_scores = np.array(keyword_scores)
-
-            # Combine semantic and keyword scores
-            # Give more weight to keyword matches for exact term queries
-            semantic_weight = 0.7
-            keyword_weight = 0.3
-
-            # If query contains specific mathematical terms, increase keyword weight
-            math_terms = [
-                "theorem",
-                "formula",
-                "rule",
-                "law",
-                "principle",
-                "identity",
-                "equation",
-                "inequality",
-            ]
-            if any(term in query.lower() for term in math_terms):
-                semantic_weight = 0.6
-                keyword_weight = 0.4
-
-            combined_scores = (semantic_weight * semantic_similarities) + (
-                keyword_weight * keyword_scores
+    def _semantic_scores(
+        self, query_vectors: np.ndarray, rows: np.ndarray = None
+    ) -> np.ndarray:
+        """Similarities of query_vectors to the given rows (None = all rows).
+
+        With compression enabled these are approximate, and the shortlist is
+        re-scored at full precision by _rerank. With the sub-question index,
+        a question's similarity is the aggregate of its parts' similarities.
+        """
+        if self.parts is not None:
+            return self.parts.scores(query_vectors, rows, self.part_aggregation)
+        if self.compressed_embeddings is not None:
+            return self.compressed_embeddings.scores(query_vectors, rows)
+
+        # The corpus embeddings are stored L2-normalized, so cosine
+        # similarity is a single matrix product (blockwise for float16 storage)
+        return matrix_scores(query_vectors, self.embeddings, rows)
+
+    def _rerank(
+        self,
+        query_vector: np.ndarray,
+        rows: np.ndarray,
+        semantic_similarities: np.ndarray,
+        keyword_scores: np.ndarray,
+        combined_scores: np.ndarray,
+        weights: Tuple[float, float],
+        k: int,
+    ) -> np.ndarray:
+        """Re-score the best approximate candidates against the full embeddings.
+
+        The top rerank_candidates rows by approximate combined score get their
+        exact semantic similarity (written back into semantic_similarities
+        and combined_scores), and the top k of them are returned best first.
+        """
+        semantic_weight, keyword_weight = weights
+        shortlist = top_k_indices(combined_scores, max(k, self.rerank_candidates))
+        shortlist_rows = shortlist if rows is None else rows[shortlist]
+
+        if self.parts is not None:
+            exact = self.parts.scores(
+                query_vector[None, :], shortlist_rows, self.part_aggregation, exact=True
+            )[0]
+        else:
+            exact = np.asarray(self.embeddings[shortlist_rows], dtype=np.float32) @ (
+                query_vector
             )
+        semantic_similarities[shortlist] = exact
+        combined_scores[shortlist] = (semantic_weight * exact) + (
+            keyword_weight * keyword_scores[shortlist]
+        )
+        return shortlist[top_k_indices(combined_scores[shortlist], k)]
+
+    def _result_key(self, query: str, k: int, filters: Tuple) -> Tuple:
+        """Result cache key: (query key, k, weights..., filters, index generation)."""
+        semantic_weight, keyword_weight = self.score_weights(query)
+        return (
+            self.normalize_query(query),
+            k,
+            semantic_weight,
+            keyword_weight,
+            filters,
+            self._index_generation,
+        )
+
+    def cached_search(
+        self, query: str, k: int = 5, filters: Dict = None
+    ) -> Optional[List[Dict]]:
+        """search() results if they are in the result cache, else None.
+
+        Never encodes or scores anything, so it is cheap enough to call from
+        an event loop. Raises ValueError for invalid filters.
+        """
+        if self.embeddings is None:
+            return None
+        key = self._result_key(query, k, parse_filters(filters))
+        return self.search_result_cache.peek(key)
 
-            # Get top k results
-            top_k_indices = np.argsort(combined_scores)[-k:][::-1]
+    def search(self, query: str, k: int = 5, filters: Dict = None) -> List[Dict]:
+        """Search for similar questions using natural language query with enhanced ranking."""
+        return self.search_many([query], k, filters)[0]
+
+    def search_many(
+        self, queries: List[str], k: int = 5, filters: Dict = None
+    ) -> List[List[Dict]]:
+        """Run several searches at once, returning the top k results per query.
+
+        All uncached queries are encoded in one model.encode batch and scored
+        against the corpus with a single queries x corpus matrix product.
+        filters (see backend/filters.py) restrict the search to a slice of
+        the index, and only that slice is scored.
+        """
+        if self.embeddings is None:
+            raise ValueError("Please process papers first using process_papers()")
 
-            # Prepare results
-            results = []
-            for idx in top_k_indices:
-                results.append(
-                    {
-                        "question": self.questions[idx],
-                        "metadata": self.metadata[idx],
-                        "similarity_score": float(combined_scores[idx]),
-                        "semantic_score": float(semantic_similarities[idx]),
-                        "keyword_score": float(keyword_scores[idx]),
-                    }
+        filters = parse_filters(filters)
+
+        all_results = [None] * len(queries)
+        pending = []
+        for i, query in enumerate(queries):
+            result_key = self._result_key(query, k, filters)
+            all_results[i] = self.search_result_cache.get(result_key)
+            if all_results[i] is None:
+                pending.append((i, result_key))
+
+        if not pending:
+            return all_results
+
+        # Encode queries for semantic similarity
+        query_vectors = self.encode_queries([queries[i] for i, _ in pending])
+
+        # The index can't be swapped while it is being scored
+        with self._index_lock.read_lock():
+            # Only the rows matching the filters are scored (None = all rows)
+            rows = self.row_filter.select(filters)
+            compressed = self.compressed_embeddings
+
+            # An ANN vector index narrows each query down to its own candidate
+            # rows; the flat index (None) scores the whole slice in one batch
+            candidate_rows = self.vector_index.candidate_rows(query_vectors, rows, k)
+            if candidate_rows is None:
+                query_rows = [rows] * len(pending)
+                semantic_matrix = self._semantic_scores(query_vectors, rows)
+            else:
+                query_rows = candidate_rows
+                semantic_matrix = [
+                    self._semantic_scores(query_vector[None, :], candidates)[0]
+                    for query_vector, candidates in zip(query_vectors, candidate_rows)
+                ]
+
+            for (i, result_key), query_vector, rows, semantic_similarities in zip(
+                pending, query_vectors, query_rows, semantic_matrix
+            ):
+                semantic_weight, keyword_weight = result_key[2:4]
+
+                # Calculate keyword scores for the same questions
+                keyword_scores = self.keyword_index.score(queries[i], rows)
+
+                # Combine semantic and keyword scores
+                combined_scores = (semantic_weight * semantic_similarities) + (
+                    keyword_weight * keyword_scores
                 )
 
-            return results
+                if compressed is None:
+                    top_indices = top_k_indices(combined_scores, k)
+                else:
+                    top_indices = self._rerank(
+                        query_vector,
+                        rows,
+                        semantic_similarities,
+                        keyword_scores,
+                        combined_scores,
+                        (semantic_weight, keyword_weight),
+                        k,
+                    )
 
-        finally:
-            # If model wasn't loaded before search, unload it after search to save memory
-            if not model_was_loaded and self._model is not None:
-                self.unload_model()
-                import gc
+                # Prepare top k results
+                results = []
+                for idx in top_indices:
+                    row = idx if rows is None else rows[idx]
+                    metadata = self.metadata[row]
+                    if self.parts is not None:
+                        # Point at the part that matched best
+                        part, page_number = self.parts.best_part(query_vector, row)
+                        metadata = dict(metadata, part=part, page_number=page_number)
+                    results.append(
+                        {
+                            "question": self.questions[row],
+                            "metadata": metadata,
+                            "similarity_score": float(combined_scores[idx]),
+                            "semantic_score": float(semantic_similarities[idx]),
+                            "keyword_score": float(keyword_scores[idx]),
+                        }
+                    )
 
-                gc.collect()
+                if result_key[-1] == self._index_generation:
+                    # Not cached if a new index was swapped in since the lookup
+                    self.search_result_cache.put(result_key, results)
+                all_results[i] = results
+
+        return all_results
 
 
 # Example usage
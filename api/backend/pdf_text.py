@@ -0,0 +1,178 @@
+"""
+PDF page text extraction with interchangeable backends and an on-disk cache.
+
+Backends (PDF_TEXT_BACKEND in config.py):
+
+- "pypdf2"     PyPDF2, pure Python (default, always installed)
+- "pypdfium2"  PDFium bindings, much faster (pip install pypdfium2)
+- "pdfminer"   pdfminer.six page by page (pip install pdfminer.six)
+
+The backends lay text out differently, so the question splitting and the
+marking scheme tables depend on which one is used, and caches derived from
+page text are keyed by backend.
+
+page_texts() is the one place page text is read from: the texts of every PDF
+are cached as <content_hash>.<backend>.json under the text cache directory,
+so indexing, the marking scheme lookup and the analysis scripts extract each
+PDF once.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+PDF_TEXT_BACKENDS = ("pypdf2", "pypdfium2", "pdfminer")
+
+
+def _pypdf2_pages(pdf_path: str) -> Iterator[str]:
+    import PyPDF2
+
+    with open(pdf_path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        for page in reader.pages:
+            yield page.extract_text()
+
+
+def _pypdfium2_pages(pdf_path: str) -> Iterator[str]:
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(pdf_path)
+    try:
+        for page in document:
+            text_page = page.get_textpage()
+            # PDFium separates lines with \r\n
+            yield text_page.get_text_range().replace("\r\n", "\n")
+            text_page.close()
+            page.close()
+    finally:
+        document.close()
+
+
+def _pdfminer_pages(pdf_path: str) -> Iterator[str]:
+    from io import StringIO
+
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    resources = PDFResourceManager()
+    with open(pdf_path, "rb") as file:
+        for page in PDFPage.get_pages(file):
+            output = StringIO()
+            device = TextConverter(resources, output, laparams=LAParams())
+            PDFPageInterpreter(resources, device).process_page(page)
+            device.close()
+            # TextConverter ends every page with a form feed
+            yield output.getvalue().rstrip("\x0c")
+
+
+_BACKENDS: Dict[str, Callable[[str], Iterator[str]]] = {
+    "pypdf2": _pypdf2_pages,
+    "pypdfium2": _pypdfium2_pages,
+    "pdfminer": _pdfminer_pages,
+}
+
+
+def check_backend(backend: str) -> str:
+    """Validate a backend name and that its package is installed."""
+    if backend not in PDF_TEXT_BACKENDS:
+        raise ValueError(
+            f"Unknown PDF text backend: {backend} "
+            f"(expected one of {', '.join(PDF_TEXT_BACKENDS)})"
+        )
+    module = {"pypdf2": "PyPDF2", "pypdfium2": "pypdfium2", "pdfminer": "pdfminer"}
+    try:
+        __import__(module[backend])
+    except ImportError:
+        raise ValueError(
+            f"PDF text backend {backend} needs the {module[backend]} package"
+        ) from None
+    return backend
+
+
+def extract_pages(pdf_path: str, backend: str = "pypdf2") -> List[str]:
+    """Extract the text of every page of a PDF (no caching)."""
+    return list(_BACKENDS[backend](pdf_path))
+
+
+def file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageTextCache:
+    """Extracted page texts of PDFs, keyed by content hash and backend.
+
+    Content hashes are remembered per (path, size, mtime), so a PDF that
+    hasn't changed is hashed once per process.
+    """
+
+    def __init__(self, cache_dir: str, backend: str, chunk_size: int = 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.backend = check_backend(backend)
+        self.chunk_size = chunk_size
+        self._hashes = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def content_hash(self, pdf_path: str) -> str:
+        stat = os.stat(pdf_path)
+        key = (os.path.abspath(pdf_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            content_hash = self._hashes.get(key)
+        if content_hash is None:
+            content_hash = file_hash(pdf_path, self.chunk_size)
+            with self._lock:
+                self._hashes[key] = content_hash
+        return content_hash
+
+    def _path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.{self.backend}.json")
+
+    def page_texts(self, pdf_path: str, content_hash: Optional[str] = None):
+        """Page texts of a PDF, extracted on the first request only."""
+        path = self._path(content_hash or self.content_hash(pdf_path))
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        pages = extract_pages(pdf_path, self.backend)
+        try:
+            tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(pages, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error caching page text of {pdf_path}: {e}")
+        return pages
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache() -> PageTextCache:
+    """The process-wide cache configured by PDF_TEXT_BACKEND and CACHE_DIR."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            from config import CACHE_DIR, CHUNK_SIZE, PDF_TEXT_BACKEND
+
+            _default_cache = PageTextCache(
+                os.path.join(CACHE_DIR, "text"), PDF_TEXT_BACKEND, CHUNK_SIZE
+            )
+        return _default_cache
+
+
+def page_texts(pdf_path: str) -> List[str]:
+    """Text of every page of a PDF, through the process-wide cache."""
+    return default_cache().page_texts(pdf_path)
@@ -0,0 +1,160 @@
+"""
+Sub-question (part) index: each part (a), (b), (c)... of a question has its
+own embedding, and a question scores as the aggregate of its parts' scores.
+
+Parts are stored in question order, so the parts of question i are rows
+offsets[i]:offsets[i + 1] of the part matrix (CSR layout, every question has
+at least one part: a question without parts is its own single part). A
+query's part scores are grouped back into question scores with one
+np.maximum.reduceat over the segment starts.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from backend.vector_index import CompressedMatrix, matrix_scores
+
+# How part scores combine into a question score (SUBQUESTION_AGGREGATION)
+PART_AGGREGATIONS = ("max", "top2_mean")
+
+PART_DTYPE = np.dtype([("page_number", "<i4"), ("label", "S1")])
+
+# "(a)" at the start of a line, optionally after the question number ("2. (a)")
+PART_START_PATTERN = re.compile(r"^[ \t]*(?:\d+\.[ \t]*)?\(([a-z])\)", re.MULTILINE)
+
+
+def part_starts(text: str) -> List[Tuple[int, str]]:
+    """(offset, label) of the part markers (a), (b), (c)... of a question.
+
+    Markers must run in alphabetical order from (a), which skips roman
+    numeral sub-parts like (i) and (v) and references to earlier parts.
+    Returns [] unless the question has at least two parts.
+    """
+    starts = []
+    expected = "a"
+    for match in PART_START_PATTERN.finditer(text):
+        if match.group(1) == expected:
+            starts.append((match.start(1) - 1, expected))
+            expected = chr(ord(expected) + 1)
+    return starts if len(starts) >= 2 else []
+
+
+def paper_part_rows(
+    questions_with_parts: List[Tuple[str, int, List]],
+    embeddings: np.ndarray,
+    part_embeddings: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Part rows of one paper: (embeddings, parts per question, PART_DTYPE records).
+
+    part_embeddings has a row for every part of the multi-part questions;
+    a question without parts reuses its own embedding row as its only part.
+    """
+    rows = []
+    counts = np.zeros(len(questions_with_parts), dtype=np.int64)
+    records = []
+    part_row = 0
+    for i, (_, page_num, parts) in enumerate(questions_with_parts):
+        if parts:
+            rows.append(part_embeddings[part_row : part_row + len(parts)])
+            part_row += len(parts)
+            records.extend((page, label) for label, _, page in parts)
+        else:
+            rows.append(embeddings[i : i + 1])
+            records.append((page_num, ""))
+        counts[i] = max(1, len(parts))
+    if not rows:
+        return embeddings[:0], counts, np.zeros(0, dtype=PART_DTYPE)
+    return np.concatenate(rows), counts, np.array(records, dtype=PART_DTYPE)
+
+
+def aggregate_scores(
+    scores: np.ndarray, starts: np.ndarray, counts: np.ndarray, aggregation: str
+) -> np.ndarray:
+    """Group part scores (queries x parts) into question scores (queries x questions).
+
+    starts are the first column of each question's parts (strictly
+    increasing, as every question has a part) and counts their numbers.
+    """
+    best = np.maximum.reduceat(scores, starts, axis=1)
+    if aggregation == "max":
+        return best
+
+    # top2_mean: mask the best part of each question and take the max again.
+    # A tied best part counts as the second best too.
+    is_best = scores == np.repeat(best, counts, axis=1)
+    ties = np.add.reduceat(is_best, starts, axis=1)
+    second = np.maximum.reduceat(np.where(is_best, -np.inf, scores), starts, axis=1)
+    second = np.where(ties > 1, best, second)
+    return np.where(counts > 1, (best + second) / 2, best).astype(scores.dtype)
+
+
+class PartIndex:
+    """Part embeddings of every question, scored and aggregated per question."""
+
+    def __init__(
+        self, embeddings: np.ndarray, offsets: np.ndarray, records: np.ndarray
+    ):
+        if len(offsets) == 0 or offsets[-1] != len(embeddings):
+            raise ValueError("Part offsets do not match the part embeddings")
+        self.embeddings = embeddings
+        self.offsets = offsets
+        self.records = records
+        self.counts = np.diff(offsets)
+        # Optional compressed copy for first-pass scoring (see compress())
+        self.compressed: Optional[CompressedMatrix] = None
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def compress(self, mode: str):
+        """Keep a compressed copy of the part embeddings ("none" drops it)."""
+        if mode == "none":
+            self.compressed = None
+        elif self.compressed is None or self.compressed.mode != mode:
+            self.compressed = CompressedMatrix.from_embeddings(self.embeddings, mode)
+
+    def _gather(self, rows: Optional[np.ndarray]):
+        """Part rows of the given questions, with each question's segment start."""
+        if rows is None:
+            return None, self.offsets[:-1], self.counts
+        firsts = self.offsets[rows]
+        counts = self.counts[rows]
+        starts = np.cumsum(counts) - counts
+        part_rows = np.repeat(firsts - starts, counts) + np.arange(counts.sum())
+        return part_rows, starts, counts
+
+    def scores(
+        self,
+        query_vectors: np.ndarray,
+        rows: np.ndarray = None,
+        aggregation: str = "max",
+        exact: bool = False,
+    ) -> np.ndarray:
+        """Question scores (queries x rows) aggregated from their part scores.
+
+        Uses the compressed part matrix if there is one, unless exact.
+        """
+        if rows is not None and len(rows) == 0:
+            return np.zeros((len(query_vectors), 0), dtype=np.float32)
+        part_rows, starts, counts = self._gather(rows)
+        if self.compressed is not None and not exact:
+            part_scores = self.compressed.scores(query_vectors, part_rows)
+        else:
+            part_scores = matrix_scores(query_vectors, self.embeddings, part_rows)
+        return aggregate_scores(part_scores, starts, counts, aggregation)
+
+    def best_part(
+        self, query_vector: np.ndarray, row: int
+    ) -> Tuple[Optional[str], int]:
+        """(label, page_number) of the part of question row closest to the query.
+
+        The label is None for a question without parts.
+        """
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        part_scores = np.asarray(self.embeddings[start:end], dtype=np.float32) @ (
+            query_vector
+        )
+        record = self.records[start + int(np.argmax(part_scores))]
+        return record["label"].decode("ascii") or None, int(record["page_number"])
@@ -0,0 +1,79 @@
+"""
+Text helpers shared by the question indexer (nlp.py) and the marking scheme
+locator (marking_scheme.py).
+
+Keyword lists are compiled once into a single alternation regex, so checking
+a page or a question for any of them is one scan of the text rather than
+one substring search per keyword.
+"""
+
+import re
+from bisect import bisect_right
+from typing import Iterable, List
+
+# Lines of exam papers that are page furniture rather than question text
+HEADER_FOOTER_KEYWORDS = [
+    "leaving certificate",
+    "mathematics",
+    "paper 1",
+    "higher level",
+    "page",
+    "marks",
+    "examination",
+    "state examinations commission",
+    "coimisiún na scrúduithe stáit",
+    "for examiner",
+]
+
+
+def keyword_pattern(keywords: Iterable[str], flags: int = 0) -> re.Pattern:
+    """Regex matching any of keywords literally (longest first)."""
+    alternatives = sorted(set(keywords), key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, alternatives)), flags)
+
+
+# Matched against lowercased text: IGNORECASE makes the search several times slower
+HEADER_FOOTER_PATTERN = keyword_pattern(HEADER_FOOTER_KEYWORDS)
+
+
+def remove_header_footer_lines(text: str) -> str:
+    """Drop the lines containing a header/footer keyword and strip the rest.
+
+    One search pass over the lowercased text: each match drops its whole
+    line and the search resumes on the next line.
+    """
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Some character lowercases to several, so offsets don't line up
+        lines = [
+            line
+            for line in text.split("\n")
+            if not HEADER_FOOTER_PATTERN.search(line.lower())
+        ]
+        return "\n".join(line.strip() for line in lines).strip()
+
+    kept = []
+    line_start = 0
+    while True:
+        match = HEADER_FOOTER_PATTERN.search(lowered, line_start)
+        if match is None:
+            kept.append(text[line_start:])
+            break
+        kept.append(text[line_start : lowered.rfind("\n", 0, match.start()) + 1])
+        line_end = lowered.find("\n", match.end())
+        if line_end == -1:
+            break
+        line_start = line_end + 1
+    return "\n".join(line.strip() for line in "".join(kept).split("\n")).strip()
+
+
+def page_for_position(position: int, page_ends: List[int], page_numbers: List[int]):
+    """Page number of a text position, given the end offset of every page.
+
+    Positions past the last page belong to the last page (page 1 if there
+    are no pages).
+    """
+    index = bisect_right(page_ends, position)
+    if index < len(page_numbers):
+        return page_numbers[index]
+    return page_numbers[-1] if page_numbers else 1
@@ -0,0 +1,308 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so cosine similarity becomes a dot product.
+
+    Zero rows are left as zeros (they score 0 against every query, as with
+    sklearn's cosine_similarity).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first.
+
+    np.argpartition finds the k candidates in O(n) and only those k are
+    sorted, instead of sorting the whole score array.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(scores, n - k)[n - k :]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+# First-pass storage of the corpus matrix (see CompressedMatrix)
+COMPRESSION_MODES = ("none", "float16", "int8")
+
+# Rows converted back to float32 at a time while scoring a float16/int8 matrix
+SCORE_BLOCK_ROWS = 512
+
+# float16 bits shifted into a float32 read as the value times 2**-112 (see
+# _widen_float16), so the query is scaled by 2**112 instead
+_FLOAT16_SHIFT_SCALE = np.float32(2.0**112)
+# Clears the copies of the sign bit that sign extension shifts into the exponent
+_FLOAT16_SHIFT_MASK = np.uint32(0x8FFFFFFF).view(np.int32)
+
+
+def _widen_float16(block: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """float16 rows as float32 values 2**-112 times as large, written into out.
+
+    numpy's float16 -> float32 cast is a slow scalar loop, so the bits are
+    moved with integer operations instead: sign-extended to int32 and
+    shifted left by 13, the float16 exponent and mantissa land in the low
+    exponent and high mantissa bits of a float32 (subnormals included).
+    Infinities and NaNs are not preserved.
+    """
+    np.copyto(out, block.view(np.int16), casting="unsafe")
+    np.left_shift(out, 13, out=out)
+    np.bitwise_and(out, _FLOAT16_SHIFT_MASK, out=out)
+    return out.view(np.float32)
+
+
+def matrix_scores(
+    query_vectors: np.ndarray,
+    matrix: np.ndarray,
+    rows: np.ndarray = None,
+    scales: np.ndarray = None,
+) -> np.ndarray:
+    """query_vectors @ matrix[rows].T (queries x rows) in float32.
+
+    A float32 matrix is multiplied directly. A float16 or int8 matrix (with
+    optional per-row scales) is widened SCORE_BLOCK_ROWS rows at a time into
+    one reused buffer, so scoring never materializes a float32 copy of the
+    whole matrix, as a mixed-dtype matrix product would.
+    """
+    query_vectors = np.asarray(query_vectors, dtype=np.float32)
+    if matrix.dtype == np.float32 and scales is None:
+        return np.asarray(query_vectors @ (matrix if rows is None else matrix[rows]).T)
+
+    count = len(matrix) if rows is None else len(rows)
+    scores = np.empty((len(query_vectors), count), dtype=np.float32)
+    is_float16 = matrix.dtype == np.float16
+    if is_float16:
+        query_vectors = query_vectors * _FLOAT16_SHIFT_SCALE
+    buffer = np.empty(
+        (min(count, SCORE_BLOCK_ROWS), matrix.shape[1]),
+        dtype=np.int32 if is_float16 else np.float32,
+    )
+
+    for start in range(0, count, SCORE_BLOCK_ROWS):
+        stop = min(start + SCORE_BLOCK_ROWS, count)
+        block_rows = slice(start, stop) if rows is None else rows[start:stop]
+        block_buffer = buffer[: stop - start]
+        if is_float16:
+            block = _widen_float16(matrix[block_rows], block_buffer)
+        else:
+            block = block_buffer
+            np.copyto(block, matrix[block_rows], casting="unsafe")
+        scores[:, start:stop] = query_vectors @ block.T
+        if scales is not None:
+            scores[:, start:stop] *= scales[block_rows]
+    return scores
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization.
+
+    Returns (codes, scales) with vectors ~= codes * scales[:, None]. Each row
+    uses its own scale, so the rounding error is at most half a step of that
+    row's largest component.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=-1) / 127.0 if len(vectors) else np.zeros(0)
+    scales = np.asarray(scales, dtype=np.float32)
+    safe_scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+    codes = np.clip(np.rint(vectors / safe_scales[:, None]), -127, 127)
+    return codes.astype(np.int8), scales
+
+
+class CompressedMatrix:
+    """Compressed copy of the corpus matrix used for first-pass scoring.
+
+    "float16" halves and "int8" (with a float32 scale per row) quarters the
+    memory of the float32 matrix. Scores computed from it are approximate,
+    so callers re-score a shortlist of candidates against the full-precision
+    rows before returning results.
+    """
+
+    def __init__(self, mode: str, data: np.ndarray, scales: np.ndarray = None):
+        if mode not in COMPRESSION_MODES or mode == "none":
+            raise ValueError(f"Unsupported compression mode: {mode}")
+        self.mode = mode
+        self.data = data
+        self.scales = scales
+
+    @classmethod
+    def from_embeddings(cls, embeddings: np.ndarray, mode: str) -> "CompressedMatrix":
+        if mode == "int8":
+            codes, scales = quantize_int8(embeddings)
+            return cls(mode, codes, scales)
+        return cls(mode, np.asarray(embeddings, dtype=np.float16))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, query_vectors: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """Approximate query_vectors @ embeddings.T (queries x rows).
+
+        The compressed rows are widened to float32 a block at a time (see
+        matrix_scores).
+        """
+        return matrix_scores(query_vectors, self.data, rows, self.scales)
+
+
+# Vector index implementations selectable with VECTOR_INDEX in config.py
+VECTOR_INDEX_TYPES = ("flat", "ivf")
+
+
+class FlatIndex:
+    """Exact search: every row of the (filtered) corpus is scored."""
+
+    kind = "flat"
+
+    def candidate_rows(
+        self, query_vectors: np.ndarray, rows: np.ndarray = None, k: int = 0
+    ) -> Optional[List[np.ndarray]]:
+        """Rows to score for each query, or None to score all of rows."""
+        return None
+
+    def params(self) -> Dict:
+        return {"kind": self.kind}
+
+
+class IVFIndex:
+    """Inverted-file (IVF-flat) approximate nearest-neighbour index.
+
+    The normalized embeddings are clustered with spherical k-means into
+    n_lists cells. A query only scores the rows of the n_probe cells whose
+    centroids are closest to it. Those rows are still scored exactly, so
+    recall depends only on how many true neighbours fall outside the probed
+    cells. Slices of at most exact_below rows are scanned exactly instead,
+    as are queries whose probed cells hold fewer than k matching rows.
+
+    Cells are stored CSR-style: list_rows holds the row numbers grouped by
+    cell and list_offsets[c]:list_offsets[c + 1] is cell c.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_rows: np.ndarray,
+        n_probe: int = 16,
+        exact_below: int = 0,
+    ):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.n_probe = n_probe
+        self.exact_below = exact_below
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        n_lists: int = 0,
+        n_probe: int = 16,
+        exact_below: int = 0,
+        iterations: int = 10,
+        sample_per_list: int = 64,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Cluster normalized embeddings into n_lists cells (0 = sqrt(rows)).
+
+        k-means is trained on a sample of sample_per_list rows per cell,
+        then every row is assigned to its nearest centroid. An empty corpus
+        gives an index without cells, which always scans exactly.
+        """
+        count = len(embeddings)
+        if count == 0:
+            dim = embeddings.shape[1] if np.ndim(embeddings) == 2 else 0
+            return cls(
+                np.zeros((0, dim), dtype=np.float32),
+                np.zeros(1, dtype=np.int64),
+                np.zeros(0, dtype=np.int64),
+                n_probe,
+                exact_below,
+            )
+        n_lists = n_lists or max(1, int(round(np.sqrt(count))))
+        n_lists = max(1, min(n_lists, count))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(count, n_lists * sample_per_list)
+        sample_rows = np.sort(rng.choice(count, sample_size, replace=False))
+        sample = np.asarray(embeddings[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = _nearest_centroids(sample, centroids)
+            order = np.argsort(labels, kind="stable")
+            cells, starts = np.unique(labels[order], return_index=True)
+            # Empty cells keep their previous centroid
+            centroids[cells] = np.add.reduceat(sample[order], starts, axis=0)
+            centroids = normalize_rows(centroids)
+
+        labels = _nearest_centroids(embeddings, centroids)
+        list_rows = np.argsort(labels, kind="stable").astype(np.int64)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=list_offsets[1:])
+        return cls(centroids, list_offsets, list_rows, n_probe, exact_below)
+
+    def candidate_rows(
+        self, query_vectors: np.ndarray, rows: np.ndarray = None, k: int = 0
+    ) -> Optional[List[np.ndarray]]:
+        """Sorted rows of the probed cells (restricted to rows) for each query.
+
+        Returns None when the slice is small enough to scan exactly.
+        """
+        total = len(self.list_rows) if rows is None else len(rows)
+        if total <= self.exact_below:
+            return None
+
+        mask = None
+        if rows is not None:
+            mask = np.zeros(len(self.list_rows), dtype=bool)
+            mask[rows] = True
+
+        centroid_scores = np.asarray(query_vectors, dtype=np.float32) @ (
+            self.centroids.T
+        )
+        candidates = []
+        for scores in centroid_scores:
+            cells = top_k_indices(scores, self.n_probe)
+            cell_rows = np.sort(
+                np.concatenate(
+                    [
+                        self.list_rows[self.list_offsets[c] : self.list_offsets[c + 1]]
+                        for c in cells
+                    ]
+                )
+            )
+            if mask is not None:
+                cell_rows = cell_rows[mask[cell_rows]]
+            if len(cell_rows) < k:
+                # Too few rows in the probed cells: fall back to an exact scan
+                cell_rows = np.arange(total) if rows is None else rows
+            candidates.append(cell_rows)
+        return candidates
+
+    def params(self) -> Dict:
+        return {"kind": self.kind, "n_lists": self.n_lists}
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar (normalized) centroid for each row."""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+        block = np.asarray(vectors[start : start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
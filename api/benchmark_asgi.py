@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Server Concurrency Benchmark for LC Maths Semantic Search
+Starts the Flask app under gunicorn and the ASGI app under uvicorn in turn,
+keeps --heavy threads busy with uncached searches (every query is new, so
+each one encodes) and polls /api/status from --pollers threads meanwhile.
+
+Reports status poll latency and search throughput for each server; a server
+whose slow requests hold up cheap ones shows it in the status percentiles.
+Both servers use one process and the same number of worker threads:
+  python benchmark_asgi.py [--heavy 16] [--pollers 4] [--seconds 10]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SERVERS = {
+    "gunicorn": [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "-c",
+        "gunicorn.conf.py",
+        "wsgi:app",
+    ],
+    "uvicorn": [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "asgi:app",
+        "--host",
+        "127.0.0.1",
+        "--log-level",
+        "warning",
+    ],
+}
+
+
+def get_json(url: str, data=None, timeout=120):
+    request = urllib.request.Request(
+        url,
+        data=None if data is None else json.dumps(data).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def start_server(name: str, port: int, threads: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_WORKERS="1",
+        WEB_THREADS=str(threads),
+        ASGI_WORKER_THREADS=str(threads),
+    )
+    command = SERVERS[name] + (["--port", str(port)] if name == "uvicorn" else [])
+    return subprocess.Popen(
+        command,
+        cwd=API_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if get_json(f"{url}/api/status", timeout=5).get("ready"):
+                return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} not ready after {timeout:.0f}s")
+
+
+def percentile(values, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def run_load(url: str, args, run: str) -> dict:
+    stop = threading.Event()
+    status_latencies = []
+    searches = 0
+    errors = 0
+    lock = threading.Lock()
+
+    def heavy(worker):
+        nonlocal searches, errors
+        i = 0
+        while not stop.is_set():
+            # A query no one has asked before: misses both caches
+            query = f"integration by parts {run} {worker} {i}"
+            i += 1
+            try:
+                get_json(f"{url}/api/search", {"query": query, "num_results": 5})
+                with lock:
+                    searches += 1
+            except (urllib.error.URLError, OSError):
+                with lock:
+                    errors += 1
+
+    def poll():
+        nonlocal errors
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                get_json(f"{url}/api/status")
+            except (urllib.error.URLError, OSError):
+                with lock:
+                    errors += 1
+                continue
+            with lock:
+                status_latencies.append(time.perf_counter() - start)
+            time.sleep(args.poll_interval)
+
+    threads = [
+        threading.Thread(target=heavy, args=(worker,)) for worker in range(args.heavy)
+    ] + [threading.Thread(target=poll) for _ in range(args.pollers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    status_latencies.sort()
+    return {
+        "searches_per_s": searches / args.seconds,
+        "polls": len(status_latencies),
+        "p50": percentile(status_latencies, 0.5) if status_latencies else 0.0,
+        "p95": percentile(status_latencies, 0.95) if status_latencies else 0.0,
+        "max": status_latencies[-1] * 1000 if status_latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--heavy", type=int, default=16, help="Search threads")
+    parser.add_argument("--pollers", type=int, default=4, help="Status threads")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=4, help="Server threads")
+    parser.add_argument("--port", type=int, default=5600)
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS))
+    args = parser.parse_args()
+
+    print(
+        f"{args.heavy} search threads, {args.pollers} status pollers, "
+        f"{args.seconds:.0f}s per server, {args.threads} server threads"
+    )
+    print(
+        f"{'server':>10} {'search/s':>9} {'polls':>7} "
+        f"{'status p50':>11} {'p95':>9} {'max':>9} {'errors':>7}"
+    )
+    for run, name in enumerate(args.servers):
+        port = args.port + run
+        url = f"http://127.0.0.1:{port}"
+        server = start_server(name, port, args.threads)
+        try:
+            wait_ready(url, timeout=300)
+            result = run_load(url, args, name)
+        finally:
+            server.terminate()
+            server.wait()
+        print(
+            f"{name:>10} {result['searches_per_s']:>9.1f} {result['polls']:>7} "
+            f"{result['p50']:>9.1f}ms {result['p95']:>7.1f}ms "
+            f"{result['max']:>7.1f}ms {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
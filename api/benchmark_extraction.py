@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Question Extraction Benchmark for LC Maths Semantic Search
+Measures extraction throughput in pages per second on the real papers:
+
+  pdf text:   text extraction with each installed backend (PyPDF2 is
+              used below), and reading it back from the page text cache
+  split:      splitting the text into cleaned questions with page numbers,
+              as the indexer does, against the previous implementation
+              (keyword list checked per line, linear page lookup)
+  locate:     finding every question in the marking schemes
+
+  python benchmark_extraction.py [--papers data/papers] [--repeat 20]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.marking_scheme import MarkingSchemeIndex
+from backend.nlp import MathPaperSearcher
+from backend.pdf_text import PDF_TEXT_BACKENDS, PageTextCache, check_backend
+
+
+def previous_split(pages_text):
+    """The question splitter before the shared compiled filters, for reference."""
+    full_text = ""
+    page_boundaries = []
+    current_pos = 0
+    for text, page_num in pages_text:
+        full_text += text + "\n"
+        current_pos += len(text) + 1
+        page_boundaries.append((current_pos, page_num))
+
+    questions = re.split(
+        r"(?=Question\s+\d+\s*\([^)]+\))", full_text, flags=re.IGNORECASE
+    )
+    if len(questions) < 3:
+        questions = re.split(
+            r"(?=^\d+\.\s*\([a-z]\)|\n\d+\.\s*\([a-z]\))",
+            full_text,
+            flags=re.MULTILINE,
+        )
+    if len(questions) < 3:
+        questions = re.split(
+            r"(?=^\d+\.\s+[A-Z]|\n\d+\.\s+[A-Z])", full_text, flags=re.MULTILINE
+        )
+
+    cleaned_questions = []
+    current_pos = 0
+    for q in questions:
+        q = q.strip()
+        if len(q) > 50:
+            filtered_lines = []
+            for line in q.split("\n"):
+                line = line.strip()
+                if not any(
+                    pattern in line.lower()
+                    for pattern in [
+                        "leaving certificate",
+                        "mathematics",
+                        "paper 1",
+                        "higher level",
+                        "page",
+                        "marks",
+                        "examination",
+                        "state examinations commission",
+                        "coimisiún na scrúduithe stáit",
+                        "for examiner",
+                    ]
+                ):
+                    filtered_lines.append(line)
+            cleaned_q = "\n".join(filtered_lines).strip()
+            if len(cleaned_q) > 30:
+                start = full_text.find(q, current_pos)
+                page_num = next(
+                    (page for end, page in page_boundaries if start < end),
+                    page_boundaries[-1][1] if page_boundaries else 1,
+                )
+                cleaned_questions.append((cleaned_q, page_num))
+                current_pos = start + len(q)
+    return cleaned_questions
+
+
+def pdf_paths(directory: str):
+    return [
+        os.path.join(directory, filename)
+        for filename in sorted(os.listdir(directory))
+        if filename.endswith(".pdf")
+    ]
+
+
+def installed_backends():
+    backends = []
+    for backend in PDF_TEXT_BACKENDS:
+        try:
+            backends.append(check_backend(backend))
+        except ValueError:
+            print(f"{backend:>16} not installed")
+    return backends
+
+
+def pdf_pages(paths, cache: PageTextCache):
+    return [cache.page_texts(path) for path in paths]
+
+
+def throughput(label: str, pages: int, seconds: float, baseline: float = None):
+    rate = pages / seconds
+    speedup = f"{rate / baseline:>7.1f}x" if baseline else ""
+    print(f"{label:>16} {rate:>12,.0f} pages/s {speedup}")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--papers", default="data/papers")
+    parser.add_argument("--markingschemes", default="data/markingscheme")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    paths = pdf_paths(args.papers)
+    if not paths:
+        sys.exit(f"No PDFs found in {args.papers}")
+    cache_dir = tempfile.mkdtemp(prefix="page-text-")
+
+    # First read through an empty cache: the backend extracts every page
+    extraction = {}
+    for backend in installed_backends():
+        cache = PageTextCache(os.path.join(cache_dir, backend), backend)
+        start = time.perf_counter()
+        papers = pdf_pages(paths, cache)
+        extraction[backend] = (
+            sum(len(pages) for pages in papers),
+            time.perf_counter() - start,
+        )
+    cache = PageTextCache(os.path.join(cache_dir, "pypdf2"), "pypdf2")
+    start = time.perf_counter()
+    papers = pdf_pages(paths, cache)
+    cached_seconds = time.perf_counter() - start
+    paper_pages = sum(len(pages) for pages in papers)
+    numbered = [[(text, i) for i, text in enumerate(pages, 1)] for pages in papers]
+
+    for pages_text in numbered:
+        new = list(MathPaperSearcher.split_into_questions_with_pages(pages_text))
+        if new != previous_split(pages_text):
+            sys.exit("Split output differs from the previous implementation")
+
+    print(f"{len(papers)} papers, {paper_pages} pages, split x{args.repeat}")
+    pypdf2 = throughput("pypdf2", *extraction.pop("pypdf2"))
+    for backend, (pages, seconds) in extraction.items():
+        throughput(backend, pages, seconds, pypdf2)
+    throughput("cached text", paper_pages, cached_seconds, pypdf2)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for pages_text in numbered:
+            previous_split(pages_text)
+    previous = throughput(
+        "split (previous)",
+        paper_pages * args.repeat,
+        time.perf_counter() - start,
+    )
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for pages_text in numbered:
+            for _ in MathPaperSearcher.split_into_questions_with_pages(pages_text):
+                pass
+    throughput(
+        "split", paper_pages * args.repeat, time.perf_counter() - start, previous
+    )
+
+    if os.path.isdir(args.markingschemes):
+        schemes = pdf_pages(pdf_paths(args.markingschemes), cache)
+        index = MarkingSchemeIndex(args.markingschemes, os.devnull, 12)
+        start = time.perf_counter()
+        for pages in schemes:
+            index.index_file_pages(pages, "", "")
+        throughput(
+            "locate",
+            sum(len(pages) for pages in schemes),
+            time.perf_counter() - start,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Embedding Compression Benchmark for LC Maths Semantic Search
+Compares compressed first-pass scoring against the float32 baseline:
+
+  baseline: dot product with the float32 matrix + top-k
+  float16 / int8: score the compressed matrix, re-score the best
+                  --candidates rows at float32 and keep the top k
+
+Reports matrix memory, ms per query and recall@k against the baseline
+ranking, with and without the re-ranking pass, and the ms per query of
+scoring float16 storage (EMBEDDING_CACHE_DTYPE=float16) directly. Uses random embeddings
+unless an index built by the app is given:
+  python benchmark_quantization.py [--rows 200000] [--index data/cache/index]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend import index_store
+from backend.vector_index import (
+    CompressedMatrix,
+    matrix_scores,
+    normalize_rows,
+    top_k_indices,
+)
+
+
+def load_embeddings(args, rng) -> np.ndarray:
+    if args.index:
+        manifest = index_store.read_manifest(args.index)
+        if manifest is None:
+            sys.exit(f"No index found in {args.index}")
+        embeddings, _, _ = index_store.load_index(args.index, manifest)
+        return np.asarray(embeddings, dtype=np.float32)
+    return normalize_rows(rng.standard_normal((args.rows, args.dim), dtype=np.float32))
+
+
+def make_queries(embeddings: np.ndarray, count: int, rng) -> np.ndarray:
+    """Noisy copies of random corpus rows, so each query has close neighbours."""
+    picks = rng.integers(0, len(embeddings), count)
+    noise = rng.standard_normal((count, embeddings.shape[1]), dtype=np.float32)
+    return normalize_rows(embeddings[picks] + 0.05 * noise)
+
+
+def recall(found, expected) -> float:
+    return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--index", help="Use the embeddings of an index directory")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = load_embeddings(args, rng)
+    queries = make_queries(embeddings, args.queries, rng)
+    k = min(args.k, len(embeddings))
+
+    start = time.perf_counter()
+    expected = [top_k_indices(embeddings @ query, k) for query in queries]
+    baseline_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    print(f"{len(embeddings):,} rows x {embeddings.shape[1]} dims, k={k}")
+    print(
+        f"{'storage':>8} {'MB':>8} {'saved':>6} {'ms/query':>9} "
+        f"{'recall@k':>9} {'+rerank':>8}"
+    )
+    print(
+        f"{'float32':>8} {embeddings.nbytes / 1e6:>8.1f} {'-':>6} "
+        f"{baseline_ms:>9.2f} {1.0:>9.3f} {'-':>8}"
+    )
+
+    for mode in ("float16", "int8"):
+        compressed = CompressedMatrix.from_embeddings(embeddings, mode)
+
+        approximate = []
+        reranked = []
+        start = time.perf_counter()
+        for query in queries:
+            scores = compressed.scores(query[None, :])[0]
+            shortlist = top_k_indices(scores, max(k, args.candidates))
+            exact = embeddings[shortlist] @ query
+            reranked.append(shortlist[top_k_indices(exact, k)])
+            approximate.append(shortlist[:k])
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        saved = 1 - compressed.nbytes / embeddings.nbytes
+        print(
+            f"{mode:>8} {compressed.nbytes / 1e6:>8.1f} {saved:>6.0%} {ms:>9.2f} "
+            f"{recall(approximate, expected):>9.3f} "
+            f"{recall(reranked, expected):>8.3f}"
+        )
+
+    stored = embeddings.astype(np.float16)
+    start = time.perf_counter()
+    for query in queries:
+        top_k_indices(matrix_scores(query[None, :], stored)[0], k)
+    ms = (time.perf_counter() - start) / len(queries) * 1000
+    print(f"float16 storage, scored directly: {ms:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
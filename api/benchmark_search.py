@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Search Scoring Benchmark for LC Maths Semantic Search
+Compares per-query semantic scoring cost as the corpus grows:
+
+  before: sklearn cosine_similarity over the raw matrix + full np.argsort
+  after:  dot product with pre-normalized embeddings + np.argpartition top-k
+
+Uses random embeddings, so no model or papers are needed:
+  python benchmark_search.py [--dim 384] [--k 10] [--queries 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend.vector_index import normalize_rows, top_k_indices
+
+CORPUS_SIZES = [500, 5_000, 50_000, 200_000, 500_000]
+
+
+def time_per_query(fn, queries) -> float:
+    """Average milliseconds per query."""
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'corpus':>10} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for size in CORPUS_SIZES:
+        embeddings = rng.standard_normal((size, args.dim), dtype=np.float32)
+        normalized = normalize_rows(embeddings)
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+        def before(query):
+            scores = cosine_similarity(query[None, :], embeddings)[0]
+            return np.argsort(scores)[-args.k :][::-1]
+
+        def after(query):
+            scores = normalized @ normalize_rows(query)
+            return top_k_indices(scores, args.k)
+
+        # Both paths must rank the same questions
+        assert np.array_equal(before(queries[0]), after(queries[0]))
+
+        before_ms = time_per_query(before, queries)
+        after_ms = time_per_query(after, queries)
+        print(
+            f"{size:>10,} {before_ms:>10.2f} {after_ms:>10.2f} "
+            f"{before_ms / after_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
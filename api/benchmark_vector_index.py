@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark for LC Maths Semantic Search
+Compares exact (flat) semantic search with the IVF index:
+
+  flat: score every row, top-k
+  ivf:  score only the rows of the --probes cells nearest to the query
+
+Reports build time, queries per second and recall@k against the flat
+ranking. Uses clustered random embeddings unless an index built by the
+app is given:
+  python benchmark_vector_index.py [--rows 500000] [--index data/cache/index]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backend import index_store
+from backend.vector_index import IVFIndex, normalize_rows, top_k_indices
+
+
+def load_embeddings(args, rng) -> np.ndarray:
+    if args.index:
+        manifest = index_store.read_manifest(args.index)
+        if manifest is None:
+            sys.exit(f"No index found in {args.index}")
+        embeddings, _, _ = index_store.load_index(args.index, manifest)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    # Sentence embeddings are far from uniform: draw rows around topic centres
+    topics = rng.standard_normal((args.rows // 200 + 1, args.dim), dtype=np.float32)
+    picks = rng.integers(0, len(topics), args.rows)
+    noise = rng.standard_normal((args.rows, args.dim), dtype=np.float32)
+    return normalize_rows(topics[picks] + 0.8 * noise)
+
+
+def make_queries(embeddings: np.ndarray, count: int, rng) -> np.ndarray:
+    """Noisy copies of random corpus rows, so each query has close neighbours."""
+    picks = rng.integers(0, len(embeddings), count)
+    noise = rng.standard_normal((count, embeddings.shape[1]), dtype=np.float32)
+    return normalize_rows(embeddings[picks] + 0.05 * noise)
+
+
+def recall(found, expected) -> float:
+    return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--lists", type=int, default=0, help="0 = sqrt(rows)")
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--index", help="Use the embeddings of an index directory")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = load_embeddings(args, rng)
+    queries = make_queries(embeddings, args.queries, rng)
+    k = min(args.k, len(embeddings))
+
+    start = time.perf_counter()
+    expected = [top_k_indices(embeddings @ query, k) for query in queries]
+    flat_qps = len(queries) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index = IVFIndex.build(embeddings, n_lists=args.lists)
+    build_s = time.perf_counter() - start
+
+    print(f"{len(embeddings):,} rows x {embeddings.shape[1]} dims, k={k}")
+    print(f"IVF: {index.n_lists} lists built in {build_s:.1f}s")
+    print(f"{'index':>12} {'QPS':>9} {'speedup':>8} {'recall@k':>9} {'scanned':>8}")
+    print(f"{'flat':>12} {flat_qps:>9.1f} {'1.0x':>8} {1.0:>9.3f} {'100%':>8}")
+
+    for n_probe in args.probes:
+        index.n_probe = n_probe
+        found = []
+        scanned = 0
+        start = time.perf_counter()
+        for query in queries:
+            (rows,) = index.candidate_rows(query[None, :], None, k)
+            found.append(rows[top_k_indices(embeddings[rows] @ query, k)])
+            scanned += len(rows)
+        qps = len(queries) / (time.perf_counter() - start)
+        print(
+            f"{f'ivf/{n_probe}':>12} {qps:>9.1f} {qps / flat_qps:>7.1f}x "
+            f"{recall(found, expected):>9.3f} "
+            f"{scanned / len(queries) / len(embeddings):>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
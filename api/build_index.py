@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Index prebuild for LC Maths Semantic Search
+Builds (or checks) the on-disk search index and marking scheme indexes and
+downloads the model, then exits. Run it before starting gunicorn: wsgi.py
+loads the index in the gunicorn master before binding the port, so on a
+cold cache nothing answers, not even /api/status, until the index is built.
+Railway runs this as its build command, which bakes the index into the image:
+  python build_index.py
+Exits non-zero if the index could not be built.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+
+
+def main():
+    app_module.initialize_searcher(start_watcher=False)
+    status = app_module.processing_status
+    print(f"Index build finished: {status}")
+    if status != "Ready":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
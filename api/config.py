@@ -3,6 +3,8 @@ Configuration settings for the LC Maths Question Search Web Application.
 Modify these settings to customize the application behavior.
 """
 
+import os
+
 # Server Configuration
 HOST = "0.0.0.0"  # Set to '127.0.0.1' for localhost only
 PORT = 5000  # Change if port 5000 is already in use
@@ -10,18 +12,120 @@ DEBUG = True  # Set to False for production
 
 # Data Configuration
 PAPERS_DIR = "data/papers"  # Directory containing PDF files
+MARKING_SCHEME_DIR = "data/markingscheme"  # Directory containing marking schemes
+# Collections indexed into one search index, tagged with their name as "source"
+CORPUS_SOURCES = {
+    "papers": {
+        "papers_dir": PAPERS_DIR,
+        "markingscheme_dir": MARKING_SCHEME_DIR,
+    },
+    "deferred": {
+        "papers_dir": "data/deferredpaper",
+        "markingscheme_dir": "data/deferredmarkingscheme",
+    },
+}
+MARKING_SCHEME_MAX_QUESTION = 12  # Question numbers precomputed per marking scheme
+# Processes used to extract PDF text when building the index (0 = one per CPU)
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", "0"))
+# PDF text extraction: "pypdf2" (default), or the faster "pypdfium2" or
+# "pdfminer" if installed. Page texts are cached on disk per PDF content.
+PDF_TEXT_BACKEND = os.environ.get("PDF_TEXT_BACKEND", "pypdf2")
+# Questions encoded per model call while building the index; papers are
+# streamed through extraction, encoding and disk one batch at a time
+INDEX_ENCODE_BATCH = int(os.environ.get("INDEX_ENCODE_BATCH", "256"))
+# Texts per model forward pass within those batches: texts are sorted by token
+# length first, so each pass pads its texts to about the same length
+INDEX_MODEL_BATCH = int(os.environ.get("INDEX_MODEL_BATCH", "32"))
+# PDFs are served with Cache-Control max-age PDF_CACHE_MAX_AGE seconds and
+# revalidated by ETag after that. With PDF_SERVE_GZIP, a <name>.pdf.gz written
+# by precompress_pdfs.py is sent instead to clients accepting gzip (whole-file
+# requests only; range requests always get the plain PDF). Off by default: the
+# browser's PDF viewer stops making range requests after a gzip response, and
+# the gzip copy is cached separately from the plain PDF
+PDF_CACHE_MAX_AGE = int(os.environ.get("PDF_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+PDF_SERVE_GZIP = os.environ.get("PDF_SERVE_GZIP", "false").lower() == "true"
 MAX_QUESTION_LENGTH = 800  # Maximum characters to display in search results
 
 # Search Configuration
 DEFAULT_NUM_RESULTS = 5  # Default number of search results
 MAX_NUM_RESULTS = 20  # Maximum number of search results allowed
+MAX_BATCH_QUERIES = 50  # Maximum number of queries per /api/search/batch request
+QUERY_EMBEDDING_CACHE_SIZE = 1024  # Query embeddings kept in the LRU cache (0 = off)
+SEARCH_RESULT_CACHE_SIZE = 256  # Ranked result lists kept in the LRU cache (0 = off)
 MIN_QUESTION_LENGTH = 30  # Minimum question length to include in search
 
+# Index Cache Configuration
+CACHE_DIR = "data/cache"  # Directory for the on-disk search index
+# Embedding storage on disk: "float32" or "float16" (half the size, but each
+# search widens it back to float32 block by block: about twice the float32
+# scoring time on a corpus that fits in the CPU caches, see MEMORY_OPTIMIZATION.md)
+EMBEDDING_CACHE_DTYPE = os.environ.get("EMBEDDING_CACHE_DTYPE", "float32")
+# Compressed copy of the embeddings scored first: "none", "float16" or "int8"
+# (a quarter of the float32 size). Only the top RERANK_CANDIDATES rows per
+# query are then re-scored against the full-precision embeddings. Saves
+# memory, not time: int8 scores about 1.4x and float16 about 2x slower than
+# float32 on small corpora, so prefer int8.
+EMBEDDING_COMPRESSION = os.environ.get("EMBEDDING_COMPRESSION", "none")
+RERANK_CANDIDATES = int(os.environ.get("RERANK_CANDIDATES", "100"))
+
+# Vector index used to pick the rows a query is scored against:
+#   "flat" - score every row (exact, fine up to tens of thousands of questions)
+#   "ivf"  - cluster the embeddings into IVF_LISTS cells (0 = sqrt(rows)) and
+#            score only the IVF_PROBES cells nearest to the query; slices of up
+#            to IVF_EXACT_BELOW rows are still scanned exactly
+VECTOR_INDEX = os.environ.get("VECTOR_INDEX", "flat")
+IVF_LISTS = int(os.environ.get("IVF_LISTS", "0"))
+IVF_PROBES = int(os.environ.get("IVF_PROBES", "16"))
+IVF_EXACT_BELOW = int(os.environ.get("IVF_EXACT_BELOW", "20000"))
+
+# Sub-question index: embed each part (a), (b), (c)... of a question on its
+# own and score a question by its parts, combined with SUBQUESTION_AGGREGATION
+# ("max" or "top2_mean", the mean of its two best parts). Results then point
+# at the page of the best matching part.
+SUBQUESTION_INDEX = os.environ.get("SUBQUESTION_INDEX", "false").lower() == "true"
+SUBQUESTION_AGGREGATION = os.environ.get("SUBQUESTION_AGGREGATION", "max")
+
 # Model Configuration
 SENTENCE_TRANSFORMER_MODEL = (
     "paraphrase-MiniLM-L3-v2"  # Much lighter model (~17MB vs ~80MB)
 )
 
+# Model residency policy:
+#   "resident"  - load the model once and keep it in memory (fastest searches)
+#   "idle"      - keep the model loaded, unload it after MODEL_IDLE_TIMEOUT
+#                 seconds without a search
+#   "per_query" - load the model for each search and unload it afterwards
+#                 (lowest memory, every search pays a full model load)
+MODEL_RESIDENCY = os.environ.get("MODEL_RESIDENCY", "resident")
+MODEL_IDLE_TIMEOUT = int(os.environ.get("MODEL_IDLE_TIMEOUT", "600"))  # Seconds
+# Searches allowed to run model.encode at the same time; further ones queue
+ENCODE_CONCURRENCY = int(os.environ.get("ENCODE_CONCURRENCY", "2"))
+# Query micro-batching: queries arriving within QUERY_BATCH_WINDOW_MS of each
+# other are encoded in one batch of up to QUERY_BATCH_MAX queries (0 = off)
+QUERY_BATCH_WINDOW_MS = float(os.environ.get("QUERY_BATCH_WINDOW_MS", "5"))
+QUERY_BATCH_MAX = int(os.environ.get("QUERY_BATCH_MAX", "64"))
+
+# Production server (gunicorn.conf.py): the index and model are loaded once in
+# the gunicorn master and shared copy-on-write by the forked workers
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "2"))  # Worker processes
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "4"))  # Request threads per worker
+WEB_TIMEOUT = int(os.environ.get("WEB_TIMEOUT", "120"))  # Seconds per request
+
+# ASGI server (asgi.py): routes that need real work run in a pool of
+# ASGI_WORKER_THREADS threads; beyond ASGI_MAX_PENDING waiting requests new
+# ones are turned away with 503 instead of queueing without bound
+ASGI_WORKER_THREADS = int(os.environ.get("ASGI_WORKER_THREADS", "4"))
+ASGI_MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", "64"))
+
+# Index reloading: POST /api/admin/reindex rebuilds the index in the background
+# (disabled unless ADMIN_TOKEN is set, which requests send as X-Admin-Token),
+# and with WATCH_PAPERS the papers directories are checked every WATCH_INTERVAL
+# seconds. Every WATCH_INTERVAL seconds each process also loads any newer index that
+# another process (e.g. another gunicorn worker) has committed
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+WATCH_PAPERS = os.environ.get("WATCH_PAPERS", "false").lower() == "true"
+WATCH_INTERVAL = int(os.environ.get("WATCH_INTERVAL", "30"))  # Seconds
+
 # UI Configuration
 APP_TITLE = "LC Maths Question Search"
 APP_SUBTITLE = "Search through Leaving Certificate Higher Level Mathematics papers using natural language"
@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration for LC Maths Question Search.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Worker, thread and timeout settings come from config.py (WEB_WORKERS,
+WEB_THREADS, WEB_TIMEOUT, all overridable with environment variables).
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import WEB_THREADS, WEB_TIMEOUT, WEB_WORKERS
+
+bind = f"0.0.0.0:{os.environ.get('PORT', os.environ.get('FLASK_PORT', '5000'))}"
+
+# Load the app (and with it the search index) in the master before forking
+preload_app = True
+
+workers = WEB_WORKERS
+worker_class = "gthread"
+threads = WEB_THREADS
+timeout = WEB_TIMEOUT
+graceful_timeout = 30
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    from app import init_worker
+
+    init_worker()
+    server.log.info(f"Worker {worker.pid} ready with the preloaded index")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Concurrent Search Load Test for LC Maths Semantic Search
+Runs many threaded searches at once and checks every result against a
+serial baseline, so races in the searcher show up as mismatches or errors.
+
+In-process (default): searches one MathPaperSearcher from --threads threads.
+--swap keeps re-loading the index in the background and --residency
+per_query makes every search load and unload the shared model.
+
+    python load_test.py [--threads 50] [--requests 20] [--swap]
+    python load_test.py --residency per_query
+    python load_test.py --batch-window-ms 0   # compare without micro-batching
+
+Against a running server (baseline taken from the same server):
+
+    python load_test.py --url http://localhost:5000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+QUERIES = [
+    "de moivre's theorem",
+    "prove by induction",
+    "differentiate from first principles",
+    "integration by parts",
+    "area of a triangle",
+    "probability of two independent events",
+    "equation of a circle",
+    "sum of a geometric series",
+    "complex numbers on an argand diagram",
+    "maximum and minimum points of a cubic",
+    "volume of a cone",
+    "normal distribution",
+]
+
+
+def http_search(url: str, query: str, k: int):
+    request = urllib.request.Request(
+        f"{url}/api/search",
+        data=json.dumps({"query": query, "num_results": k}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.load(response)["results"]
+
+
+def fingerprint(results):
+    """What must match the baseline: which questions, in which order."""
+    return [
+        (
+            result["metadata"]["source"],
+            result["metadata"]["filename"],
+            result["metadata"]["question_number"],
+        )
+        for result in results
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="Per thread")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--url", help="Load test a running server instead")
+    parser.add_argument("--swap", action="store_true", help="Reload the index")
+    parser.add_argument("--residency", help="Model residency policy")
+    parser.add_argument(
+        "--batch-window-ms", type=float, help="Query micro-batching window (0 = off)"
+    )
+    args = parser.parse_args()
+
+    if args.url:
+
+        def search(query):
+            return http_search(args.url.rstrip("/"), query, args.k)
+
+    else:
+        from backend.nlp import MathPaperSearcher
+
+        searcher = MathPaperSearcher(model_residency=args.residency)
+        searcher.process_papers()
+        # Every search encodes and scores: exercise the model, not the caches
+        searcher.query_embedding_cache.max_size = 0
+        searcher.search_result_cache.max_size = 0
+        if args.batch_window_ms is not None:
+            searcher.query_batch_window = args.batch_window_ms / 1000
+            searcher.query_encoder = searcher._make_query_encoder()
+
+        def search(query):
+            return searcher.search(query, k=args.k)
+
+    baseline = {query: fingerprint(search(query)) for query in QUERIES}
+
+    stop = threading.Event()
+    swaps = 0
+
+    def swap_index():
+        nonlocal swaps
+        while not stop.is_set():
+            searcher._load_from_cache()
+            swaps += 1
+            time.sleep(0.05)
+
+    latencies = []
+    mismatches = []
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(args.requests):
+            query = rng.choice(QUERIES)
+            start = time.perf_counter()
+            try:
+                results = search(query)
+            except Exception as e:
+                errors.append(f"{query}: {e!r}")
+                continue
+            latencies.append(time.perf_counter() - start)
+            if fingerprint(results) != baseline[query]:
+                mismatches.append(query)
+
+    swapper = None
+    if args.swap and not args.url:
+        swapper = threading.Thread(target=swap_index, daemon=True)
+        swapper.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(worker, range(args.threads)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    if swapper is not None:
+        swapper.join()
+
+    total = args.threads * args.requests
+    latencies.sort()
+    print(f"{total} searches from {args.threads} threads in {elapsed:.1f}s")
+    print(f"Throughput: {total / elapsed:.1f} searches/s")
+    if latencies:
+        print(
+            f"Latency: p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms, "
+            f"max {latencies[-1] * 1000:.1f} ms"
+        )
+    if swapper is not None:
+        print(f"Index swaps during the run: {swaps}")
+    if not args.url and searcher.query_encoder is not None:
+        print(f"Query batching: {searcher.query_encoder.stats()}")
+    print(f"Errors: {len(errors)}, mismatched results: {len(mismatches)}")
+    for error in errors[:5]:
+        print(f"  {error}")
+
+    sys.exit(1 if errors or mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+PDF Precompression for LC Maths Semantic Search
+Writes a gzip copy (<name>.pdf.gz) next to every paper and marking scheme,
+which the PDF routes send to browsers accepting gzip if PDF_SERVE_GZIP is
+set (off by default, as gzip responses turn off the viewer's range requests).
+
+Most of a PDF is already deflate-compressed, so a copy is only kept when it
+is at least --min-saving smaller than the original; otherwise any old copy
+is removed. Re-run after adding or replacing PDFs (stale copies, older than
+their PDF, are ignored by the server either way):
+  python precompress_pdfs.py [--min-saving 0.05] [--level 9]
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import CORPUS_SOURCES
+
+
+def pdf_paths():
+    for source in CORPUS_SOURCES.values():
+        for directory in (source["papers_dir"], source["markingscheme_dir"]):
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith(".pdf"):
+                    yield os.path.join(directory, filename)
+
+
+def compress(pdf_path: str, level: int) -> int:
+    """Write pdf_path.gz through a temporary file; return its size."""
+    gz_path = pdf_path + ".gz"
+    tmp_path = gz_path + ".tmp"
+    with open(pdf_path, "rb") as src, open(tmp_path, "wb") as raw:
+        # mtime=0 keeps the output identical across runs
+        with gzip.GzipFile(
+            filename="", mode="wb", fileobj=raw, compresslevel=level, mtime=0
+        ) as dst:
+            shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, gz_path)
+    return os.path.getsize(gz_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--min-saving", type=float, default=0.05)
+    parser.add_argument("--level", type=int, default=9)
+    args = parser.parse_args()
+
+    total_pdf = total_served = kept = 0
+    for pdf_path in pdf_paths():
+        size = os.path.getsize(pdf_path)
+        gz_size = compress(pdf_path, args.level)
+        if gz_size <= size * (1 - args.min_saving):
+            kept += 1
+            total_served += gz_size
+        else:
+            os.remove(pdf_path + ".gz")
+            total_served += size
+        total_pdf += size
+
+    if not total_pdf:
+        print("No PDFs found")
+        return
+    print(f"Kept {kept} gzip copies")
+    print(
+        f"Whole-file transfer: {total_pdf / 1e6:.1f} MB -> {total_served / 1e6:.1f} MB "
+        f"({1 - total_served / total_pdf:.1%} saved)"
+    )
+
+
+if __name__ == "__main__":
+    main()
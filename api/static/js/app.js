@@ -7,6 +7,10 @@ class MathSearchApp {
 		this.searchInput = document.getElementById("searchInput");
 		this.searchBtn = document.getElementById("searchBtn");
 		this.numResults = document.getElementById("numResults");
+		this.yearFrom = document.getElementById("yearFrom");
+		this.yearTo = document.getElementById("yearTo");
+		this.paperFilter = document.getElementById("paperFilter");
+		this.sourceFilter = document.getElementById("sourceFilter");
 		this.resultsSection = document.getElementById("resultsSection");
 		this.resultsHeader = document.getElementById("resultsHeader");
 		this.resultsCount = document.getElementById("resultsCount");
@@ -14,6 +18,7 @@ class MathSearchApp {
 		this.papersGrid = document.getElementById("papersGrid");
 		this.pdfModal = document.getElementById("pdfModal");
 		this.pdfViewer = document.getElementById("pdfViewer");
+		this.loadedPdfUrl = null; // PDF currently in the viewer (without #page)
 		this.modalTitle = document.getElementById("modalTitle");
 		this.closeModal = document.getElementById("closeModal");
 
@@ -28,6 +33,7 @@ class MathSearchApp {
 			paper: null,
 			questionNumber: null,
 			page: null,
+			source: "papers",
 		};
 
 		this.init();
@@ -168,6 +174,7 @@ class MathSearchApp {
 				body: JSON.stringify({
 					query: query,
 					num_results: parseInt(this.numResults.value),
+					filters: this.getSearchFilters(),
 				}),
 			});
 
@@ -188,6 +195,29 @@ class MathSearchApp {
 		}
 	}
 
+	getSearchFilters() {
+		// Empty selections are left out, so they don't restrict the search
+		const filters = {};
+		if (this.yearFrom.value) filters.year_from = parseInt(this.yearFrom.value);
+		if (this.yearTo.value) filters.year_to = parseInt(this.yearTo.value);
+		if (this.paperFilter.value) filters.paper = parseInt(this.paperFilter.value);
+		if (this.sourceFilter.value) filters.source = this.sourceFilter.value;
+		return filters;
+	}
+
+	populateYearFilters(yearGroups) {
+		// Years come most recent first from /api/papers
+		const years = yearGroups.map((yearData) => yearData.year).reverse();
+		[this.yearFrom, this.yearTo].forEach((select) => {
+			years.forEach((year) => {
+				const option = document.createElement("option");
+				option.value = year;
+				option.textContent = year;
+				select.appendChild(option);
+			});
+		});
+	}
+
 	displayResults(data) {
 		this.resultsHeader.style.display = "block";
 		this.resultsCount.textContent = `Found ${data.total_found} results for "${data.query}"`;
@@ -215,6 +245,13 @@ class MathSearchApp {
 
 		const similarityPercentage = (result.similarity_score * 100).toFixed(1);
 		const pageNumber = result.metadata.page_number || 1;
+		const source = result.metadata.source || "papers";
+		// Set when the sub-question index matched a part, e.g. "b"
+		const partLabel = result.metadata.part ? `(${result.metadata.part})` : "";
+		const deferredTag =
+			source === "deferred"
+				? `<span class="meta-item"><i class="fas fa-clock"></i> Deferred</span>`
+				: "";
 
 		// Create score display
 		let scoreDisplay = `<i class="fas fa-percentage"></i> ${similarityPercentage}% match`;
@@ -249,11 +286,12 @@ class MathSearchApp {
                     <span class="meta-item">
                         <i class="fas fa-question-circle"></i> Question ${
 													result.metadata.question_number
-												}
+												}${partLabel}
                     </span>
                     <span class="meta-item">
                         <i class="fas fa-file-pdf"></i> Page ${pageNumber}
                     </span>
+                    ${deferredTag}
                 </div>
                 <span class="similarity-score">
                     ${scoreDisplay}
@@ -268,7 +306,7 @@ class MathSearchApp {
 							result.metadata.year
 						}', '${result.metadata.paper}', ${pageNumber}, ${
 			result.metadata.question_number
-		})">
+		}, '${source}')">
                 <i class="fas fa-external-link-alt"></i>
                 Jump to Question (Page ${pageNumber})
             </button>
@@ -310,6 +348,7 @@ class MathSearchApp {
 			const papers = await response.json();
 
 			this.displayPapers(papers);
+			this.populateYearFilters(papers);
 		} catch (error) {
 			console.error("Error loading papers:", error);
 			this.papersGrid.innerHTML =
@@ -334,20 +373,23 @@ class MathSearchApp {
 			const papersHtml = yearData.papers
 				.map(
 					(paper) =>
-						`<div class="paper-item" onclick="app.openPdf('${yearData.year}', '${paper.paper}')">
+						`<div class="paper-item" onclick="app.openPdf('${yearData.year}', '${paper.paper}', null, '${paper.source}')">
 					<i class="fas fa-file-pdf"></i>
-					Paper ${paper.paper}
+					${this.sourceLabel(paper.source)}Paper ${paper.paper}
 				</div>`
 				)
 				.join("");
 
 			// Create marking scheme section if available
-			const markingSchemeHtml = yearData.has_marking_scheme
-				? `<div class="marking-scheme-item" onclick="app.openMarkingScheme('${yearData.year}')">
+			const markingSchemeHtml = (yearData.marking_schemes || [])
+				.map(
+					(source) =>
+						`<div class="marking-scheme-item" onclick="app.openMarkingScheme('${yearData.year}', null, '${source}')">
 					<i class="fas fa-check-circle"></i>
-					Marking Scheme
+					${this.sourceLabel(source)}Marking Scheme
 				</div>`
-				: "";
+				)
+				.join("");
 
 			yearCard.innerHTML = `
 				<div class="year-header">
@@ -363,18 +405,50 @@ class MathSearchApp {
 		});
 	}
 
-	openPdf(year, paper, page = null) {
-		let pdfUrl = `/api/pdf/${year}/${paper}`;
-		let titleText = `${year} - Paper ${paper}`;
+	sourceLabel(source) {
+		return source === "deferred" ? "Deferred " : "";
+	}
+
+	sourceQuery(source) {
+		return source && source !== "papers" ? `?source=${source}` : "";
+	}
+
+	loadPdf(pdfUrl, page = null) {
+		// Every page of a file uses the same URL, so the browser reuses its
+		// cached copy, and a file that is already open is not reloaded
+		if (this.loadedPdfUrl === pdfUrl) {
+			this.goToPage(page || 1);
+			return;
+		}
+		this.loadedPdfUrl = pdfUrl;
+		// Page fragment for the PDF viewer
+		this.pdfViewer.src = page ? `${pdfUrl}#page=${page}` : pdfUrl;
+	}
+
+	goToPage(page) {
+		// Try to scroll to the page using PDF.js viewer commands, otherwise
+		// change only the fragment, which doesn't reload the document
+		try {
+			const iframe = this.pdfViewer;
+			if (iframe.contentWindow && iframe.contentWindow.PDFViewerApplication) {
+				iframe.contentWindow.PDFViewerApplication.page = page;
+				return;
+			}
+		} catch (e) {
+			console.log("Could not navigate to specific page automatically");
+		}
+		this.pdfViewer.src = `${this.loadedPdfUrl}#page=${page}`;
+	}
+
+	openPdf(year, paper, page = null, source = "papers") {
+		const pdfUrl = `/api/pdf/${year}/${paper}${this.sourceQuery(source)}`;
+		let titleText = `${year} - ${this.sourceLabel(source)}Paper ${paper}`;
 
 		if (page) {
-			pdfUrl += `/${page}`;
 			titleText += ` (Page ${page})`;
-			// Add page fragment to URL for PDF viewer
-			pdfUrl += "#page=" + page;
 		}
 
-		this.pdfViewer.src = pdfUrl;
+		this.loadPdf(pdfUrl, page);
 		this.modalTitle.textContent = titleText;
 		this.modalSubtitle.textContent = "";
 		this.pdfModal.style.display = "block";
@@ -383,27 +457,9 @@ class MathSearchApp {
 		// Hide action buttons for normal paper viewing
 		this.viewMarkingSchemeBtn.style.display = "none";
 		this.backToQuestionBtn.style.display = "none";
-
-		// If page is specified, try to navigate to that page after a short delay
-		if (page) {
-			setTimeout(() => {
-				// Try to scroll to the specific page using PDF.js viewer commands
-				try {
-					const iframe = this.pdfViewer;
-					if (
-						iframe.contentWindow &&
-						iframe.contentWindow.PDFViewerApplication
-					) {
-						iframe.contentWindow.PDFViewerApplication.page = page;
-					}
-				} catch (e) {
-					console.log("Could not navigate to specific page automatically");
-				}
-			}, 1000);
-		}
 	}
 
-	openPdfWithQuestion(year, paper, page, questionNumber) {
+	openPdfWithQuestion(year, paper, page, questionNumber, source = "papers") {
 		// Update context
 		this.currentContext = {
 			type: "question",
@@ -411,13 +467,16 @@ class MathSearchApp {
 			paper: paper,
 			questionNumber: questionNumber,
 			page: page,
+			source: source,
 		};
 
 		// Open the PDF
-		this.openPdf(year, paper, page);
+		this.openPdf(year, paper, page, source);
 
 		// Update modal with question context
-		this.modalTitle.textContent = `${year} - Paper ${paper}`;
+		this.modalTitle.textContent = `${year} - ${this.sourceLabel(
+			source
+		)}Paper ${paper}`;
 		this.modalSubtitle.textContent = `Question ${questionNumber} (Page ${page})`;
 
 		// Show marking scheme button
@@ -425,7 +484,7 @@ class MathSearchApp {
 		this.backToQuestionBtn.style.display = "none";
 	}
 
-	async openMarkingScheme(year, questionNumber = null) {
+	async openMarkingScheme(year, questionNumber = null, source = "papers") {
 		// Update context for marking scheme viewing
 		const previousContext = { ...this.currentContext };
 		this.currentContext = {
@@ -434,12 +493,13 @@ class MathSearchApp {
 			paper: previousContext.paper,
 			questionNumber: questionNumber,
 			page: null,
+			source: source,
 			previousContext: previousContext,
 		};
 
-		let titleText = `${year} - Marking Scheme`;
+		let titleText = `${year} - ${this.sourceLabel(source)}Marking Scheme`;
 		let subtitleText = "";
-		let pdfUrl = `/api/markingscheme/${year}`;
+		const pdfUrl = `/api/markingscheme/${year}${this.sourceQuery(source)}`;
 
 		// If we have a question number, try to find the specific page
 		if (questionNumber) {
@@ -452,13 +512,14 @@ class MathSearchApp {
 
 			try {
 				const response = await fetch(
-					`/api/markingscheme/${year}/question/${questionNumber}`
+					`/api/markingscheme/${year}/question/${questionNumber}${this.sourceQuery(
+						source
+					)}`
 				);
 				const data = await response.json();
 
 				if (response.ok && data.found) {
 					// Found the question, navigate to the specific page
-					pdfUrl = `/api/markingscheme/${year}/${data.page}#page=${data.page}`;
 					subtitleText = `Solution for Question ${questionNumber} (Page ${data.page})`;
 					this.currentContext.page = data.page;
 				} else {
@@ -477,7 +538,7 @@ class MathSearchApp {
 		}
 
 		// Load the PDF
-		this.pdfViewer.src = pdfUrl;
+		this.loadPdf(pdfUrl, this.currentContext.page);
 		this.modalTitle.textContent = titleText;
 		this.modalSubtitle.textContent = subtitleText;
 		this.pdfModal.style.display = "block";
@@ -491,31 +552,14 @@ class MathSearchApp {
 			this.backToQuestionBtn.style.display = "none";
 			this.viewMarkingSchemeBtn.style.display = "none";
 		}
-
-		// Try to navigate to the specific page after PDF loads
-		if (questionNumber && this.currentContext.page) {
-			setTimeout(() => {
-				try {
-					const iframe = this.pdfViewer;
-					if (
-						iframe.contentWindow &&
-						iframe.contentWindow.PDFViewerApplication
-					) {
-						iframe.contentWindow.PDFViewerApplication.page =
-							this.currentContext.page;
-					}
-				} catch (e) {
-					console.log("Could not navigate to specific page automatically");
-				}
-			}, 1500); // Give more time for marking scheme to load
-		}
 	}
 
 	openMarkingSchemeFromModal() {
 		if (this.currentContext.type === "question") {
 			this.openMarkingScheme(
 				this.currentContext.year,
-				this.currentContext.questionNumber
+				this.currentContext.questionNumber,
+				this.currentContext.source
 			);
 		}
 	}
@@ -530,14 +574,15 @@ class MathSearchApp {
 				prev.year,
 				prev.paper,
 				prev.page,
-				prev.questionNumber
+				prev.questionNumber,
+				prev.source
 			);
 		}
 	}
 
 	closePdfModal() {
 		this.pdfModal.style.display = "none";
-		this.pdfViewer.src = "";
+		// The viewer keeps the last PDF, so reopening it is instant
 		document.body.style.overflow = "auto"; // Restore scrolling
 
 		// Reset context
@@ -547,6 +592,7 @@ class MathSearchApp {
 			paper: null,
 			questionNumber: null,
 			page: null,
+			source: "papers",
 		};
 	}
 }
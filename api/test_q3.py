@@ -1,6 +1,7 @@
-import PyPDF2
 import os
 
+from backend.pdf_text import page_texts
+
 
 def find_question_3():
     pdf_path = os.path.join("api", "data", "markingscheme", "2023-markingscheme.pdf")
@@ -9,36 +10,34 @@ def find_question_3():
         print("2023 marking scheme not found")
         return
 
-    with open(pdf_path, "rb") as file:
-        reader = PyPDF2.PdfReader(file)
-        print(f"Total pages: {len(reader.pages)}")
+    pages = page_texts(pdf_path)
+    print(f"Total pages: {len(pages)}")
 
-        # Search for Q3 Model Solution pattern
-        for page_num, page in enumerate(reader.pages, 1):
-            text = page.extract_text()
-            lines = text.split("\n")
+    # Search for Q3 Model Solution pattern
+    for page_num, text in enumerate(pages, 1):
+        lines = text.split("\n")
 
-            for line_idx, line in enumerate(lines):
-                line_clean = line.strip()
-                line_lower = line_clean.lower()
+        for line_idx, line in enumerate(lines):
+            line_clean = line.strip()
+            line_lower = line_clean.lower()
 
-                # Look for the specific pattern we saw: "Q3 Model Solution"
-                if "q3 model solution" in line_lower:
-                    print(f"\n*** FOUND Q3 on Page {page_num} ***")
-                    print(f"Line {line_idx}: {line_clean}")
+            # Look for the specific pattern we saw: "Q3 Model Solution"
+            if "q3 model solution" in line_lower:
+                print(f"\n*** FOUND Q3 on Page {page_num} ***")
+                print(f"Line {line_idx}: {line_clean}")
 
-                    # Show some context around this line
-                    print("\nContext:")
-                    start_idx = max(0, line_idx - 2)
-                    end_idx = min(len(lines), line_idx + 3)
-                    for i in range(start_idx, end_idx):
-                        marker = ">>> " if i == line_idx else "    "
-                        print(f"{marker}{i:2d}: {lines[i].strip()}")
+                # Show some context around this line
+                print("\nContext:")
+                start_idx = max(0, line_idx - 2)
+                end_idx = min(len(lines), line_idx + 3)
+                for i in range(start_idx, end_idx):
+                    marker = ">>> " if i == line_idx else "    "
+                    print(f"{marker}{i:2d}: {lines[i].strip()}")
 
-                    return page_num
+                return page_num
 
-        print("Q3 Model Solution not found")
-        return None
+    print("Q3 Model Solution not found")
+    return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend package is imported as "backend", relative to api/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
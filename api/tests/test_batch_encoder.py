@@ -0,0 +1,88 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from backend.batch_encoder import MicroBatchEncoder
+
+TIMEOUT = 5
+
+
+def vector(text):
+    return [len(text), sum(map(ord, text))]
+
+
+class RecordingModel:
+    """Fake encode_batch: one row per text, recording every batch it gets."""
+
+    def __init__(self, gate=None):
+        self.batches = []
+        self.gate = gate
+
+    def __call__(self, texts):
+        if self.gate is not None:
+            assert self.gate.wait(TIMEOUT)
+        self.batches.append(list(texts))
+        return np.array([vector(text) for text in texts], dtype=np.float32)
+
+
+def test_rows_come_back_in_request_order():
+    encoder = MicroBatchEncoder(RecordingModel(), window=0, max_batch=32)
+
+    rows = encoder.encode(["integral", "limit", "integral"])
+
+    np.testing.assert_array_equal(
+        rows, [vector("integral"), vector("limit"), vector("integral")]
+    )
+
+
+def test_concurrent_requests_share_batches():
+    gate = threading.Event()
+    model = RecordingModel(gate)
+    encoder = MicroBatchEncoder(model, window=0.05, max_batch=64)
+    queries = [f"query {i % 10}" for i in range(40)]
+
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        futures = [pool.submit(encoder.encode, [query]) for query in queries]
+        # Requests queue up while the first batch is held at the model
+        gate.set()
+        results = [future.result(TIMEOUT) for future in futures]
+
+    for query, rows in zip(queries, results):
+        np.testing.assert_array_equal(rows, [vector(query)])
+    assert len(model.batches) < len(queries)
+    assert all(len(batch) == len(set(batch)) for batch in model.batches)
+    assert encoder.stats()["batches"] == len(model.batches)
+
+
+def test_batches_stop_at_max_batch():
+    gate = threading.Event()
+    model = RecordingModel(gate)
+    encoder = MicroBatchEncoder(model, window=0.05, max_batch=4)
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        futures = [pool.submit(encoder.encode, [f"q{i}"]) for i in range(20)]
+        gate.set()
+        for future in futures:
+            future.result(TIMEOUT)
+
+    assert max(len(batch) for batch in model.batches) <= 4
+    assert sum(len(batch) for batch in model.batches) == 20
+
+
+def test_errors_reach_every_request_of_the_batch():
+    calls = []
+
+    def encode_batch(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError("model failed")
+        return np.array([vector(text) for text in texts], dtype=np.float32)
+
+    encoder = MicroBatchEncoder(encode_batch, window=0, max_batch=8)
+
+    with pytest.raises(RuntimeError, match="model failed"):
+        encoder.encode(["limit"])
+    # The encoder thread survives a failed batch
+    np.testing.assert_array_equal(encoder.encode(["limit"]), [vector("limit")])
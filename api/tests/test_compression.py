@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from backend import vector_index
+from backend.vector_index import (
+    CompressedMatrix,
+    normalize_rows,
+    quantize_int8,
+    top_k_indices,
+)
+
+K = 10
+RERANK_CANDIDATES = 100
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(0)
+    embeddings = normalize_rows(rng.standard_normal((3000, 64)))
+    queries = normalize_rows(rng.standard_normal((20, 64)))
+    return embeddings, queries
+
+
+def reranked_top_k(embeddings, compressed, query):
+    """Approximate shortlist, re-scored at full precision (as search() does)."""
+    approximate = compressed.scores(query[None, :])[0]
+    shortlist = top_k_indices(approximate, RERANK_CANDIDATES)
+    exact = embeddings[shortlist] @ query
+    return shortlist[top_k_indices(exact, K)]
+
+
+@pytest.mark.parametrize("mode", ["float16", "int8"])
+def test_reranked_top_k_equals_flat_top_k(corpus, mode):
+    embeddings, queries = corpus
+    compressed = CompressedMatrix.from_embeddings(embeddings, mode)
+
+    for query in queries:
+        flat = top_k_indices(embeddings @ query, K)
+        assert reranked_top_k(embeddings, compressed, query).tolist() == flat.tolist()
+
+
+@pytest.mark.parametrize("mode, tolerance", [("float16", 1e-3), ("int8", 2e-2)])
+def test_compressed_scores_approximate_exact_scores(corpus, mode, tolerance):
+    embeddings, queries = corpus
+    compressed = CompressedMatrix.from_embeddings(embeddings, mode)
+
+    np.testing.assert_allclose(
+        compressed.scores(queries), queries @ embeddings.T, atol=tolerance
+    )
+
+
+def test_int8_matrix_is_a_quarter_of_float32(corpus):
+    embeddings, _ = corpus
+    compressed = CompressedMatrix.from_embeddings(embeddings, "int8")
+
+    assert compressed.data.dtype == np.int8
+    assert compressed.nbytes == embeddings.nbytes // 4 + 4 * len(embeddings)
+
+
+def test_quantize_int8_keeps_zero_rows():
+    codes, scales = quantize_int8(np.array([[0.0, 0.0], [0.5, -1.0]]))
+
+    assert codes.tolist() == [[0, 0], [64, -127]]
+    np.testing.assert_allclose(scales, [0.0, 1.0 / 127])
+
+
+def test_scores_on_rows_across_blocks(corpus, monkeypatch):
+    monkeypatch.setattr(vector_index, "SCORE_BLOCK_ROWS", 7)
+    embeddings, queries = corpus
+    compressed = CompressedMatrix.from_embeddings(embeddings, "int8")
+    rows = np.arange(5, 3000, 37)
+
+    np.testing.assert_allclose(
+        compressed.scores(queries, rows),
+        compressed.scores(queries)[:, rows],
+        atol=1e-6,
+    )
+
+
+def test_none_is_not_a_compressed_mode():
+    with pytest.raises(ValueError):
+        CompressedMatrix("none", np.zeros((1, 2)))
+
+
+def test_float16_widening_is_exact_for_every_finite_value():
+    values = np.arange(65536, dtype=np.uint16).view(np.float16)
+    values = values[np.isfinite(values)].reshape(-1, 1)
+    out = np.empty(values.shape, dtype=np.int32)
+
+    widened = vector_index._widen_float16(values, out) * np.float32(2.0**112)
+
+    np.testing.assert_array_equal(widened, values.astype(np.float32))
@@ -0,0 +1,112 @@
+import pytest
+
+from backend.filters import RowFilter, parse_filters
+from backend.index_store import metadata_to_records
+
+METADATA = [
+    {
+        "year": str(year),
+        "paper": str(paper),
+        "question_number": question,
+        "filename": f"{year}-paper{paper}.pdf",
+        "page_number": 2 * question + paper,
+        "source": source,
+    }
+    for source, years in (("papers", range(2012, 2020)), ("deferred", (2016, 2018)))
+    for year in years
+    for paper in (1, 2)
+    for question in range(1, 6)
+]
+
+
+@pytest.fixture(scope="module")
+def row_filter():
+    records, _, sources = metadata_to_records(METADATA)
+    return RowFilter(records, sources)
+
+
+def matching_rows(filters):
+    """Rows of METADATA matching filters, checked one question at a time."""
+    filters = dict(filters)
+
+    def matches(meta):
+        year, paper, page = int(meta["year"]), int(meta["paper"]), meta["page_number"]
+        return (
+            filters.get("year_from", year) <= year <= filters.get("year_to", year)
+            and filters.get("paper", paper) == paper
+            and filters.get("page_from", page) <= page <= filters.get("page_to", page)
+            and filters.get("source", meta["source"]) == meta["source"]
+        )
+
+    return [row for row, meta in enumerate(METADATA) if matches(meta)]
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"year_from": 2015},
+        {"year_to": 2013},
+        {"year_from": 2014, "year_to": 2016},
+        {"year_from": 2016, "year_to": 2016, "paper": 2},
+        {"paper": 1, "source": "deferred"},
+        {"source": "papers", "page_from": 5, "page_to": 8},
+        {"page_to": 4},
+        {"year_from": "2017", "paper": "2", "page_from": "9"},
+    ],
+)
+def test_select_matches_a_row_by_row_scan(row_filter, filters):
+    rows = row_filter.select(parse_filters(filters))
+
+    assert rows.tolist() == matching_rows(parse_filters(filters))
+
+
+def test_empty_filters_select_every_row(row_filter):
+    assert parse_filters(None) == ()
+    assert parse_filters({}) == ()
+    assert parse_filters({"year_from": None, "source": ""}) == ()
+    assert row_filter.select(()) is None
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"year_from": 2030},
+        {"year_from": 2016, "year_to": 2015},
+        {"paper": 3},
+        {"source": "unknown"},
+        {"source": "deferred", "year_to": 2015},
+        {"page_from": 100},
+    ],
+)
+def test_filters_matching_nothing_select_no_rows(row_filter, filters):
+    rows = row_filter.select(parse_filters(filters))
+
+    assert rows is not None and len(rows) == 0
+
+
+def test_empty_corpus():
+    records, _, sources = metadata_to_records([])
+    row_filter = RowFilter(records, sources)
+
+    assert row_filter.select(parse_filters({"year_from": 2015})).tolist() == []
+    assert row_filter.select(parse_filters({"page_to": 3})).tolist() == []
+
+
+@pytest.mark.parametrize(
+    "filters, message",
+    [
+        ({"year": 2015}, "Unknown filters: year"),
+        ({"paper": "two"}, "Filter paper must be an integer"),
+        ({"source": 1}, "Filter source must be a string"),
+        (["year_from"], "filters must be an object"),
+    ],
+)
+def test_invalid_filters_are_rejected(filters, message):
+    with pytest.raises(ValueError, match=message):
+        parse_filters(filters)
+
+
+def test_parsed_filters_are_canonical():
+    assert parse_filters({"paper": "1", "year_from": 2015}) == parse_filters(
+        {"year_from": "2015", "paper": 1}
+    )
@@ -0,0 +1,182 @@
+import os
+
+import numpy as np
+import pytest
+
+from backend import index_store
+from backend.index_store import IndexWriter, load_index, read_manifest
+from backend.keyword_index import KeywordIndex
+from backend.subquestions import PART_DTYPE
+from backend.vector_index import CompressedMatrix, IVFIndex, normalize_rows
+
+
+def paper(year, paper_num, questions, source="papers"):
+    metadata = [
+        {
+            "year": str(year),
+            "paper": str(paper_num),
+            "question_number": number,
+            "filename": f"{year}-paper{paper_num}.pdf",
+            "page_number": number + 1,
+            "source": source,
+        }
+        for number in range(1, len(questions) + 1)
+    ]
+    return questions, metadata
+
+
+PAPERS = [
+    paper(2019, 1, ["Find ∫ x² dx.", "Prove that √2 is irrational."]),
+    paper(2019, 2, ["Solve for x: 2x + 3 = 7."]),
+    paper(2020, 1, ["Differentiate sin(x)."], source="deferred"),
+]
+
+
+@pytest.fixture(scope="module")
+def embeddings():
+    rng = np.random.default_rng(4)
+    return normalize_rows(rng.standard_normal((4, 8)))
+
+
+def write_index(index_dir, embeddings, dtype="float32", cache_key="key", **derived):
+    with IndexWriter(str(index_dir), dtype) as writer:
+        row = 0
+        for questions, metadata in PAPERS:
+            writer.append(embeddings[row : row + len(questions)], questions, metadata)
+            row += len(questions)
+        writer.finish()
+        return writer.commit(cache_key, **derived)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_round_trip_through_load_index(tmp_path, embeddings, dtype):
+    generation = write_index(tmp_path, embeddings, dtype)
+
+    manifest = read_manifest(str(tmp_path))
+    assert manifest["cache_key"] == "key"
+    assert manifest["generation"] == generation
+    loaded_embeddings, questions, metadata = load_index(str(tmp_path), manifest)
+
+    assert isinstance(loaded_embeddings, np.memmap)
+    assert loaded_embeddings.dtype == np.dtype(dtype)
+    np.testing.assert_allclose(loaded_embeddings, embeddings, atol=1e-3)
+    assert list(questions) == [q for questions, _ in PAPERS for q in questions]
+    assert list(metadata) == [m for _, metadata in PAPERS for m in metadata]
+    assert questions[-1] == "Differentiate sin(x)."
+    assert metadata[1:3] == PAPERS[0][1][1:] + PAPERS[1][1][:1]
+
+
+def test_derived_structures_round_trip(tmp_path, embeddings):
+    questions = [q for questions, _ in PAPERS for q in questions]
+    keyword_index = KeywordIndex(questions)
+    write_index(
+        tmp_path,
+        embeddings,
+        compressed=CompressedMatrix.from_embeddings(embeddings, "int8"),
+        vector_index=IVFIndex.build(embeddings, n_lists=2),
+        keyword_index=keyword_index,
+    )
+    manifest = read_manifest(str(tmp_path))
+
+    compressed = index_store.load_compressed(str(tmp_path), manifest)
+    np.testing.assert_allclose(
+        compressed.scores(embeddings), embeddings @ embeddings.T, atol=2e-2
+    )
+    assert index_store.load_vector_index(str(tmp_path), manifest).n_lists == 2
+    loaded_keywords = index_store.load_keyword_index(str(tmp_path), manifest)
+    np.testing.assert_allclose(
+        loaded_keywords.score("irrational"), keyword_index.score("irrational")
+    )
+
+
+def test_parts_round_trip(tmp_path, embeddings):
+    part_rows = normalize_rows(np.random.default_rng(5).standard_normal((3, 8)))
+    part_counts = np.array([2, 1])
+    part_records = np.array([(2, "a"), (2, "b"), (3, "")], dtype=PART_DTYPE)
+    questions, metadata = PAPERS[0]
+
+    with IndexWriter(str(tmp_path), parts=True) as writer:
+        writer.append(
+            embeddings[:2], questions, metadata, (part_rows, part_counts, part_records)
+        )
+        writer.finish()
+        writer.commit("key")
+
+    manifest = read_manifest(str(tmp_path))
+    parts = index_store.load_parts(str(tmp_path), manifest)
+    assert parts.offsets.tolist() == [0, 2, 3]
+    np.testing.assert_allclose(parts.embeddings, part_rows)
+    assert parts.best_part(part_rows[1], 0) == ("b", 2)
+
+
+def test_empty_index_round_trip(tmp_path):
+    with IndexWriter(str(tmp_path)) as writer:
+        writer.finish()
+        writer.commit("key")
+
+    embeddings, questions, metadata = load_index(
+        str(tmp_path), read_manifest(str(tmp_path))
+    )
+    assert len(embeddings) == len(questions) == len(metadata) == 0
+
+
+def test_rebuild_replaces_the_index_and_its_generation(tmp_path, embeddings):
+    first = write_index(tmp_path, embeddings, cache_key="old")
+
+    with IndexWriter(str(tmp_path)) as writer:
+        questions, metadata = PAPERS[1]
+        writer.append(embeddings[:1], questions, metadata)
+        writer.finish()
+        # The old manifest no longer describes the files
+        assert read_manifest(str(tmp_path)) is None
+        second = writer.commit("new")
+
+    manifest = read_manifest(str(tmp_path))
+    assert second != first
+    assert manifest["cache_key"] == "new"
+    _, questions, metadata = load_index(str(tmp_path), manifest)
+    assert list(questions) == PAPERS[1][0]
+    assert list(metadata) == PAPERS[1][1]
+
+
+def test_unfinished_writer_leaves_the_old_index(tmp_path, embeddings):
+    write_index(tmp_path, embeddings)
+    files = sorted(os.listdir(tmp_path))
+
+    with pytest.raises(RuntimeError):
+        with IndexWriter(str(tmp_path)) as writer:
+            questions, metadata = PAPERS[1]
+            writer.append(embeddings[:1], questions, metadata)
+            raise RuntimeError
+
+    assert sorted(os.listdir(tmp_path)) == files
+    manifest = read_manifest(str(tmp_path))
+    assert len(load_index(str(tmp_path), manifest)[1]) == 4
+
+
+def test_mismatched_rows_are_rejected(tmp_path, embeddings):
+    questions, metadata = PAPERS[0]
+
+    with IndexWriter(str(tmp_path)) as writer:
+        with pytest.raises(ValueError):
+            writer.append(embeddings[:1], questions, metadata)
+    with pytest.raises(ValueError):
+        IndexWriter(str(tmp_path), "int8")
+
+
+def test_files_not_matching_the_manifest_are_rejected(tmp_path, embeddings):
+    write_index(tmp_path, embeddings)
+    manifest = dict(read_manifest(str(tmp_path)), count=3)
+
+    with pytest.raises(ValueError):
+        load_index(str(tmp_path), manifest)
+
+
+def test_manifest_of_another_format_version_is_ignored(tmp_path, embeddings):
+    write_index(tmp_path, embeddings)
+    manifest = read_manifest(str(tmp_path))
+    index_store._write_manifest(
+        str(tmp_path), dict(manifest, version=index_store.INDEX_FORMAT_VERSION - 1)
+    )
+
+    assert read_manifest(str(tmp_path)) is None
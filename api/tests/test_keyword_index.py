@@ -0,0 +1,103 @@
+import math
+
+import numpy as np
+import pytest
+
+from backend.keyword_index import (
+    BM25_WEIGHT,
+    PHRASE_WEIGHT,
+    KeywordIndex,
+)
+
+QUESTIONS = [
+    "Integrate the function",  # 3 words
+    "Differentiate the function twice",  # 4 words
+    "Integrate, then integrate again",  # 4 words, "integrate" twice
+]
+
+# 11 words over 3 questions
+AVG_LENGTH = 11 / 3
+
+
+def bm25_term(tf, length, doc_freq, count=3, k1=1.2, b=0.75):
+    idf = math.log(1 + (count - doc_freq + 0.5) / (doc_freq + 0.5))
+    return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / AVG_LENGTH))
+
+
+@pytest.fixture
+def index():
+    return KeywordIndex(QUESTIONS)
+
+
+def test_bm25_matches_hand_computed_scores(index):
+    docs, scores, best_possible = index.bm25(["integrate"])
+
+    assert docs.tolist() == [0, 2]
+    assert scores[0] == pytest.approx(bm25_term(tf=1, length=3, doc_freq=2))
+    assert scores[1] == pytest.approx(bm25_term(tf=2, length=4, doc_freq=2))
+    assert best_possible == pytest.approx(math.log(1.6) * 2.2)
+
+
+def test_bm25_sums_terms_and_counts_unmatched_terms_in_best_possible(index):
+    docs, scores, best_possible = index.bm25(["function", "twice", "missing"])
+
+    assert docs.tolist() == [0, 1]
+    assert scores[0] == pytest.approx(bm25_term(tf=1, length=3, doc_freq=2))
+    assert scores[1] == pytest.approx(
+        bm25_term(tf=1, length=4, doc_freq=2) + bm25_term(tf=1, length=4, doc_freq=1)
+    )
+    idf_missing = math.log(1 + 3.5 / 0.5)
+    assert best_possible == pytest.approx(
+        (math.log(1.6) + math.log(1 + 2.5 / 1.5) + idf_missing) * 2.2
+    )
+
+
+def test_prefix_terms_match_every_completion(index):
+    docs, freqs = index.term_postings("differ")
+    assert docs.tolist() == [1]
+    assert freqs.tolist() == [1]
+
+    docs, freqs = index.term_postings("integr")
+    assert docs.tolist() == [0, 2]
+    assert freqs.tolist() == [1, 2]
+
+
+def test_phrase_matches_need_consecutive_words(index):
+    assert index.phrase_matches(["the", "function"]).tolist() == [0, 1]
+    assert index.phrase_matches(["function", "twice"]).tolist() == [1]
+    assert index.phrase_matches(["function", "the"]).tolist() == []
+    assert index.phrase_matches(["the", "missing"]).tolist() == []
+
+
+def test_score_adds_phrase_weight_to_scaled_bm25(index):
+    scores = index.score("function twice")
+
+    best_possible = (math.log(1.6) + math.log(1 + 2.5 / 1.5)) * 2.2
+    expected_bm25 = [
+        bm25_term(tf=1, length=3, doc_freq=2),
+        bm25_term(tf=1, length=4, doc_freq=2) + bm25_term(tf=1, length=4, doc_freq=1),
+        0.0,
+    ]
+    expected = np.array(expected_bm25) / best_possible * BM25_WEIGHT
+    expected[1] += PHRASE_WEIGHT
+    np.testing.assert_allclose(scores, expected)
+
+
+def test_score_of_stop_words_only_is_zero(index):
+    assert index.score("find the").tolist() == [0.0, 0.0, 0.0]
+
+
+def test_score_on_rows_matches_full_scores(index):
+    full = index.score("integrate the function")
+    rows = np.array([1, 2])
+
+    np.testing.assert_allclose(index.score("integrate the function", rows), full[rows])
+    assert index.score("integrate", np.array([], dtype=np.int64)).shape == (0,)
+
+
+def test_from_arrays_round_trip(index):
+    restored = KeywordIndex.from_arrays(index.vocab, index.arrays())
+
+    np.testing.assert_allclose(
+        restored.score("integrate the function"), index.score("integrate the function")
+    )
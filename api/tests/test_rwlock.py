@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from backend.rwlock import ReadWriteLock
+
+TIMEOUT = 5
+
+
+def start(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_until(predicate):
+    deadline = time.monotonic() + TIMEOUT
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_inside = threading.Barrier(2, timeout=TIMEOUT)
+
+    def reader():
+        with lock.read_lock():
+            both_inside.wait()
+
+    threads = [start(reader), start(reader)]
+    for thread in threads:
+        thread.join(TIMEOUT)
+        assert not thread.is_alive()
+
+
+def test_waiting_writer_goes_before_new_readers():
+    lock = ReadWriteLock()
+    order = []
+    release_first_reader = threading.Event()
+    first_reader_inside = threading.Event()
+
+    def first_reader():
+        with lock.read_lock():
+            first_reader_inside.set()
+            release_first_reader.wait(TIMEOUT)
+        order.append("first reader")
+
+    def writer():
+        with lock.write_lock():
+            order.append("writer")
+
+    def second_reader():
+        with lock.read_lock():
+            order.append("second reader")
+
+    threads = [start(first_reader)]
+    assert first_reader_inside.wait(TIMEOUT)
+    threads.append(start(writer))
+    wait_until(lambda: lock._waiting_writers == 1)
+    threads.append(start(second_reader))
+    # The second reader must queue behind the writer, not join the first
+    time.sleep(0.05)
+    assert order == []
+
+    release_first_reader.set()
+    for thread in threads:
+        thread.join(TIMEOUT)
+        assert not thread.is_alive()
+    assert order.index("writer") < order.index("second reader")
+
+
+def test_writer_excludes_readers_and_no_reader_is_lost():
+    lock = ReadWriteLock()
+    state = {"readers": 0, "writing": False, "reads": 0, "writes": 0}
+    state_lock = threading.Lock()
+    errors = []
+
+    def reader():
+        for _ in range(200):
+            with lock.read_lock():
+                with state_lock:
+                    if state["writing"]:
+                        errors.append("reader inside while writing")
+                    state["readers"] += 1
+                time.sleep(0)
+                with state_lock:
+                    state["readers"] -= 1
+                    state["reads"] += 1
+
+    def writer():
+        for _ in range(50):
+            with lock.write_lock():
+                with state_lock:
+                    if state["readers"]:
+                        errors.append("writer inside with readers")
+                    state["writing"] = True
+                time.sleep(0)
+                with state_lock:
+                    state["writing"] = False
+                    state["writes"] += 1
+
+    threads = [start(reader) for _ in range(8)] + [start(writer) for _ in range(2)]
+    for thread in threads:
+        thread.join(TIMEOUT)
+        assert not thread.is_alive(), "deadlocked"
+
+    assert errors == []
+    assert state["reads"] == 8 * 200
+    assert state["writes"] == 2 * 50
+    assert lock._readers == 0 and not lock._writer and not lock._waiting_writers
+
+
+def test_exceptions_release_the_lock():
+    lock = ReadWriteLock()
+
+    with pytest.raises(RuntimeError):
+        with lock.read_lock():
+            raise RuntimeError
+    with pytest.raises(RuntimeError):
+        with lock.write_lock():
+            raise RuntimeError
+
+    def writer():
+        with lock.write_lock():
+            pass
+
+    thread = start(writer)
+    thread.join(TIMEOUT)
+    assert not thread.is_alive()
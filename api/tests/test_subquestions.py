@@ -0,0 +1,166 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from backend.subquestions import (
+    PART_DTYPE,
+    PartIndex,
+    aggregate_scores,
+    paper_part_rows,
+    part_starts,
+)
+from backend.vector_index import normalize_rows
+
+# Parts per question; a question without parts is its own single part
+PART_COUNTS = [3, 1, 2, 4, 1]
+
+
+@pytest.fixture(scope="module")
+def part_index():
+    rng = np.random.default_rng(2)
+    embeddings = normalize_rows(rng.standard_normal((sum(PART_COUNTS), 16)))
+    offsets = np.concatenate([[0], np.cumsum(PART_COUNTS)]).astype(np.int64)
+    records = np.array(
+        [
+            (10 + question, "abcd"[part] if count > 1 else "")
+            for question, count in enumerate(PART_COUNTS)
+            for part in range(count)
+        ],
+        dtype=PART_DTYPE,
+    )
+    return PartIndex(embeddings, offsets, records)
+
+
+@pytest.fixture(scope="module")
+def queries():
+    return normalize_rows(np.random.default_rng(3).standard_normal((4, 16)))
+
+
+def per_question(part_index, queries, aggregate):
+    """Question scores computed one question at a time."""
+    scores = queries @ part_index.embeddings.T
+    return np.array(
+        [
+            [
+                aggregate(query_scores[start:end])
+                for start, end in zip(part_index.offsets[:-1], part_index.offsets[1:])
+            ]
+            for query_scores in scores
+        ]
+    )
+
+
+def top2_mean(part_scores):
+    if len(part_scores) == 1:
+        return part_scores[0]
+    return np.sort(part_scores)[-2:].mean()
+
+
+def test_max_aggregation_takes_the_best_part(part_index, queries):
+    np.testing.assert_allclose(
+        part_index.scores(queries, aggregation="max"),
+        per_question(part_index, queries, np.max),
+        rtol=1e-6,
+    )
+
+
+def test_top2_mean_aggregation(part_index, queries):
+    np.testing.assert_allclose(
+        part_index.scores(queries, aggregation="top2_mean"),
+        per_question(part_index, queries, top2_mean),
+        rtol=1e-6,
+    )
+
+
+def test_tied_best_parts_count_twice():
+    scores = np.array([[0.5, 0.9, 0.9, 0.2]], dtype=np.float32)
+    starts = np.array([0, 3])
+    counts = np.array([3, 1])
+
+    assert aggregate_scores(scores, starts, counts, "top2_mean").tolist() == [
+        [pytest.approx(0.9), pytest.approx(0.2)]
+    ]
+
+
+@pytest.mark.parametrize("aggregation", ["max", "top2_mean"])
+def test_scores_on_rows_match_full_scores(part_index, queries, aggregation):
+    rows = np.array([0, 3, 4])
+
+    np.testing.assert_allclose(
+        part_index.scores(queries, rows, aggregation),
+        part_index.scores(queries, aggregation=aggregation)[:, rows],
+        rtol=1e-6,
+    )
+    assert part_index.scores(queries, rows[:0], aggregation).shape == (4, 0)
+
+
+def test_compressed_scores_are_close_and_exact_is_exact(part_index, queries):
+    exact = per_question(part_index, queries, np.max)
+    compressed = PartIndex(
+        part_index.embeddings, part_index.offsets, part_index.records
+    )
+    compressed.compress("int8")
+
+    np.testing.assert_allclose(compressed.scores(queries), exact, atol=2e-2)
+    np.testing.assert_allclose(compressed.scores(queries, exact=True), exact, rtol=1e-6)
+
+
+def test_best_part_reports_label_and_page(part_index):
+    # The query is part (c) of question 3 itself
+    label, page = part_index.best_part(part_index.embeddings[8], 3)
+    assert (label, page) == ("c", 13)
+
+    assert part_index.best_part(part_index.embeddings[3], 1) == (None, 11)
+
+
+def test_offsets_must_cover_the_embeddings(part_index):
+    with pytest.raises(ValueError):
+        PartIndex(part_index.embeddings, part_index.offsets[:-1], part_index.records)
+
+
+def test_part_starts_need_two_parts_in_order():
+    text = "2. (a) Find x.\n(i) first\n(b) Hence y.\nas in part (a)\n(c) Show z."
+
+    assert [label for _, label in part_starts(text)] == ["a", "b", "c"]
+    assert part_starts("(a) only one part") == []
+    assert part_starts("(b) out of order\n(c) again") == []
+
+
+def test_paper_part_rows_reuse_the_question_row_without_parts():
+    embeddings = np.eye(3, dtype=np.float32)
+    part_embeddings = np.full((2, 3), 0.5, dtype=np.float32)
+    questions = [
+        ("Q1", 4, []),
+        ("Q2", 5, [("a", "...", 5), ("b", "...", 6)]),
+        ("Q3", 7, []),
+    ]
+
+    rows, counts, records = paper_part_rows(questions, embeddings, part_embeddings)
+
+    np.testing.assert_array_equal(
+        rows, [embeddings[0], part_embeddings[0], part_embeddings[1], embeddings[2]]
+    )
+    assert counts.tolist() == [1, 2, 1]
+    assert records["label"].tolist() == [b"", b"a", b"b", b""]
+    assert records["page_number"].tolist() == [4, 5, 6, 7]
+
+
+def test_float16_parts_are_scored_without_a_float32_copy():
+    rng = np.random.default_rng(7)
+    offsets = np.arange(0, 40001, 2)
+    embeddings = normalize_rows(rng.standard_normal((40000, 128)))
+    records = np.zeros(40000, dtype=PART_DTYPE)
+    stored = PartIndex(embeddings.astype(np.float16), offsets, records)
+    exact = PartIndex(stored.embeddings.astype(np.float32), offsets, records)
+    queries = normalize_rows(rng.standard_normal((2, 128)))
+
+    np.testing.assert_allclose(stored.scores(queries), exact.scores(queries), atol=1e-6)
+    tracemalloc.start()
+    try:
+        stored.scores(queries)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # Part and question scores plus one block buffer, not the 20 MB matrix
+    assert peak < stored.embeddings.size * 4 / 4
@@ -0,0 +1,136 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from backend.vector_index import (
+    FlatIndex,
+    IVFIndex,
+    matrix_scores,
+    normalize_rows,
+    top_k_indices,
+)
+
+K = 10
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(1)
+    embeddings = normalize_rows(rng.standard_normal((2000, 32)))
+    queries = normalize_rows(rng.standard_normal((15, 32)))
+    return embeddings, queries
+
+
+def ivf_top_k(index, embeddings, query, rows=None):
+    """Top k rows among the IVF candidates, scored exactly (as search() does)."""
+    candidates = index.candidate_rows(query[None, :], rows, K)
+    if candidates is None:
+        candidates = [np.arange(len(embeddings)) if rows is None else rows]
+    cell_rows = candidates[0]
+    return cell_rows[top_k_indices(embeddings[cell_rows] @ query, K)]
+
+
+def test_lists_partition_the_rows(corpus):
+    embeddings, _ = corpus
+    index = IVFIndex.build(embeddings, n_lists=40)
+
+    assert index.n_lists == 40
+    assert index.list_offsets[0] == 0 and index.list_offsets[-1] == len(embeddings)
+    assert np.all(np.diff(index.list_offsets) >= 0)
+    assert sorted(index.list_rows.tolist()) == list(range(len(embeddings)))
+
+
+def test_default_lists_are_sqrt_of_rows(corpus):
+    embeddings, _ = corpus
+    assert IVFIndex.build(embeddings).n_lists == 45
+
+
+def test_probing_every_list_equals_exact_search(corpus):
+    embeddings, queries = corpus
+    index = IVFIndex.build(embeddings, n_lists=40, n_probe=40)
+
+    for query in queries:
+        exact = top_k_indices(embeddings @ query, K)
+        assert ivf_top_k(index, embeddings, query).tolist() == exact.tolist()
+
+
+def test_probing_every_list_equals_exact_search_on_filtered_rows(corpus):
+    embeddings, queries = corpus
+    index = IVFIndex.build(embeddings, n_lists=40, n_probe=40)
+    rows = np.arange(3, len(embeddings), 5)
+
+    for query in queries:
+        exact = rows[top_k_indices(embeddings[rows] @ query, K)]
+        assert ivf_top_k(index, embeddings, query, rows).tolist() == exact.tolist()
+
+
+def test_candidates_stay_within_rows(corpus):
+    embeddings, queries = corpus
+    index = IVFIndex.build(embeddings, n_lists=40, n_probe=2)
+    rows = np.arange(0, len(embeddings), 3)
+
+    for cell_rows in index.candidate_rows(queries, rows, K):
+        assert np.all(np.isin(cell_rows, rows))
+        assert np.all(np.diff(cell_rows) > 0)
+
+
+def test_too_few_candidates_fall_back_to_an_exact_scan(corpus):
+    embeddings, queries = corpus
+    index = IVFIndex.build(embeddings, n_lists=40, n_probe=1)
+    rows = np.arange(0, len(embeddings), 400)
+
+    for cell_rows in index.candidate_rows(queries, rows, k=len(rows)):
+        assert cell_rows.tolist() == rows.tolist()
+
+
+def test_small_slices_are_scanned_exactly(corpus):
+    embeddings, queries = corpus
+    index = IVFIndex.build(embeddings, n_lists=40, exact_below=100)
+
+    assert index.candidate_rows(queries, np.arange(100)) is None
+    assert index.candidate_rows(queries, np.arange(101)) is not None
+    assert FlatIndex().candidate_rows(queries) is None
+
+
+def test_empty_corpus_builds_an_index_without_lists():
+    index = IVFIndex.build(np.zeros((0, 32), dtype=np.float32), n_lists=16)
+
+    assert index.n_lists == 0
+    assert index.params() == {"kind": "ivf", "n_lists": 0}
+    assert index.candidate_rows(np.ones((1, 32), dtype=np.float32), k=K) is None
+
+
+def peak_allocation(function):
+    """Peak bytes allocated (numpy buffers included) while calling function."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float16])
+def test_matrix_scores_match_float32_scores(corpus, dtype):
+    embeddings, queries = corpus
+    stored = embeddings.astype(dtype)
+    exact = queries @ stored.astype(np.float32).T
+    rows = np.arange(1, len(embeddings), 3)
+
+    np.testing.assert_allclose(matrix_scores(queries, stored), exact, atol=1e-6)
+    np.testing.assert_allclose(
+        matrix_scores(queries, stored, rows), exact[:, rows], atol=1e-6
+    )
+
+
+def test_float16_storage_is_scored_without_a_float32_copy():
+    rng = np.random.default_rng(6)
+    stored = normalize_rows(rng.standard_normal((50000, 64))).astype(np.float16)
+    queries = normalize_rows(rng.standard_normal((2, 64)))
+    float32_copy = stored.size * 4
+
+    peak = peak_allocation(lambda: matrix_scores(queries, stored))
+
+    # Scores (2 x 50000) plus one block buffer, not the 12.8 MB matrix
+    assert peak < float32_copy / 4
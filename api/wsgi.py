@@ -0,0 +1,28 @@
+"""
+WSGI entry point for production serving with gunicorn:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (see gunicorn.conf.py) this module is imported once in the
+gunicorn master, so the index is built or loaded and the model warmed up
+before the workers are forked. The workers then share the embeddings,
+questions and model weights copy-on-write instead of each loading a copy.
+
+The port is only bound after that, so with a cold cache nothing answers until
+the index is built; run build_index.py first (Railway does it at build time).
+"""
+
+import gc
+
+from app import app, initialize_searcher
+
+# Load synchronously: workers must not start before the index is ready. The
+# master serves no requests, so only the workers watch the index (post_fork)
+initialize_searcher(start_watcher=False)
+
+# Move everything loaded so far out of the garbage collector's generations,
+# so collections in the workers don't write to (and un-share) those pages
+gc.collect()
+gc.freeze()
+
+__all__ = ["app"]